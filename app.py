@@ -1,14 +1,12 @@
 import streamlit as st
 import streamlit.components.v1 as components # Importação necessária para o hack do idioma
 import pandas as pd
-import plotly.graph_objects as go
 from datetime import datetime, timedelta
 
 # Importações dos módulos locais
-from src.services import sincronizar_dados_completo
-from src.gsheets_api import baixar_dados_google_sheet, ler_abas_planilha, baixar_ultimas_reservas_consolidadas, baixar_proximos_hospedes_consolidados
-from src.logic import create_gantt_chart, verificar_disponibilidade, consolidar_e_salvar_reservas, tratar_dataframe_consolidado
-from src.config import APARTMENT_SHEET_MAP
+from src.services import sincronizar_dados_completo, carregar_snapshot_consolidado, SnapshotConsolidado
+from src.logic import create_gantt_chart, aplicar_destaque_selecao, buscar_janelas_livres
+from src.manifest import carregar_manifesto
 import src.ui as ui
 
 # --- Configuração da Página ---
@@ -29,10 +27,14 @@ components.html("""
 # --- Inicialização do Session State ---
 if 'gantt_fig' not in st.session_state:
     st.session_state.gantt_fig = None
+if 'gantt_base' not in st.session_state:
+    st.session_state.gantt_base = None
 if 'check_result_msg' not in st.session_state:
     st.session_state.check_result_msg = None
 if 'check_result_status' not in st.session_state:
     st.session_state.check_result_status = None 
+if 'janelas_livres' not in st.session_state:
+    st.session_state.janelas_livres = None
 
 # Inicializa datas se não existirem
 if 'checkin_input' not in st.session_state:
@@ -43,29 +45,19 @@ if 'checkout_input' not in st.session_state:
 # A inicialização manual de 'mobile_mode' foi removida para evitar conflito com o valor padrão do widget no ui.py
 
 # --- CARREGAMENTO DE DADOS ---
-@st.cache_data(ttl=300)
-def carregar_dados_consolidados():
+@st.cache_resource(ttl=300)
+def carregar_snapshot():
+    """
+    Baixa 'Reservas Consolidadas' uma única vez por TTL.
+    Gráfico, disponibilidade, próximos hóspedes e últimas reservas derivam deste snapshot.
+    cache_resource devolve sempre o mesmo objeto (cache_data devolveria uma cópia
+    desserializada a cada chamada, com DataFrames e índice): o snapshot é só leitura.
+    """
     try:
-        # Tenta baixar da aba consolidada primeiro
-        df = baixar_dados_google_sheet("Reservas Consolidadas")
-        
-        # Se estiver vazia ou mal formatada, tenta reconstruir das abas individuais
-        if df.empty or len(df.columns) < 3:
-            dfs = ler_abas_planilha(APARTMENT_SHEET_MAP)
-            all_reservas = []
-            for apt, df_apt in dfs.items():
-                if df_apt is not None and not df_apt.empty:
-                    df_apt['Apartamento'] = apt
-                    all_reservas.append(df_apt)
-            if all_reservas:
-                df = pd.concat(all_reservas, ignore_index=True)
-            else:
-                return pd.DataFrame()
-        
-        return tratar_dataframe_consolidado(df)
+        return carregar_snapshot_consolidado()
     except Exception as e:
         st.error(f"Erro ao carregar dados: {e}")
-        return pd.DataFrame()
+        return SnapshotConsolidado(bruto=pd.DataFrame(), reservas=pd.DataFrame())
 
 def obter_ultima_sincronizacao(df):
     """
@@ -90,18 +82,35 @@ def obter_ultima_sincronizacao(df):
         print(f"Erro ao extrair última sincronização: {e}")
         return None
 
+def obter_grafico_base(snapshot, apts_sel, is_mobile):
+    """
+    Gráfico base (sem destaque) em cache na sessão, como dicionário já validado.
+    Só é regerado quando mudam os apartamentos, o modo mobile, a versão dos dados
+    ou a hora corrente (linha do "agora" e início do fundo do calendário).
+    """
+    chave = (tuple(sorted(apts_sel)), is_mobile, snapshot.versao, datetime.now().strftime('%Y-%m-%d %H'))
+    cache = st.session_state.get('gantt_base')
+    if cache is not None and cache['chave'] == chave:
+        return cache['fig']
+
+    df_filtered = snapshot.reservas[snapshot.reservas['Apartamento'].isin(apts_sel)]
+    fig = create_gantt_chart(df_filtered, is_mobile=is_mobile)
+    st.session_state.gantt_base = {'chave': chave, 'fig': fig.to_dict() if fig else None}
+    return st.session_state.gantt_base['fig']
+
 # --- Callbacks ---
 
 def on_sync_click():
     """Callback para o botão de sincronização."""
     with st.spinner("Sincronizando dados..."):
         try:
-            logs = sincronizar_dados_completo()
+            logs = sincronizar_dados_completo(forcar=st.session_state.get('forcar_sync_completa', False))
             st.success("Sincronização concluída!")
-            st.cache_data.clear() # Limpa o cache para recarregar dados novos
+            carregar_snapshot.clear() # Limpa o cache para recarregar dados novos
             
             # Força recarga dos dados
-            df_novo = carregar_dados_consolidados()
+            snapshot = carregar_snapshot()
+            df_novo = snapshot.reservas
             
             # Atualiza gráfico se houver dados
             if not df_novo.empty:
@@ -109,10 +118,9 @@ def on_sync_click():
                 if not apts_sel:
                     apts_sel = sorted(df_novo['Apartamento'].unique())
                 
-                df_filtered = df_novo[df_novo['Apartamento'].isin(apts_sel)]
                 # CORREÇÃO: Default True para garantir visualização mobile no carregamento pós-sync
                 is_mobile = st.session_state.get('mobile_mode', True)
-                st.session_state.gantt_fig = create_gantt_chart(df_filtered, is_mobile=is_mobile)
+                st.session_state.gantt_fig = aplicar_destaque_selecao(obter_grafico_base(snapshot, apts_sel, is_mobile), [], None, None)
             
             st.session_state.check_result_msg = None
             st.rerun()
@@ -121,15 +129,14 @@ def on_sync_click():
 
 def atualizar_grafico_base():
     """Callback: Gera apenas o gráfico base quando o filtro de apartamentos muda."""
-    df_completo = carregar_dados_consolidados()
-    if df_completo.empty: return
+    snapshot = carregar_snapshot()
+    if snapshot.reservas.empty: return
 
     apts_sel = st.session_state.apts_multiselect
-    df_filtered = df_completo[df_completo['Apartamento'].isin(apts_sel)]
     
     # CORREÇÃO: Default True aqui também
     is_mobile = st.session_state.get('mobile_mode', True)
-    st.session_state.gantt_fig = create_gantt_chart(df_filtered, is_mobile=is_mobile)
+    st.session_state.gantt_fig = aplicar_destaque_selecao(obter_grafico_base(snapshot, apts_sel, is_mobile), [], None, None)
     st.session_state.check_result_msg = None
     st.session_state.check_result_status = None
 
@@ -156,8 +163,9 @@ def gerar_grafico_e_verificar():
         st.session_state.check_result_msg = "⚠️ ERRO: A data de Check-out deve ser posterior à de Check-in."
         return
 
-    # 2. Dados
-    df_completo = carregar_dados_consolidados()
+    # 2. Dados (snapshot obtido uma única vez por callback)
+    snapshot = carregar_snapshot()
+    df_completo = snapshot.reservas
     if df_completo.empty:
         st.session_state.check_result_status = 'error'
         st.session_state.check_result_msg = "Erro: Dados não carregados."
@@ -166,52 +174,15 @@ def gerar_grafico_e_verificar():
     if not apts_sel:
         apts_sel = sorted(df_completo['Apartamento'].unique())
 
-    df_filtered = df_completo[df_completo['Apartamento'].isin(apts_sel)]
-
-    # 3. Lógica de Verificação
-    livres, ocupados = verificar_disponibilidade(df_filtered, dt_ini_reserva, dt_fim_reserva)
+    # 3. Lógica de Verificação (índice de intervalos montado junto com o snapshot)
+    livres, ocupados = snapshot.indice.consultar(dt_ini_reserva, dt_fim_reserva, apartamentos=apts_sel)
     
-    # 4. Gerar Gráfico
+    # 4. Gráfico base em cache + 5. Highlight (Sua Seleção) aplicado sobre uma cópia
     # CORREÇÃO: Default True para mobile
     is_mobile = st.session_state.get('mobile_mode', True)
-    fig = create_gantt_chart(df_filtered, is_mobile=is_mobile)
-    
-    if fig:
-        # 5. Adicionar Highlight (Sua Seleção)
-        if livres:
-            duracao_ms = (dt_fim_reserva - dt_ini_reserva).total_seconds() * 1000
-            
-            fig.add_trace(go.Bar(
-                name="Sua Seleção",
-                x=[duracao_ms] * len(livres),
-                y=livres,
-                base=[dt_ini_reserva] * len(livres),
-                orientation='h',
-                marker=dict(color='rgba(255, 215, 0, 0.5)', line=dict(width=1, color='gold')), 
-                text=["SUA SELEÇÃO"] * len(livres),
-                textposition='inside',
-                insidetextanchor='middle',
-                textfont=dict(color='black', size=12, weight='bold'),
-                hoverinfo="text",
-                hovertext=[
-                    f"<b>DISPONÍVEL: {ap}</b><br>Início: {dt_ini_reserva.strftime('%d/%m %H:%M')}<br>Fim: {dt_fim_reserva.strftime('%d/%m %H:%M')}" 
-                    for ap in livres
-                ]
-            ))
-
-            # --- AJUSTE DE ZOOM CONSISTENTE ---
-            # Se for mobile, usa um range menor (8 dias à frente) para manter as barras largas (zoom in)
-            # Se for desktop, usa um range maior (20 dias à frente)
-            days_fwd = 8 if is_mobile else 20
-            days_back = 2 if is_mobile else 3
-
-            fig.update_layout(
-                barmode='overlay',
-                xaxis=dict(range=[dt_ini_reserva - pd.Timedelta(days=days_back), dt_fim_reserva + pd.Timedelta(days=days_fwd)]),
-                xaxis2=dict(range=[dt_ini_reserva - pd.Timedelta(days=days_back), dt_fim_reserva + pd.Timedelta(days=days_fwd)])
-            )
-        
-        st.session_state.gantt_fig = fig
+    fig_base = obter_grafico_base(snapshot, apts_sel, is_mobile)
+    if fig_base:
+        st.session_state.gantt_fig = aplicar_destaque_selecao(fig_base, livres, dt_ini_reserva, dt_fim_reserva, is_mobile=is_mobile)
     
     # 6. Definir Mensagem de Resultado
     msg_html = f"**📅 Período:** {dt_ini_reserva.strftime('%d/%m/%Y')} até {dt_fim_reserva.strftime('%d/%m/%Y')}\n\n"
@@ -227,16 +198,32 @@ def gerar_grafico_e_verificar():
         
     st.session_state.check_result_msg = msg_html
 
+def buscar_janelas():
+    """
+    Callback do Botão Buscar Janelas.
+    Lista as próximas janelas livres de cada apartamento selecionado, sem regerar o gráfico.
+    """
+    apts_sel = st.session_state.get('apts_multiselect') or None
+    st.session_state.janelas_livres = buscar_janelas_livres(
+        carregar_snapshot().indice,
+        noites=int(st.session_state.janelas_noites),
+        inicio=st.session_state.janelas_inicio,
+        horizonte_dias=int(st.session_state.janelas_horizonte),
+        apartamentos=apts_sel,
+        max_por_apartamento=int(st.session_state.janelas_max)
+    )
+
 # --- Main Execution ---
 
 ui.render_custom_css()
 
 # Carrega dados iniciais
-df_reservas = carregar_dados_consolidados()
+snapshot = carregar_snapshot()
+df_reservas = snapshot.reservas
 ultima_sync = obter_ultima_sincronizacao(df_reservas)
 
 # Renderiza Sidebar
-ui.render_sidebar(ultima_sync, on_sync_click, on_mobile_mode_change=atualizar_grafico_base)
+ui.render_sidebar(ultima_sync, on_sync_click, on_mobile_mode_change=atualizar_grafico_base, manifesto=carregar_manifesto())
 
 # Renderiza Header
 ui.render_main_header()
@@ -261,11 +248,15 @@ if not df_reservas.empty:
 
     st.divider()
 
+    # --- BUSCA DE JANELAS LIVRES ---
+    ui.render_free_windows(buscar_janelas)
+
+    st.divider()
+
     # --- EXIBIR TABELA DE PRÓXIMOS HÓSPEDES ---
     st.markdown("### 📋 Próximos Hóspedes")
     
-    with st.spinner("Buscando próximas chegadas..."):
-        df_proximos_hospedes = baixar_proximos_hospedes_consolidados()
+    df_proximos_hospedes = snapshot.proximos_hospedes()
     
     if not df_proximos_hospedes.empty:
         # Conversão e limpeza de dados
@@ -366,9 +357,8 @@ if not df_reservas.empty:
     # --- EXIBIR TABELA DE ÚLTIMAS RESERVAS ---
     st.markdown("### 📋 Últimas Reservas (Top 3 por Apto)")
     
-    with st.spinner("Buscando reservas recentes..."):
-        # Chama a função importada do gsheets_api
-        df_recents = baixar_ultimas_reservas_consolidadas()
+    # Calculado em memória a partir do mesmo snapshot
+    df_recents = snapshot.ultimas_reservas()
         
     if not df_recents.empty:
         # Garante que as colunas de data sejam datetime para ordenação correta
@@ -1,37 +1,34 @@
 import pandas as pd
 import os
-import time
 from datetime import datetime, timedelta
 from src.config import OTA_URLS, APARTMENT_SHEET_MAP, SHEET_KEY
-from src.data_loader import baixar_calendario_ota, atualizar_summaries_ical, save_dataframe_to_ical
-from src.gsheets_api import baixar_dados_google_sheet, inserir_linha_google_sheet
+from src.data_loader import baixar_calendarios_otas, save_dataframe_to_ical
+from src.gsheets_api import ler_valores_abas_em_lote, reservas_da_aba, AcumuladorLinhas
 from src.logic import merge_ical_files, ler_calendario_ics
-from src.utils import parse_pt_date
+from src.utils import parse_pt_dates
+from src.arquivos import bloqueio_apartamento
 
 # --- Step 1: Baixar Calendários das OTAs ---
 def step_1_baixar_otas():
     print("\n--- PASSO 1: Baixando Calendários das OTAs ---")
     
-    # Flat list of all calendars to download
+    # Downloads em paralelo: o tempo total é o do calendário mais lento
     # OTA_URLS structure: {'c108': {'airbnb': 'url', 'booking': 'url'}, ...}
-    
-    tasks = []
-    
-    for apt, sources in OTA_URLS.items():
-        for source, url in sources.items():
-            filename = f"{apt}_{source}.ics"
-            tasks.append((url, filename))
+    resultados = baixar_calendarios_otas(OTA_URLS)
 
     count = 0
-    for url, filename in tasks:
-        if baixar_calendario_ota(url, filename):
-            atualizar_summaries_ical(filename)
-            print(f"  [OK] {filename}")
+    for resultado in resultados.values():
+        # O SUMMARY é padronizado na leitura (ler_calendario_ics), sem reescrever o .ics
+        if resultado.alterado:
+            print(f"  [OK] {resultado}")
+            count += 1
+        elif resultado.sucesso:
+            print(f"  [INALTERADO] {resultado}")
             count += 1
         else:
-            print(f"  [ERRO] Falha ao baixar {filename}")
+            print(f"  [ERRO] Falha ao baixar {resultado}")
             
-    print(f"Passo 1 concluído: {count}/{len(tasks)} calendários baixados.")
+    print(f"Passo 1 concluído: {count}/{len(resultados)} calendários baixados.")
 
 # --- Step 2: Baixar Calendários do Google Sheets ---
 def step_2_baixar_google_sheets():
@@ -40,23 +37,27 @@ def step_2_baixar_google_sheets():
     def formatar_dataframe_reservas(df):
         if df.empty: return df
         if 'Início' in df.columns:
-            df['Início'] = df['Início'].apply(parse_pt_date)
+            df['Início'] = parse_pt_dates(df['Início'])
             df['Início'] = df['Início'].apply(lambda x: x + timedelta(hours=15) if pd.notnull(x) and x.time() == datetime.min.time() else x)
         if 'Fim' in df.columns:
-            df['Fim'] = df['Fim'].apply(parse_pt_date)
+            df['Fim'] = parse_pt_dates(df['Fim'])
             df['Fim'] = df['Fim'].apply(lambda x: x + timedelta(hours=11) if pd.notnull(x) and x.time() == datetime.min.time() else x)
         return df
 
+    # Todas as abas em uma única requisição (values.batchGet)
+    valores = ler_valores_abas_em_lote(APARTMENT_SHEET_MAP, abas_extras=())
+
     for apt, tab_name in APARTMENT_SHEET_MAP.items():
         fname_short = f'{apt}_google.ics'
         try:
-            df = baixar_dados_google_sheet(tab_name)
+            df = reservas_da_aba(valores[tab_name], tab_name) if tab_name in valores else None
             if df is None or df.empty:
                 print(f"  [AVISO] Sem dados para {apt} ({tab_name})")
                 continue
             df = formatar_dataframe_reservas(df)
             # data_loader.save_dataframe_to_ical prepends CALENDARS_DIR
-            save_dataframe_to_ical(df, fname_short)
+            with bloqueio_apartamento(apt):
+                save_dataframe_to_ical(df, fname_short)
             print(f"  [OK] calendars/{fname_short} gerado.")
         except Exception as e:
             print(f"  [ERRO] {apt}: {e}")
@@ -77,21 +78,22 @@ def step_3_juntar_calendarios():
         path_airbnb = os.path.join('calendars', fname_airbnb_short)
         path_booking = os.path.join('calendars', fname_booking_short)
         
-        # Merge simples (Concat)
-        df_ab = ler_calendario_ics(path_airbnb)
-        if not df_ab.empty: df_ab['Origem'] = 'Airbnb'
-        
-        df_bk = pd.DataFrame()
-        if os.path.exists(path_booking):
-            df_bk = ler_calendario_ics(path_booking)
-            if not df_bk.empty: df_bk['Origem'] = 'Booking'
+        # Merge simples (Concat), sob a trava do apartamento (app e CLI podem sincronizar juntos)
+        with bloqueio_apartamento(apt):
+            df_ab = ler_calendario_ics(path_airbnb)
+            if not df_ab.empty: df_ab['Origem'] = 'Airbnb'
             
-        df_otas = pd.concat([df_ab, df_bk], ignore_index=True)
-        if not df_otas.empty:
-             save_dataframe_to_ical(df_otas, fname_merged_short)
-             print(f"    [OK] {apt} merged OTA ({len(df_otas)} events)")
-        else:
-             print(f"    [AVISO] {apt} merged OTA empty")
+            df_bk = pd.DataFrame()
+            if os.path.exists(path_booking):
+                df_bk = ler_calendario_ics(path_booking)
+                if not df_bk.empty: df_bk['Origem'] = 'Booking'
+                
+            df_otas = pd.concat([df_ab, df_bk], ignore_index=True)
+            if not df_otas.empty:
+                 save_dataframe_to_ical(df_otas, fname_merged_short)
+                 print(f"    [OK] {apt} merged OTA ({len(df_otas)} events)")
+            else:
+                 print(f"    [AVISO] {apt} merged OTA empty")
 
     # 2. Merge OTA + Google
     print("  3.2: Mesclando OTA + Google...")
@@ -114,7 +116,8 @@ def step_3_juntar_calendarios():
              # save_dataframe_to_ical prepends CALENDARS_DIR.
              # SO output_filename PASSED to merge_ical_files must be SHORT name.
              
-             merge_ical_files(path_otas, path_google, fname_final_short)
+             with bloqueio_apartamento(apt):
+                 merge_ical_files(path_otas, path_google, fname_final_short)
              print(f"    [OK] {apt} Final Merge Created")
         else:
              print(f"    [SKIP] {apt} missing input files for final merge")
@@ -176,6 +179,7 @@ def step_5_atualizar_google_sheets(inconsistencias):
     for item in inconsistencias:
         grouped[item['Apartamento']].append(item)
         
+    pendencias = AcumuladorLinhas()
     for apt, items in grouped.items():
         tab_name = APARTMENT_SHEET_MAP.get(apt)
         if not tab_name: continue
@@ -220,20 +224,14 @@ def step_5_atualizar_google_sheets(inconsistencias):
                  datetime.now().strftime('%d/%m/%Y %H:%M:%S') # Log
             ]
             
-            # The function expects a list of lists if we modify it or just a list?
-            # src.gsheets_api.inserir_linha_google_sheet takes `dados_linha` (list of values).
-            # And it wraps it in a list inside: `for l in linha_dados: worksheet.insert_row(l...)` if passed a list of lists?
-            # Reading source: `if not isinstance(linha_dados, list): ... for l in linha_dados: ...`
-            # Wait, the source says: `for l in linha_dados: worksheet.insert_row(l...)`. 
-            # This implies `linha_dados` should be a LIST OF LISTS (rows).
-            
-            try:
-                inserir_linha_google_sheet([row_data], tab_name=tab_name)
-                print(f"    Inserido: {dt_inicio} - {dt_fim}")
-                # Rate limit safety
-                time.sleep(1.5)
-            except Exception as e:
-                print(f"    Erro ao inserir: {e}")
+            pendencias.adicionar(row_data, tab_name)
+            print(f"    Preparado: {dt_inicio} - {dt_fim}")
+
+    # Uma requisição append_rows por aba (429 é tratado com novas tentativas, sem sleep fixo)
+    for tab_name, qtd in pendencias.gravar().items():
+        print(f"  [OK] {qtd} linhas inseridas em {tab_name}")
+    for tab_name, qtd in pendencias.pendentes.items():
+        print(f"  [ERRO] {qtd} linhas não inseridas em {tab_name}")
 
 def main():
     print("=== INICIANDO SINCRONIZAÇÃO COMPLETA ===")
@@ -0,0 +1,168 @@
+import os
+import json
+import stat
+import tempfile
+import threading
+import time
+from contextlib import contextmanager, suppress
+from pathlib import Path
+
+from src.config import LOCKS_DIR
+
+if os.name == 'nt':
+    import msvcrt
+else:
+    import fcntl
+
+# Escrita segura dos arquivos em calendars/, que podem estar sendo lidos ao mesmo
+# tempo por outra sessão do Streamlit ou pelo sinccronizacao.py:
+# - gravacao_atomica: grava num temporário da mesma pasta, faz fsync e troca com
+#   os.replace; quem lê vê o arquivo antigo inteiro ou o novo inteiro, nunca metade.
+# - bloqueio_apartamento: trava de arquivo por apartamento, para que duas
+#   sincronizações do mesmo apartamento rodem uma de cada vez (apartamentos
+#   diferentes continuam em paralelo).
+
+# No Windows o os.replace falha enquanto outro processo está com o destino aberto
+TENTATIVAS_SUBSTITUICAO = 10
+ESPERA_SUBSTITUICAO = 0.05  # segundos, multiplicado pela tentativa
+
+
+def _permissoes_destino(caminho):
+    # mkstemp cria com 0600; mantém as permissões do arquivo substituído (ou 0644)
+    try:
+        return stat.S_IMODE(os.stat(caminho).st_mode)
+    except OSError:
+        return 0o644
+
+
+def _substituir(origem, destino):
+    for tentativa in range(1, TENTATIVAS_SUBSTITUICAO + 1):
+        try:
+            os.replace(origem, destino)
+            return
+        except PermissionError:
+            if tentativa == TENTATIVAS_SUBSTITUICAO:
+                raise
+            time.sleep(ESPERA_SUBSTITUICAO * tentativa)
+
+
+def _sincronizar_pasta(pasta):
+    # Garante que a troca de nomes sobreviva a uma queda de energia (só POSIX)
+    if os.name == 'nt':
+        return
+    with suppress(OSError):
+        fd = os.open(pasta, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+
+@contextmanager
+def gravacao_atomica(caminho, modo='wb', encoding=None):
+    """
+    Abre um temporário ao lado de `caminho` para escrita e, ao sair do bloco sem erro,
+    faz fsync e o coloca no lugar de `caminho` com os.replace.
+    Se o bloco levantar exceção, o temporário é apagado e `caminho` fica intacto.
+
+    Ex.: with gravacao_atomica(CALENDARS_DIR / 'c108_google.ics') as f:
+             f.write(conteudo)
+    """
+    caminho = Path(caminho)
+    fd, temporario = tempfile.mkstemp(dir=caminho.parent, prefix=f".{caminho.name}.", suffix='.tmp')
+    try:
+        with os.fdopen(fd, modo, encoding=encoding) as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(temporario, _permissoes_destino(caminho))
+        _substituir(temporario, caminho)
+    except BaseException:
+        with suppress(OSError):
+            os.remove(temporario)
+        raise
+    _sincronizar_pasta(caminho.parent)
+
+
+def gravar_bytes_atomico(caminho, conteudo):
+    """Grava `conteudo` (bytes) em `caminho` de forma atômica."""
+    with gravacao_atomica(caminho, 'wb') as f:
+        f.write(conteudo)
+
+
+def gravar_json_atomico(caminho, dados, **kwargs):
+    """Grava `dados` como JSON (UTF-8) em `caminho` de forma atômica. kwargs vão para json.dump."""
+    with gravacao_atomica(caminho, 'w', encoding='utf-8') as f:
+        json.dump(dados, f, **kwargs)
+
+
+class _Trava:
+    """Estado de uma trava de apartamento dentro deste processo."""
+
+    def __init__(self):
+        self.rlock = threading.RLock()
+        self.nivel = 0
+        self.arquivo = None
+
+
+_travas = {}
+_travas_lock = threading.Lock()
+
+
+def _travar_arquivo(arquivo):
+    if os.name == 'nt':
+        # LK_LOCK desiste depois de ~10 s; insiste até conseguir
+        while True:
+            try:
+                arquivo.seek(0)
+                msvcrt.locking(arquivo.fileno(), msvcrt.LK_LOCK, 1)
+                return
+            except OSError:
+                continue
+    fcntl.flock(arquivo.fileno(), fcntl.LOCK_EX)
+
+
+def _destravar_arquivo(arquivo):
+    if os.name == 'nt':
+        arquivo.seek(0)
+        msvcrt.locking(arquivo.fileno(), msvcrt.LK_UNLCK, 1)
+    else:
+        fcntl.flock(arquivo.fileno(), fcntl.LOCK_UN)
+
+
+@contextmanager
+def bloqueio_apartamento(apt, pasta_calendarios=None):
+    """
+    Trava exclusiva do apartamento `apt`, entre threads e entre processos
+    (arquivo `{apt}.lock` com flock no POSIX ou msvcrt no Windows).
+    É reentrante na mesma thread: blocos aninhados do mesmo apartamento não travam.
+
+    A trava fica em `pasta_calendarios/locks`, ao lado dos arquivos que protege;
+    sem a pasta, em LOCKS_DIR (calendars/locks).
+    """
+    pasta = Path(pasta_calendarios) / "locks" if pasta_calendarios is not None else Path(LOCKS_DIR)
+    caminho = pasta / f"{apt}.lock"
+    with _travas_lock:
+        trava = _travas.setdefault(str(caminho), _Trava())
+
+    with trava.rlock:
+        if trava.nivel == 0:
+            caminho.parent.mkdir(parents=True, exist_ok=True)
+            arquivo = open(caminho, 'a+b')
+            try:
+                _travar_arquivo(arquivo)
+            except BaseException:
+                arquivo.close()
+                raise
+            trava.arquivo = arquivo
+        trava.nivel += 1
+        try:
+            yield
+        finally:
+            trava.nivel -= 1
+            if trava.nivel == 0:
+                arquivo, trava.arquivo = trava.arquivo, None
+                try:
+                    _destravar_arquivo(arquivo)
+                finally:
+                    arquivo.close()
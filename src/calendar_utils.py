@@ -1,8 +1,7 @@
 import requests
 import pandas as pd
-from icalendar import Calendar
-import io
 from src import config
+from src.ics_stream import ler_eventos_ics
 
 def download_and_parse_calendar(url, ota_name):
     """
@@ -15,34 +14,17 @@ def download_and_parse_calendar(url, ota_name):
     try:
         response = requests.get(url)
         response.raise_for_status()
-        cal = Calendar.from_ical(response.content)
-        
-        events = []
-        for component in cal.walk():
-            if component.name == "VEVENT":
-                summary = component.get('summary')
-                # Decode bytes if necessary, though icalendar usually handles it
-                if isinstance(summary, bytes):
-                    summary = summary.decode('utf-8')
-                else:
-                    summary = str(summary) if summary else None
 
-                start = component.get('dtstart').dt
-                end = component.get('dtend').dt
-                uid = component.get('uid')
-                if isinstance(uid, bytes):
-                    uid = uid.decode('utf-8')
-                else:
-                    uid = str(uid) if uid else None
-                
-                events.append({
-                    'ota': ota_name,
-                    'summary': summary,
-                    'start': start,
-                    'end': end,
-                    'uid': uid,
-                    'description': str(component.get('description', ''))
-                })
+        events = []
+        for start, end, summary, uid, description in ler_eventos_ics(response.content):
+            events.append({
+                'ota': ota_name,
+                'summary': summary or None,
+                'start': start,
+                'end': end,
+                'uid': uid or None,
+                'description': description or ''
+            })
         return events
     except Exception as e:
         print(f"Error processing {ota_name} calendar from {url}: {e}")
@@ -54,16 +36,17 @@ def apply_summary_rules(row):
     """
     summary = row['summary']
     
-    if summary == 'CLOSED - Not available':
-        return 'Booking'
-    elif summary == 'Airbnb (Not available)':
-        return 'Direto'
-    elif summary == 'Reserved':
-        return 'Airbnb'
-    elif not summary:
+    if pd.isna(summary) or not summary:
         return 'Origem Desconhecida'
     
-    return summary
+    return config.REGRAS_SUMMARY.get(summary, summary)
+
+def normalize_summaries(summaries):
+    """
+    Vectorized version of apply_summary_rules for a whole 'summary' column.
+    """
+    normalized = summaries.replace(config.REGRAS_SUMMARY)
+    return normalized.where(summaries.notna() & summaries.ne(''), 'Origem Desconhecida')
 
 def get_calendar_data():
     """
@@ -87,7 +70,7 @@ def get_calendar_data():
         
         # Apply rules
         if not df.empty:
-            df['summary'] = df.apply(apply_summary_rules, axis=1)
+            df['summary'] = normalize_summaries(df['summary'])
             
             # Ensure datetime objects are timezone-naive or consistent if needed
             # For now, we keep them as is, but pandas might complain if mixing tz-aware and naive
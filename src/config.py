@@ -11,6 +11,17 @@ CREDENTIALS_FILE_2 = BASE_DIR / "credentials2.json" # Outro arquivo de credencia
 # Garante que a pasta calendars existe
 CALENDARS_DIR.mkdir(exist_ok=True)
 
+# Manifesto da sincronização incremental (hashes das entradas de cada apartamento)
+SYNC_MANIFEST_FILE = CALENDARS_DIR / "sync_manifest.json"
+# Cache das linhas já tratadas de cada aba, usado na consolidação incremental
+CONSOLIDACAO_CACHE_FILE = CALENDARS_DIR / "consolidacao_cache.pkl"
+# Feriados já calculados por ano (evita recalcular com a biblioteca holidays a cada início)
+FERIADOS_CACHE_FILE = CALENDARS_DIR / "feriados_cache.json"
+# idReserva já atribuído a cada chave de reserva (ids estáveis entre sincronizações)
+RESERVAS_IDS_FILE = CALENDARS_DIR / "reservas_ids.json"
+# Arquivos de trava por apartamento (sincronizações concorrentes do app e do CLI)
+LOCKS_DIR = CALENDARS_DIR / "locks"
+
 # --- Google Sheets ---
 # ID da planilha principal
 SHEET_KEY = '1FqgTQAGebxvHUdVXI471HpAaXeXyCFdFWur7Pck0hLY'
@@ -25,6 +36,15 @@ APARTMENT_SHEET_MAP = {
     'f216': 'SM-F216'
 }
 
+# Cota de requisições à API do Sheets por minuto (limite padrão do Google por usuário: 60)
+SHEETS_LEITURAS_POR_MINUTO = 60
+SHEETS_ESCRITAS_POR_MINUTO = 60
+# Novas tentativas quando a API do Sheets responde 429 (limite de requisições) ou 5xx
+SHEETS_TENTATIVAS_LIMITE = 5
+# Espera (em segundos) antes da primeira nova tentativa; dobra a cada tentativa, até o máximo
+SHEETS_ESPERA_INICIAL = 2.0
+SHEETS_ESPERA_MAXIMA = 64.0
+
 # --- URLs dos Calendários (OTAs) ---
 # Extraído de 1_Baixar_calendarios_OTAs.ipynb
 OTA_URLS = {
@@ -54,6 +74,34 @@ OTA_URLS = {
     }
 }
 
+# --- Download dos Calendários (OTAs) ---
+# Quantidade máxima de downloads simultâneos
+OTA_DOWNLOAD_MAX_WORKERS = 6
+# Prazo máximo (em segundos) para baixar cada calendário
+OTA_DOWNLOAD_TIMEOUT = 30
+# Segundos a mais no prazo da leva de downloads (conexão e resposta inicial de cada feed)
+OTA_DOWNLOAD_FOLGA = 5
+# Padronização do SUMMARY dos feeds (texto da OTA -> origem da reserva),
+# aplicada na leitura dos calendários
+REGRAS_SUMMARY = {
+    'CLOSED - Not available': 'Booking',
+    'Airbnb (Not available)': 'Direto',
+    'Reserved': 'Airbnb'
+}
+
+# --- Regras de Check-in/Check-out ---
+# Horários padrão aplicados às reservas sem hora informada
+HORA_CHECKIN = 15
+HORA_CHECKOUT = 11
+
+# --- Cache de Conversão de Datas ---
+# Quantidade máxima de textos de data distintos mantidos em memória (LRU)
+PARSE_DATAS_CACHE_MAX = 50_000
+
+# --- Gráfico de Gantt ---
+# Quantidade de camadas de fundo (fins de semana/feriados/meses) mantidas em memória (LRU)
+FUNDO_CALENDARIO_CACHE_MAX = 16
+
 # --- Configurações de Cores para o Gráfico ---
 COLORS = {
     'Booking': 'rgb(46, 137, 205)', 
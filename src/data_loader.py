@@ -1,107 +1,385 @@
 import requests
+import urllib3
 import os
-from icalendar import Calendar, Event
+import time
+import json
+import hashlib
+import math
+from concurrent.futures import ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from pathlib import Path
+import numpy as np
 import pandas as pd
-from datetime import datetime
-from src.config import CALENDARS_DIR
-from src.utils import parse_pt_date
+from datetime import date, datetime, timezone
+from src.config import CALENDARS_DIR, OTA_URLS, OTA_DOWNLOAD_MAX_WORKERS, OTA_DOWNLOAD_TIMEOUT, OTA_DOWNLOAD_FOLGA
+from src.utils import parse_pt_dates
+from src.ics_stream import desdobrar_linhas
+from src.arquivos import gravacao_atomica, gravar_bytes_atomico, gravar_json_atomico, bloqueio_apartamento
 
-def baixar_calendario_ota(url, filename):
+# Gravação de .ics (RFC 5545)
+ICS_PRODID = '-//Sistema Gestao Alugueis//Calendarios//PT-BR'
+ICS_SUFIXO_UID = '@sistema-gestao-alugueis'
+ICS_TAMANHO_LINHA = 75        # octetos por linha antes de dobrar
+ICS_EVENTOS_POR_BLOCO = 5000  # eventos codificados e gravados por vez
+
+
+@dataclass
+class ResultadoDownload:
+    """
+    Resultado do download de um calendário OTA.
+    status: 'ok' (conteúdo novo gravado), 'inalterado' (feed igual ao cache local),
+    'timeout' ou 'erro'.
+    """
+    apartamento: str
+    ota: str
+    arquivo: str
+    status: str
+    bytes: int = 0
+    tempo: float = 0.0
+    erro: str = ''
+    sha256: str = ''
+
+    @property
+    def sucesso(self):
+        return self.status in ('ok', 'inalterado')
+
+    @property
+    def alterado(self):
+        return self.status == 'ok'
+
+    def __str__(self):
+        texto = f"{self.arquivo}: {self.status} ({self.bytes / 1024:.1f} KB em {self.tempo:.2f}s)"
+        if self.erro:
+            texto += f" - {self.erro}"
+        return texto
+
+
+# Bytes pedidos por leitura do corpo; read1 devolve o que já chegou, sem esperar encher o bloco
+TAMANHO_BLOCO_DOWNLOAD = 64 * 1024
+
+def _limitar_espera_socket(response, restante):
+    """Encurta o timeout de leitura do socket para o que resta do prazo do download."""
+    sock = getattr(response.raw.connection, 'sock', None)
+    if sock is not None:
+        sock.settimeout(max(restante, 0.001))
+
+def _baixar_conteudo(url, timeout, headers=None):
+    """
+    Baixa o conteúdo da URL respeitando um prazo total de `timeout` segundos.
+    O timeout do requests vale por leitura; aqui o prazo total é verificado a cada leitura
+    do corpo (read1 devolve o que já chegou, mesmo que seja 1 byte) e o socket espera no
+    máximo o que resta dele, para que um servidor lento não segure o download.
+
+    Returns:
+        tuple: (conteúdo em bytes ou None se o servidor respondeu 304, headers da resposta)
+    """
+    prazo = time.monotonic() + timeout
+    partes = []
+    with requests.get(url, timeout=timeout, stream=True, headers=headers) as response:
+        if response.status_code == 304:
+            return None, response.headers
+        response.raise_for_status()
+        ler = getattr(response.raw, 'read1', None)
+        if ler is None:
+            # urllib3 1.x não tem read1: blocos pequenos com read
+            ler = lambda n, decode_content: response.raw.read(min(n, 4096), decode_content=decode_content)
+        while True:
+            restante = prazo - time.monotonic()
+            if restante <= 0:
+                raise TimeoutError(f"prazo de {timeout}s excedido")
+            _limitar_espera_socket(response, restante)
+            try:
+                parte = ler(TAMANHO_BLOCO_DOWNLOAD, decode_content=True)
+            except urllib3.exceptions.ReadTimeoutError:
+                raise TimeoutError(f"prazo de {timeout}s excedido")
+            if not parte:
+                break
+            partes.append(parte)
+    return b''.join(partes), response.headers
+
+def _caminho_meta(filepath):
+    """Arquivo de cache com validadores HTTP e hash do feed, ao lado do .ics."""
+    return filepath.with_name(filepath.name + '.meta.json')
+
+def ler_meta_feed(filename):
+    """
+    Lê o cache do feed `filename` (ETag, Last-Modified e hash do conteúdo baixado, ver hash_feed_ics).
+    Retorna {} se não houver cache ou se o .ics correspondente não existir.
+    """
+    filepath = CALENDARS_DIR / filename
+    meta_path = _caminho_meta(filepath)
+    if not filepath.exists() or not meta_path.exists():
+        return {}
+    try:
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _salvar_meta_feed(filename, meta):
+    gravar_json_atomico(_caminho_meta(CALENDARS_DIR / filename), meta, ensure_ascii=False, indent=2)
+
+def baixar_calendario_ota(url, filename, timeout=OTA_DOWNLOAD_TIMEOUT):
     """
     Baixa o arquivo .ics da URL fornecida e salva em CALENDARS_DIR.
+    Interface booleana sobre baixar_feed_ota (mesmo prazo, cache e gravação sob trava),
+    com `filename` no formato '{apt}_{ota}.ics'.
     """
     if not url:
         return False
-        
-    filepath = CALENDARS_DIR / filename
+
+    apt, _, ota = Path(filename).stem.partition('_')
+    resultado = baixar_feed_ota(apt, ota, url, timeout, filename=filename)
+    if not resultado.sucesso:
+        print(f"Erro ao baixar {filename}: {resultado.erro or resultado.status}")
+    return resultado.sucesso
+
+# Propriedades que a OTA regera a cada download sem que a reserva mude
+# (Airbnb e Booking põem em DTSTAMP a hora da requisição)
+PROPRIEDADES_VOLATEIS_ICS = ('DTSTAMP',)
+
+def hash_feed_ics(conteudo):
+    """
+    sha256 do feed sem as propriedades voláteis (PROPRIEDADES_VOLATEIS_ICS): dois downloads
+    com as mesmas reservas têm o mesmo hash, mesmo que o DTSTAMP de cada evento tenha mudado.
+    """
+    h = hashlib.sha256()
+    for linha in desdobrar_linhas(conteudo.splitlines()):
+        nome = linha.split(':', 1)[0].split(';', 1)[0].strip().upper()
+        if nome not in PROPRIEDADES_VOLATEIS_ICS:
+            h.update(linha.encode('utf-8'))
+            h.update(b'\n')
+    return h.hexdigest()
+
+def baixar_feed_ota(apt, ota, url, timeout=OTA_DOWNLOAD_TIMEOUT, filename=None):
+    """
+    Baixa o calendário de uma OTA para `filename` (padrão `{apt}_{ota}.ics`) e retorna um ResultadoDownload.
+
+    Usa o cache em `{apt}_{ota}.ics.meta.json` para enviar If-None-Match/If-Modified-Since.
+    Se o servidor responder 304, ou se o conteúdo baixado tiver o mesmo hash do último
+    download (hash_feed_ics, que ignora o DTSTAMP), o .ics não é regravado e o status é 'inalterado'.
+    """
+    filename = filename or f"{apt}_{ota}.ics"
+    inicio = time.monotonic()
     try:
-        response = requests.get(url, timeout=30)
-        response.raise_for_status()
-        
-        with open(filepath, 'wb') as f:
-            f.write(response.content)
-        return True
+        meta = ler_meta_feed(filename)
+        headers = {}
+        if meta.get('etag'):
+            headers['If-None-Match'] = meta['etag']
+        if meta.get('last_modified'):
+            headers['If-Modified-Since'] = meta['last_modified']
+
+        conteudo, resp_headers = _baixar_conteudo(url, timeout, headers=headers)
+
+        if conteudo is None:
+            return ResultadoDownload(apt, ota, filename, 'inalterado', 0, time.monotonic() - inicio, sha256=meta.get('sha256', ''))
+
+        sha256 = hash_feed_ics(conteudo)
+        status = 'inalterado' if meta and sha256 == meta.get('sha256') else 'ok'
+        # .ics e .meta.json trocados juntos, sem uma sincronização do apartamento no meio
+        with bloqueio_apartamento(apt, CALENDARS_DIR):
+            if status == 'ok':
+                gravar_bytes_atomico(CALENDARS_DIR / filename, conteudo)
+
+            _salvar_meta_feed(filename, {
+                'url': url,
+                'etag': resp_headers.get('ETag'),
+                'last_modified': resp_headers.get('Last-Modified'),
+                'sha256': sha256,
+                'bytes': len(conteudo),
+                'baixado_em': datetime.now().strftime('%d/%m/%Y %H:%M:%S')
+            })
+        return ResultadoDownload(apt, ota, filename, status, len(conteudo), time.monotonic() - inicio, sha256=sha256)
+    except (requests.Timeout, TimeoutError) as e:
+        return ResultadoDownload(apt, ota, filename, 'timeout', 0, time.monotonic() - inicio, str(e))
     except Exception as e:
-        print(f"Erro ao baixar {filename}: {e}")
-        return False
+        return ResultadoDownload(apt, ota, filename, 'erro', 0, time.monotonic() - inicio, str(e))
 
-def atualizar_summaries_ical(filename):
+def baixar_calendarios_otas(ota_urls=None, max_workers=OTA_DOWNLOAD_MAX_WORKERS, timeout=OTA_DOWNLOAD_TIMEOUT):
     """
-    Padroniza os campos SUMMARY do arquivo .ics.
+    Baixa em paralelo todos os calendários configurados em `ota_urls` (padrão: OTA_URLS).
+    O tempo total fica limitado pelo calendário mais lento, e não pela soma de todos.
+
+    Returns:
+        dict: {(apartamento, ota): ResultadoDownload}, na ordem de OTA_URLS.
     """
-    filepath = CALENDARS_DIR / filename
-    regras_summary = {
-        'CLOSED - Not available': 'Booking',
-        'Airbnb (Not available)': 'Direto',
-        'Reserved': 'Airbnb'
-    }
-    
+    if ota_urls is None:
+        ota_urls = OTA_URLS
+
+    tarefas = [(apt, ota, url) for apt, urls in ota_urls.items() for ota, url in urls.items() if url]
+    if not tarefas:
+        return {}
+
+    workers = max(1, min(max_workers, len(tarefas)))
+    # Prazo da leva inteira: cada rodada de `workers` downloads leva no máximo `timeout`
+    # (mais a conexão); o que não terminar até lá conta como timeout e a sincronização segue
+    prazo_total = timeout * math.ceil(len(tarefas) / workers) + OTA_DOWNLOAD_FOLGA
+    executor = ThreadPoolExecutor(max_workers=workers)
     try:
-        with open(filepath, 'rb') as f:
-            cal = Calendar.from_ical(f.read())
-            
-        modificado = False
-        for component in cal.walk('VEVENT'):
-            summary_original = str(component.get('summary'))
-            if summary_original in regras_summary:
-                component['summary'] = regras_summary[summary_original]
-                modificado = True
-                
-        if modificado:
-            with open(filepath, 'wb') as f:
-                f.write(cal.to_ical())
-                
-    except FileNotFoundError:
-        print(f"Arquivo {filename} não encontrado para atualização de summary.")
-    except Exception as e:
-        print(f"Erro ao processar summary de {filename}: {e}")
+        futuros = [(apt, ota, executor.submit(baixar_feed_ota, apt, ota, url, timeout)) for apt, ota, url in tarefas]
+        wait([futuro for _, _, futuro in futuros], timeout=prazo_total)
+        resultados = {}
+        for apt, ota, futuro in futuros:
+            if futuro.done():
+                resultados[(apt, ota)] = futuro.result()
+            else:
+                resultados[(apt, ota)] = ResultadoDownload(apt, ota, f"{apt}_{ota}.ics", 'timeout', 0, prazo_total,
+                                                           f"prazo total de {prazo_total:.0f}s excedido")
+        return resultados
+    finally:
+        # Não espera os atrasados: cada um ainda termina no próprio prazo, gravando sob a trava
+        executor.shutdown(wait=False, cancel_futures=True)
+
+def _datas_para_ical(coluna):
+    """
+    Converte as células de texto de uma coluna de datas com parse_pt_dates (em bloco).
+    Textos que o parser não entende seguem para pd.to_datetime, como antes;
+    valores que já são datas são mantidos.
+    """
+    datas = coluna.astype(object)
+    eh_texto = coluna.map(lambda v: isinstance(v, str)).to_numpy(dtype=bool)
+    if eh_texto.any():
+        convertidas = parse_pt_dates(coluna[eh_texto]).astype(object)
+        sem_parse = convertidas.isna()
+        convertidas[sem_parse] = [pd.to_datetime(v) for v in coluna[eh_texto][sem_parse]]
+        datas[eh_texto] = convertidas
+    return datas
+
+def _formatar_datas_ical(datas):
+    """'YYYYMMDDTHHMMSS' de uma série datetime64 ingênua (np.datetime_as_string, sem strftime por valor)."""
+    textos = np.datetime_as_string(datas.to_numpy(dtype='datetime64[s]'), unit='s')
+    return pd.Series(textos, index=datas.index).str.replace('-', '', regex=False).str.replace(':', '', regex=False)
+
+def _linhas_data_ical(nome, coluna):
+    """
+    Monta as linhas DTSTART/DTEND ('NOME:YYYYMMDDTHHMMSS') de uma coluna inteira.
+    Colunas datetime64 são formatadas direto; nas demais, datas puras saem com
+    VALUE=DATE e datas com fuso com TZID (ou 'Z' em UTC), como no icalendar.
+    Retorna None nas linhas sem data.
+    """
+    if pd.api.types.is_datetime64_any_dtype(coluna):
+        if coluna.dt.tz is not None:
+            linhas = nome + ':' + _formatar_datas_ical(coluna.dt.tz_convert('UTC').dt.tz_localize(None)) + 'Z'
+        else:
+            linhas = nome + ':' + _formatar_datas_ical(coluna)
+        return linhas.astype(object).where(coluna.notna(), None)
+
+    datas = _datas_para_ical(coluna)
+    linhas = pd.Series(None, index=coluna.index, dtype=object)
+    valida = datas.notna().to_numpy()
+    data_pura = datas.map(lambda v: isinstance(v, date) and not isinstance(v, datetime)).to_numpy(dtype=bool)
+    com_fuso = datas.map(lambda v: getattr(v, 'tzinfo', None) is not None).to_numpy(dtype=bool)
+    ingenua = valida & ~data_pura & ~com_fuso
+
+    if ingenua.any():
+        linhas[ingenua] = (nome + ':' + _formatar_datas_ical(pd.to_datetime(datas[ingenua]))).to_numpy(dtype=object)
+    if data_pura.any():
+        linhas[data_pura] = [f"{nome};VALUE=DATE:{d:%Y%m%d}" for d in datas[data_pura]]
+    for posicao in np.flatnonzero(com_fuso & valida):
+        d = datas.iloc[posicao]
+        chave = getattr(d.tzinfo, 'key', None)
+        if chave and chave != 'UTC':
+            linhas.iloc[posicao] = f"{nome};TZID={chave}:{d:%Y%m%dT%H%M%S}"
+        else:
+            linhas.iloc[posicao] = f"{nome}:{pd.Timestamp(d).tz_convert('UTC'):%Y%m%dT%H%M%S}Z"
+    return linhas
+
+def _escapar_texto_ical(textos):
+    """Escape de valores TEXT (RFC 5545 §3.3.11) aplicado à coluna inteira."""
+    return (textos.str.replace('\\', '\\\\', regex=False)
+                  .str.replace(';', '\\;', regex=False)
+                  .str.replace(',', '\\,', regex=False)
+                  .str.replace('\r\n', '\\n', regex=False)
+                  .str.replace('\n', '\\n', regex=False))
+
+def _dobrar_linha_ical(linha):
+    """
+    Dobra uma linha em partes de até 75 octetos (continuações começam com espaço),
+    sem partir caracteres UTF-8 multibyte.
+    """
+    dados = linha.encode('utf-8')
+    if len(dados) <= ICS_TAMANHO_LINHA:
+        return linha
+    partes, inicio, limite = [], 0, ICS_TAMANHO_LINHA
+    while inicio < len(dados):
+        fim = min(inicio + limite, len(dados))
+        while fim < len(dados) and (dados[fim] & 0xC0) == 0x80:
+            fim -= 1
+        partes.append(dados[inicio:fim])
+        inicio, limite = fim, ICS_TAMANHO_LINHA - 1
+    return b'\r\n '.join(partes).decode('utf-8')
+
+def _dobrar_linhas_longas(linhas):
+    # Linhas ASCII têm 1 octeto por caractere; as demais (até 4 octetos) são conferidas no laço
+    caracteres = linhas.str.len()
+    longas = ((caracteres > ICS_TAMANHO_LINHA) | (~linhas.str.isascii() & (caracteres * 4 > ICS_TAMANHO_LINHA))).to_numpy()
+    if longas.any():
+        linhas = linhas.copy()
+        linhas[longas] = [_dobrar_linha_ical(linha) for linha in linhas[longas]]
+    return linhas
+
+def _uids_ical(df, validas, linhas_inicio, linhas_fim, summaries):
+    """
+    UID de cada evento: o da coluna 'UID' quando houver (feeds das OTAs) ou um
+    identificador determinístico derivado de início, fim e summary (com o número
+    da ocorrência para eventos repetidos), estável entre gravações.
+    `validas` (máscara booleana das linhas de df) seleciona os UIDs por posição,
+    o que funciona mesmo com índice repetido (ex: pd.concat sem ignore_index).
+    """
+    chave = pd.DataFrame({'inicio': linhas_inicio, 'fim': linhas_fim, 'summary': summaries})
+    hashes = pd.util.hash_pandas_object(chave, index=False)
+    ocorrencia = hashes.groupby(hashes).cumcount()
+    gerados = (hashes.map('{:016x}'.format) + '-' + ocorrencia.astype(str) + ICS_SUFIXO_UID).astype(object)
+    if 'UID' not in df.columns:
+        return gerados
+    existentes = pd.Series(df['UID'].to_numpy(dtype=object)[np.asarray(validas, dtype=bool)], index=linhas_inicio.index)
+    tem_uid = existentes.notna() & existentes.astype(str).str.strip().ne('')
+    return existentes.astype(str).where(tem_uid, gerados)
 
 def save_dataframe_to_ical(df, filename):
     """
-    Converte um DataFrame de reservas em um arquivo .ics.
-    Espera colunas: 'Início', 'Fim', 'Summary' (ou 'Origem').
+    Converte um DataFrame de reservas em um arquivo .ics (RFC 5545).
+    Espera colunas: 'Início', 'Fim', 'Summary' (ou 'Origem'); usa 'UID' se existir.
+
+    As linhas de cada propriedade são montadas para a coluna inteira de uma vez
+    e gravadas em blocos, sem criar um icalendar.Event por reserva. O DTSTAMP
+    (em UTC) é o mesmo para todos os eventos da gravação.
     """
     filepath = CALENDARS_DIR / filename
-    cal = Calendar()
     
     # Mapeamento de colunas se necessário
     col_inicio = 'Início' if 'Início' in df.columns else 'Start'
     col_fim = 'Fim' if 'Fim' in df.columns else 'End'
     col_summary = 'Summary' if 'Summary' in df.columns else 'Origem'
     
-    for _, row in df.iterrows():
-        event = Event()
-        
-        start_dt = row[col_inicio]
-        end_dt = row[col_fim]
-        summary = row.get(col_summary, 'Reserva')
-        
-        # Garante que são objetos datetime ou date
-        if isinstance(start_dt, str):
-            # Tenta parser customizado primeiro
-            dt = parse_pt_date(start_dt)
-            if pd.isna(dt):
-                start_dt = pd.to_datetime(start_dt)
-            else:
-                start_dt = dt
-                
-        if isinstance(end_dt, str):
-            dt = parse_pt_date(end_dt)
-            if pd.isna(dt):
-                end_dt = pd.to_datetime(end_dt)
-            else:
-                end_dt = dt
-        
-        # Pula se for NaT
-        if pd.isna(start_dt) or pd.isna(end_dt):
-            continue
-            
-        event.add('summary', summary)
-        event.add('dtstart', start_dt)
-        event.add('dtend', end_dt)
-        event.add('dtstamp', datetime.now())
-        
-        cal.add_component(event)
-        
-    with open(filepath, 'wb') as f:
-        f.write(cal.to_ical())
+    linhas_inicio = _linhas_data_ical('DTSTART', df[col_inicio])
+    linhas_fim = _linhas_data_ical('DTEND', df[col_fim])
+
+    # Pula as reservas sem início ou fim (NaT)
+    validas = linhas_inicio.notna() & linhas_fim.notna()
+    linhas_inicio, linhas_fim = linhas_inicio[validas].astype(str), linhas_fim[validas].astype(str)
+
+    eventos = pd.Series([], dtype=str)
+    if validas.any():
+        if col_summary in df.columns:
+            # str() de cada valor, como o icalendar fazia (NaN -> 'nan')
+            summaries = pd.Series(np.asarray(df.loc[validas, col_summary], dtype=object).astype(str), index=linhas_inicio.index)
+        else:
+            summaries = pd.Series('Reserva', index=linhas_inicio.index)
+        uids = _uids_ical(df, validas, linhas_inicio, linhas_fim, summaries)
+
+        dtstamp = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+        eventos = ('BEGIN:VEVENT\r\n'
+                   + _dobrar_linhas_longas('UID:' + _escapar_texto_ical(uids.astype(str))) + '\r\n'
+                   + 'DTSTAMP:' + dtstamp + '\r\n'
+                   + linhas_inicio + '\r\n'
+                   + linhas_fim + '\r\n'
+                   + _dobrar_linhas_longas('SUMMARY:' + _escapar_texto_ical(summaries)) + '\r\n'
+                   + 'END:VEVENT\r\n')
+
+    cabecalho = f"BEGIN:VCALENDAR\r\nVERSION:2.0\r\nPRODID:{ICS_PRODID}\r\nCALSCALE:GREGORIAN\r\n"
+    with gravacao_atomica(filepath) as f:
+        f.write(cabecalho.encode('utf-8'))
+        for inicio in range(0, len(eventos), ICS_EVENTOS_POR_BLOCO):
+            f.write(''.join(eventos.iloc[inicio:inicio + ICS_EVENTOS_POR_BLOCO]).encode('utf-8'))
+        f.write(b'END:VCALENDAR\r\n')
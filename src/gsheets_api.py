@@ -1,4 +1,5 @@
 import gspread
+from gspread.utils import absolute_range_name, fill_gaps, rowcol_to_a1
 import pandas as pd
 import streamlit as st
 from google.oauth2.service_account import Credentials as ServiceAccountCredentials
@@ -6,9 +7,14 @@ from google.oauth2.credentials import Credentials as UserCredentials
 from google_auth_oauthlib.flow import InstalledAppFlow
 from google.auth.transport.requests import Request
 import os
-from src.config import SHEET_KEY, get_google_credentials, APARTMENT_SHEET_MAP
+import random
+import threading
+from collections import deque
+from src.config import (SHEET_KEY, get_google_credentials, APARTMENT_SHEET_MAP, SHEETS_LEITURAS_POR_MINUTO,
+                        SHEETS_ESCRITAS_POR_MINUTO, SHEETS_TENTATIVAS_LIMITE, SHEETS_ESPERA_INICIAL, SHEETS_ESPERA_MAXIMA)
 from src.utils import parse_pt_date
-from datetime import datetime, time, timedelta
+from datetime import datetime, time, timedelta, timezone
+from time import monotonic, sleep
 from zoneinfo import ZoneInfo
 
 
@@ -16,6 +22,127 @@ from zoneinfo import ZoneInfo
 
 SCOPES = ['https://www.googleapis.com/auth/spreadsheets']
 
+# Margem para renovar o token de acesso antes de ele expirar
+MARGEM_RENOVACAO_TOKEN = timedelta(minutes=5)
+
+# --- Cache de conexão (compartilhado por todas as sessões do processo) ---
+# O cliente gspread mantém uma única AuthorizedSession (requests.Session com keep-alive),
+# então reaproveitá-lo evita recarregar credenciais, renovar token e reabrir conexões.
+_conexao_lock = threading.RLock()
+_conexao = {'cliente': None, 'planilha': None, 'abas': {}}
+
+# Contadores para medir quantas autenticações/aberturas realmente acontecem
+METRICAS_CONEXAO = {
+    'autenticacoes': 0,
+    'renovacoes_token': 0,
+    'aberturas_planilha': 0,
+    'aberturas_aba': 0,
+}
+
+# --- Agendador de requisições ---
+# Toda chamada à API passa por agendador.executar: respeita a cota por minuto de
+# leituras e de escritas (balde de fichas) e repete 429/5xx com espera exponencial.
+STATUS_TEMPORARIOS = {429, 500, 502, 503, 504}
+
+def _status_erro(erro):
+    return getattr(getattr(erro, 'response', None), 'status_code', None)
+
+class _BaldeFichas:
+    """Balde de fichas: até `por_minuto` requisições de uma vez, repostas continuamente."""
+
+    def __init__(self, por_minuto, agora):
+        self.capacidade = float(por_minuto)
+        self.fichas = float(por_minuto)
+        self.por_segundo = por_minuto / 60.0
+        self.atualizado = agora
+
+    def reservar(self, agora):
+        """Consome uma ficha e retorna quantos segundos esperar até ela existir."""
+        self.fichas = min(self.capacidade, self.fichas + (agora - self.atualizado) * self.por_segundo)
+        self.atualizado = agora
+        self.fichas -= 1
+        return 0.0 if self.fichas >= 0 else -self.fichas / self.por_segundo
+
+class AgendadorRequisicoes:
+    """
+    Executa as chamadas do gspread dentro da cota e com novas tentativas.
+
+    Args:
+        leituras_por_minuto, escritas_por_minuto: cotas (balde de fichas de cada tipo).
+        tentativas: total de tentativas para erros 429/5xx.
+        espera_inicial, espera_maxima: espera antes da 1ª nova tentativa (dobra a cada
+            tentativa, até o máximo), com variação aleatória de 50% a 100% (jitter) para
+            que sessões paralelas não tentem de novo ao mesmo tempo. Retry-After prevalece.
+        relogio, dormir, aleatorio: injetáveis nos testes.
+    """
+
+    def __init__(self, leituras_por_minuto=SHEETS_LEITURAS_POR_MINUTO, escritas_por_minuto=SHEETS_ESCRITAS_POR_MINUTO,
+                 tentativas=SHEETS_TENTATIVAS_LIMITE, espera_inicial=SHEETS_ESPERA_INICIAL,
+                 espera_maxima=SHEETS_ESPERA_MAXIMA, relogio=monotonic, dormir=None, aleatorio=random.random):
+        self.tentativas = tentativas
+        self.espera_inicial = espera_inicial
+        self.espera_maxima = espera_maxima
+        self.relogio = relogio
+        # Padrão resolvido na hora da chamada (permite trocar gsheets_api.sleep)
+        self.dormir = dormir or (lambda segundos: sleep(segundos))
+        self.aleatorio = aleatorio
+        self._lock = threading.Lock()
+        agora = relogio()
+        self._baldes = {False: _BaldeFichas(leituras_por_minuto, agora), True: _BaldeFichas(escritas_por_minuto, agora)}
+        self.zerar_metricas()
+
+    def zerar_metricas(self):
+        with self._lock:
+            self._metricas = {'requisicoes': 0, 'leituras': 0, 'escritas': 0, 'novas_tentativas': 0,
+                              'falhas': 0, 'espera_cota_ms': 0.0, 'espera_novas_tentativas_ms': 0.0}
+
+    def metricas(self):
+        """Cópia dos contadores: requisições, novas tentativas, falhas e tempo esperado (ms)."""
+        with self._lock:
+            return dict(self._metricas)
+
+    def _espera_nova_tentativa(self, erro, tentativa):
+        base = min(self.espera_maxima, self.espera_inicial * 2 ** tentativa)
+        espera = base * (0.5 + 0.5 * self.aleatorio())
+        retry_after = getattr(getattr(erro, 'response', None), 'headers', {}).get('Retry-After')
+        try:
+            return max(espera, float(retry_after)) if retry_after else espera
+        except ValueError:
+            return espera
+
+    def executar(self, funcao, escrita=False):
+        """
+        Chama `funcao()` (uma requisição à API) dentro da cota de leituras ou de escritas.
+        Erros 429/5xx são repetidos até `tentativas` vezes; os demais (e o último) são propagados.
+        """
+        for tentativa in range(self.tentativas):
+            with self._lock:
+                espera = self._baldes[escrita].reservar(self.relogio())
+                self._metricas['requisicoes'] += 1
+                self._metricas['escritas' if escrita else 'leituras'] += 1
+                self._metricas['espera_cota_ms'] += espera * 1000
+            if espera > 0:
+                self.dormir(espera)
+
+            try:
+                return funcao()
+            except gspread.exceptions.APIError as e:
+                if _status_erro(e) not in STATUS_TEMPORARIOS or tentativa == self.tentativas - 1:
+                    with self._lock:
+                        self._metricas['falhas'] += 1
+                    raise
+                espera = self._espera_nova_tentativa(e, tentativa)
+                with self._lock:
+                    self._metricas['novas_tentativas'] += 1
+                    self._metricas['espera_novas_tentativas_ms'] += espera * 1000
+                self.dormir(espera)
+
+agendador = AgendadorRequisicoes()
+
+def obter_metricas_requisicoes():
+    """Retorna uma cópia das métricas do agendador de requisições."""
+    return agendador.metricas()
+
 def authenticate_google_sheets():
     """
     Autentica no Google Sheets.
@@ -63,96 +190,209 @@ def authenticate_google_sheets():
 
     return gspread.authorize(creds)
 
+def _token_expirando(creds):
+    """True se o token de acesso já existe e expira dentro de MARGEM_RENOVACAO_TOKEN."""
+    expiry = getattr(creds, 'expiry', None)
+    if getattr(creds, 'token', None) is None or expiry is None:
+        return False
+    # google-auth guarda a expiração como datetime UTC sem fuso
+    return expiry - datetime.now(timezone.utc).replace(tzinfo=None) < MARGEM_RENOVACAO_TOKEN
+
+def obter_cliente():
+    """
+    Retorna o cliente gspread autenticado do processo, autenticando apenas na primeira chamada.
+    Renova o token antes de expirar; se a renovação falhar, autentica de novo.
+    """
+    with _conexao_lock:
+        gc = _conexao['cliente']
+
+        if gc is not None:
+            creds = getattr(getattr(gc, 'http_client', None), 'auth', None)
+            if creds is not None and _token_expirando(creds):
+                try:
+                    creds.refresh(Request())
+                    METRICAS_CONEXAO['renovacoes_token'] += 1
+                except Exception:
+                    gc = None
+
+        if gc is None:
+            gc = authenticate_google_sheets()
+            METRICAS_CONEXAO['autenticacoes'] += 1
+            _conexao.update(cliente=gc, planilha=None, abas={})
+
+        return gc
+
+def obter_planilha():
+    """
+    Retorna o handle da planilha SHEET_KEY, abrindo-a (chamada de metadados) só uma vez.
+    Retorna None se não houver credenciais válidas.
+    A abertura roda fora de _conexao_lock (o agendador pode dormir pela cota); o lock só
+    protege a publicação do handle, e o primeiro handle publicado é o que fica.
+    """
+    gc = obter_cliente()
+    if not gc:
+        return None
+    with _conexao_lock:
+        if _conexao['planilha'] is not None and _conexao['cliente'] is gc:
+            return _conexao['planilha']
+
+    sh = agendador.executar(lambda: gc.open_by_key(SHEET_KEY))
+    with _conexao_lock:
+        METRICAS_CONEXAO['aberturas_planilha'] += 1
+        # Não publica sobre um cliente invalidado ou trocado durante a abertura
+        if _conexao['cliente'] is not gc:
+            return sh
+        if _conexao['planilha'] is None:
+            _conexao['planilha'] = sh
+        return _conexao['planilha']
+
+def obter_aba(tab_name):
+    """
+    Retorna o handle da aba `tab_name`, guardado após a primeira abertura.
+    Propaga gspread.WorksheetNotFound se a aba não existir.
+    Como em obter_planilha, a chamada à API é feita fora de _conexao_lock.
+    """
+    with _conexao_lock:
+        worksheet = _conexao['abas'].get(tab_name)
+    if worksheet is not None:
+        return worksheet
+
+    sh = obter_planilha()
+    if sh is None:
+        raise RuntimeError("Não foi possível autenticar no Google Sheets.")
+    worksheet = agendador.executar(lambda: sh.worksheet(tab_name))
+    with _conexao_lock:
+        METRICAS_CONEXAO['aberturas_aba'] += 1
+        # Não publica sobre uma planilha invalidada ou trocada durante a abertura
+        if _conexao['planilha'] is not sh:
+            return worksheet
+        return _conexao['abas'].setdefault(tab_name, worksheet)
+
+def descartar_aba(tab_name):
+    """Remove a aba do cache (ex: após um erro), forçando nova abertura na próxima chamada."""
+    with _conexao_lock:
+        _conexao['abas'].pop(tab_name, None)
+
+def invalidar_conexao():
+    """Descarta cliente, planilha e abas em cache."""
+    with _conexao_lock:
+        _conexao.update(cliente=None, planilha=None, abas={})
+
+def obter_metricas_conexao():
+    """Retorna uma cópia dos contadores de autenticação e abertura."""
+    with _conexao_lock:
+        return dict(METRICAS_CONEXAO)
+
 def baixar_dados_google_sheet(tab_name):
     """
     Baixa dados de uma aba específica.
     Procura dinamicamente pela linha de cabeçalho.
     """
     try:
-        gc = authenticate_google_sheets()
-        if not gc: return pd.DataFrame()
+        if not obter_cliente(): return pd.DataFrame()
         
-        sh = gc.open_by_key(SHEET_KEY)
-        worksheet = sh.worksheet(tab_name)
-        all_values = worksheet.get_all_values()
+        worksheet = obter_aba(tab_name)
+        all_values = agendador.executar(worksheet.get_all_values)
         
         if len(all_values) < 1:
             return pd.DataFrame()
             
-        # Procura pela linha de cabeçalho
-        header_row_index = -1
-        for i, row in enumerate(all_values[:10]): # Procura nas primeiras 10 linhas
-            if "Início" in row and "Fim" in row:
-                header_row_index = i
-                break
-        
-        if header_row_index != -1:
-            headers = all_values[header_row_index]
-            data = all_values[header_row_index + 1:]
-        else:
-            # Se não achar, assume que não tem cabeçalho ou está em formato inesperado
-            # Tenta usar a primeira linha se parecer cabeçalho, senão retorna vazio
-            # Mas como falhou antes, melhor retornar vazio para forçar o fallback
-            st.warning(f"Cabeçalhos 'Início' e 'Fim' não encontrados na aba '{tab_name}'.")
-            return pd.DataFrame()
-        
-        df = pd.DataFrame(data, columns=headers)
-        
-        # Remove colunas duplicadas (mantendo a primeira ocorrência)
-        df = df.loc[:, ~df.columns.duplicated()]
-        
-        # Validação de colunas essenciais
-        if 'Início' not in df.columns or 'Fim' not in df.columns:
-            st.warning(f"Colunas 'Início' e 'Fim' não encontradas na aba '{tab_name}'. Retornando vazio para forçar fallback.")
-            return pd.DataFrame()
-            
-        # Seleção de colunas por nome para maior robustez
-        cols_to_keep = ['Início', 'Fim', 'Apartamento', 'Status', 'Quem', 'Origem', 'Última Atualização']
-        existing_cols = [col for col in cols_to_keep if col in df.columns]
-        
-        if existing_cols:
-            df = df[existing_cols].copy()
-            
-        return df
+        return reservas_da_aba(all_values, tab_name)
     except Exception as e:
+        descartar_aba(tab_name)
         st.error(f"Erro ao baixar dados da aba '{tab_name}': {e}")
         return pd.DataFrame()
 
-def baixar_proximos_hospedes_consolidados(tab_name = "Reservas Consolidadas"):
+def reservas_da_aba(all_values, tab_name):
     """
-    Baixa os próximos hóspedes (futuros) de cada apartamento da aba 'Reservas Consolidadas'.
-    Retorna DataFrame com colunas específicas e dias até o check-in.
+    Converte os valores brutos de uma aba de apartamento no DataFrame de reservas
+    usado para gerar o .ics da aba: cabeçalho com 'Início' e 'Fim' (nas primeiras
+    10 linhas) e só as colunas de selecionar_colunas_reservas.
+    Retorna vazio se o cabeçalho não for encontrado.
     """
-    try:
-        gc = authenticate_google_sheets()
-        if not gc: return pd.DataFrame()
-        
-        sh = gc.open_by_key(SHEET_KEY)
-        try:
-            worksheet = sh.worksheet(tab_name)
-        except gspread.WorksheetNotFound:
-            st.warning(f"Aba '{tab_name}' não encontrada.")
-            return pd.DataFrame()
+    # Procura pela linha de cabeçalho
+    header_row_index = -1
+    for i, row in enumerate(all_values[:10]): # Procura nas primeiras 10 linhas
+        if "Início" in row and "Fim" in row:
+            header_row_index = i
+            break
+    
+    if header_row_index == -1:
+        # Se não achar, assume que não tem cabeçalho ou está em formato inesperado:
+        # retorna vazio para forçar o fallback
+        st.warning(f"Cabeçalhos 'Início' e 'Fim' não encontrados na aba '{tab_name}'.")
+        return pd.DataFrame()
+
+    headers = all_values[header_row_index]
+    data = all_values[header_row_index + 1:]
+    df = pd.DataFrame(data, columns=headers)
+    
+    # Remove colunas duplicadas (mantendo a primeira ocorrência)
+    df = df.loc[:, ~df.columns.duplicated()]
+    
+    return selecionar_colunas_reservas(df, tab_name)
 
-        all_values = worksheet.get_all_values()
+def selecionar_colunas_reservas(df, tab_name):
+    """
+    Mantém apenas as colunas usadas no mapa de reservas.
+    Retorna vazio se 'Início' e 'Fim' não existirem (para forçar o fallback).
+    """
+    # Validação de colunas essenciais
+    if 'Início' not in df.columns or 'Fim' not in df.columns:
+        st.warning(f"Colunas 'Início' e 'Fim' não encontradas na aba '{tab_name}'. Retornando vazio para forçar fallback.")
+        return pd.DataFrame()
         
-        if len(all_values) < 1:
-            return pd.DataFrame()
-            
-        # Busca cabeçalho
-        header_row_index = -1
-        for i, row in enumerate(all_values[:10]):
-            if "Início" in row and "Fim" in row:
-                header_row_index = i
-                break
+    # Seleção de colunas por nome para maior robustez
+    cols_to_keep = ['Início', 'Fim', 'Apartamento', 'Status', 'Quem', 'Origem', 'Última Atualização']
+    existing_cols = [col for col in cols_to_keep if col in df.columns]
+    
+    if existing_cols:
+        df = df[existing_cols].copy()
         
-        if header_row_index != -1:
-            headers = all_values[header_row_index]
-            data = all_values[header_row_index + 1:]
-        else:
+    return df
+
+def baixar_tabela_consolidada(tab_name="Reservas Consolidadas"):
+    """
+    Baixa a aba 'Reservas Consolidadas' inteira (todas as colunas) com uma única chamada.
+    Procura dinamicamente pela linha de cabeçalho. Retorna DataFrame vazio se a aba não existir.
+    """
+    if not obter_cliente(): return pd.DataFrame()
+
+    try:
+        worksheet = obter_aba(tab_name)
+    except gspread.WorksheetNotFound:
+        st.warning(f"Aba '{tab_name}' não encontrada.")
+        return pd.DataFrame()
+
+    all_values = agendador.executar(worksheet.get_all_values)
+    
+    if len(all_values) < 1:
+        return pd.DataFrame()
+        
+    # Busca cabeçalho
+    header_row_index = -1
+    for i, row in enumerate(all_values[:10]):
+        if "Início" in row and "Fim" in row:
+            header_row_index = i
+            break
+    
+    if header_row_index == -1:
+        return pd.DataFrame()
+
+    df = pd.DataFrame(all_values[header_row_index + 1:], columns=all_values[header_row_index])
+    
+    # Remove colunas duplicadas (mantendo a primeira ocorrência)
+    return df.loc[:, ~df.columns.duplicated()]
+
+def proximos_hospedes_da_tabela(df):
+    """
+    Calcula, em memória, o próximo hóspede (futuro) de cada apartamento a partir da
+    tabela consolidada bruta (ver baixar_tabela_consolidada).
+    Retorna DataFrame com colunas específicas e dias até o check-in.
+    """
+    try:
+        if df is None or df.empty:
             return pd.DataFrame()
-            
-        df = pd.DataFrame(data, columns=headers)
         
         # Colunas essenciais (Atualizado com as novas colunas solicitadas)
         required_cols = ['Apartamento', 'Início', 'Fim', 'Dias', 'Pessoas', 'Quem', 'Origem', 'Total BT', 'Diária BT', 'Data Reserva', 'Status']
@@ -208,42 +448,15 @@ def baixar_proximos_hospedes_consolidados(tab_name = "Reservas Consolidadas"):
         st.error(f"Erro ao buscar próximos hóspedes: {e}")
         return pd.DataFrame()
 
-def baixar_ultimas_reservas_consolidadas(tab_name = "Reservas Consolidadas"):
+def ultimas_reservas_da_tabela(df):
     """
-    Baixa as 3 reservas mais recentes de cada apartamento da aba 'Reservas Consolidadas'.
+    Calcula, em memória, as 3 reservas mais recentes de cada apartamento a partir da
+    tabela consolidada bruta (ver baixar_tabela_consolidada).
     Retorna DataFrame com colunas específicas e dias desde a reserva.
     """
     try:
-        gc = authenticate_google_sheets()
-        if not gc: return pd.DataFrame()
-        
-        sh = gc.open_by_key(SHEET_KEY)
-        tab_name = "Reservas Consolidadas"
-        try:
-            worksheet = sh.worksheet(tab_name)
-        except gspread.WorksheetNotFound:
-            st.warning(f"Aba '{tab_name}' não encontrada.")
-            return pd.DataFrame()
-
-        all_values = worksheet.get_all_values()
-        
-        if len(all_values) < 1:
+        if df is None or df.empty:
             return pd.DataFrame()
-            
-        # Busca cabeçalho (reutilizando lógica para robustez)
-        header_row_index = -1
-        for i, row in enumerate(all_values[:10]):
-            if "Início" in row and "Fim" in row:
-                header_row_index = i
-                break
-        
-        if header_row_index != -1:
-            headers = all_values[header_row_index]
-            data = all_values[header_row_index + 1:]
-        else:
-            return pd.DataFrame()
-            
-        df = pd.DataFrame(data, columns=headers)
         
         # Colunas desejadas
         target_cols = ['Apartamento', 'Início', 'Fim', 'Dias', 'Pessoas', 'Quem', 'Origem', 'Data Reserva']
@@ -281,58 +494,219 @@ def baixar_ultimas_reservas_consolidadas(tab_name = "Reservas Consolidadas"):
         st.error(f"Erro ao buscar últimas reservas: {e}")
         return pd.DataFrame()
 
-def salvar_df_no_gsheet(df, tab_name="Reservas Consolidadas"):
+def baixar_proximos_hospedes_consolidados(tab_name = "Reservas Consolidadas"):
     """
-    Salva o DataFrame no Google Sheets com lógica robusta:
-    1. Limpa a aba antes de escrever (evita problemas com filtros antigos).
-    2. Trata NaNs como strings vazias.
-    3. Compatível com versões novas e antigas do gspread.
+    Baixa os próximos hóspedes (futuros) de cada apartamento da aba 'Reservas Consolidadas'.
+    Retorna DataFrame com colunas específicas e dias até o check-in.
+    Para várias visões da mesma aba, prefira baixar_tabela_consolidada uma vez e
+    proximos_hospedes_da_tabela.
     """
     try:
-        gc = authenticate_google_sheets()
-        if not gc: return
-        
-        sh = gc.open_by_key(SHEET_KEY)
+        return proximos_hospedes_da_tabela(baixar_tabela_consolidada(tab_name))
+    except Exception as e:
+        descartar_aba(tab_name)
+        st.error(f"Erro ao buscar próximos hóspedes: {e}")
+        return pd.DataFrame()
+
+def baixar_ultimas_reservas_consolidadas(tab_name = "Reservas Consolidadas"):
+    """
+    Baixa as 3 reservas mais recentes de cada apartamento da aba 'Reservas Consolidadas'.
+    Retorna DataFrame com colunas específicas e dias desde a reserva.
+    Para várias visões da mesma aba, prefira baixar_tabela_consolidada uma vez e
+    ultimas_reservas_da_tabela.
+    """
+    tab_name = "Reservas Consolidadas"
+    try:
+        return ultimas_reservas_da_tabela(baixar_tabela_consolidada(tab_name))
+    except Exception as e:
+        descartar_aba(tab_name)
+        st.error(f"Erro ao buscar últimas reservas: {e}")
+        return pd.DataFrame()
+
+# Escrita incremental da aba consolidada: linhas casadas pelo idReserva (estável, ver
+# logic.atribuir_ids_reservas) e, em linhas sem id, pela chave composta da reserva
+COLUNA_ID_RESERVA = 'idReserva'
+COLUNAS_CHAVE_RESERVA = ('Apartamento', 'Início', 'Fim', 'Origem')
+# Muda a cada sincronização; só é regravada nas linhas alteradas e na primeira linha,
+# de onde o app lê a hora da última sincronização
+COLUNA_ULTIMA_ATUALIZACAO = 'Última Atualização'
+
+def _celula_canonica(valor):
+    """Texto comparável de uma célula, igual para o valor do DataFrame e o lido (UNFORMATTED_VALUE)."""
+    if valor is None:
+        return ''
+    if isinstance(valor, float):
+        if valor != valor:
+            return ''
+        if valor.is_integer():
+            return str(int(valor))
+    return str(valor)
+
+def _intervalos_contiguos(posicoes):
+    """Agrupa posições ordenadas em intervalos [inicio, fim] de posições consecutivas."""
+    intervalos = []
+    for pos in posicoes:
+        if intervalos and pos == intervalos[-1][1] + 1:
+            intervalos[-1][1] = pos
+        else:
+            intervalos.append([pos, pos])
+    return intervalos
+
+def calcular_escrita_incremental(atuais, dados, colunas_chave=COLUNAS_CHAVE_RESERVA,
+                                 coluna_ignorada=COLUNA_ULTIMA_ATUALIZACAO, coluna_id=COLUNA_ID_RESERVA):
+    """
+    Compara o conteúdo atual da aba (`atuais`, lista de listas lida da planilha) com o
+    desejado (`dados`, cabeçalho + linhas) e monta a escrita mínima.
+
+    Cada linha desejada é casada com a linha da planilha de mesmo `coluna_id` (assim uma
+    reserva com as datas editadas continua na mesma linha); linhas com id vazio, ou abas sem
+    essa coluna, usam a chave `colunas_chave` (sem essas colunas, a posição). Linhas casadas
+    ficam onde estão e só são regravadas se algo além de `coluna_ignorada` mudou; linhas
+    novas ocupam as vagas das removidas e, se sobrar linha abaixo do fim da tabela, ela
+    sobe para uma vaga.
+
+    Returns:
+        list[dict] | None: intervalos {'range', 'values'} para Worksheet.batch_update,
+        ou None se o cabeçalho mudou e a aba precisa ser regravada inteira.
+    """
+    cabecalho = [str(c) for c in dados[0]]
+    largura = len(cabecalho)
+    if not atuais or [_celula_canonica(c) for c in atuais[0][:largura]] != cabecalho \
+            or any(_celula_canonica(c) for c in atuais[0][largura:]):
+        return None
+
+    idx_id = cabecalho.index(coluna_id) if coluna_id in cabecalho else None
+    idx_chave = [cabecalho.index(c) for c in colunas_chave if c in cabecalho]
+    idx_ignorada = cabecalho.index(coluna_ignorada) if coluna_ignorada in cabecalho else None
+    idx_comparados = [j for j in range(largura) if j != idx_ignorada]
+
+    def canonica(linha):
+        linha = list(linha[:largura]) + [''] * (largura - len(linha))
+        return [_celula_canonica(c) for c in linha]
+
+    existentes = [canonica(linha) for linha in atuais[1:]]
+    novos = dados[1:]
+    novos_canonicos = [canonica(linha) for linha in novos]
+
+    def chave(linha, pos):
+        if idx_id is not None and linha[idx_id]:
+            return ('id', linha[idx_id])
+        return tuple(linha[j] for j in idx_chave) if idx_chave else pos
+
+    posicoes = {}
+    for pos, linha in enumerate(existentes):
+        posicoes.setdefault(chave(linha, pos), deque()).append(pos)
+
+    # Linha da planilha (0 = primeira após o cabeçalho) -> linha desejada
+    destino, sem_lugar = {}, []
+    for i, linha in enumerate(novos_canonicos):
+        fila = posicoes.get(chave(linha, i))
+        if fila:
+            destino[fila.popleft()] = i
+        else:
+            sem_lugar.append(i)
+
+    total = len(novos)
+    escrever = {pos for pos, i in destino.items()
+                if pos < total and any(existentes[pos][j] != novos_canonicos[i][j] for j in idx_comparados)}
+
+    # Linhas casadas abaixo do novo fim sobem para as vagas, seguidas das linhas novas
+    realocadas = [i for pos, i in sorted(destino.items()) if pos >= total] + sem_lugar
+    final = {pos: i for pos, i in destino.items() if pos < total}
+    vagas = [pos for pos in range(total) if pos not in final]
+    for pos, i in zip(vagas, realocadas):
+        final[pos] = i
+        escrever.add(pos)
+
+    intervalos = []
+    for inicio, fim in _intervalos_contiguos(sorted(escrever)):
+        intervalos.append({
+            'range': f"{rowcol_to_a1(inicio + 2, 1)}:{rowcol_to_a1(fim + 2, largura)}",
+            'values': [list(novos[final[pos]]) for pos in range(inicio, fim + 1)],
+        })
+
+    if total and idx_ignorada is not None and 0 not in escrever:
+        valor = novos[final[0]][idx_ignorada]
+        if _celula_canonica(valor) != existentes[0][idx_ignorada]:
+            intervalos.insert(0, {'range': rowcol_to_a1(2, idx_ignorada + 1), 'values': [[valor]]})
+    return intervalos
+
+def _reescrever_aba(worksheet, dados, colunas):
+    """Escrita completa (aba nova ou cabeçalho diferente), sem limpar a aba antes."""
+    try:
+        # Tenta sintaxe nova (gspread >= 6.0)
+        agendador.executar(lambda: worksheet.update(values=dados, range_name='A1'), escrita=True)
+    except TypeError:
+        # Fallback para sintaxe antiga (gspread < 6.0)
+        agendador.executar(lambda: worksheet.update('A1', dados), escrita=True)
+    except Exception:
+        # Última tentativa genérica
+        agendador.executar(lambda: worksheet.update(dados), escrita=True)
+
+    # Ajuste Visual (Opcional, mas bom para manter organizado)
+    try:
+        # Redimensiona para o tamanho exato dos dados (remove linhas e colunas antigas)
+        agendador.executar(lambda: worksheet.resize(rows=len(dados), cols=colunas), escrita=True)
+        # Ajusta largura das colunas
+        # (Se der erro aqui, ignoramos com pass para não travar o processo principal)
+        agendador.executar(lambda: worksheet.columns_auto_resize(0, colunas - 1), escrita=True)
+    except Exception:
+        pass
+
+def salvar_df_no_gsheet(df, tab_name="Reservas Consolidadas", colunas_chave=COLUNAS_CHAVE_RESERVA):
+    """
+    Salva o DataFrame no Google Sheets escrevendo só o que mudou:
+    1. Lê o conteúdo atual da aba (uma chamada).
+    2. Compara linha a linha pelo idReserva ou pela chave da reserva (ver calcular_escrita_incremental) e
+       envia apenas os intervalos alterados em um único batch_update.
+    3. Ajusta o número de linhas da aba uma vez, se a tabela cresceu ou encolheu.
+    A aba nunca é limpa: quem lê durante a sincronização vê a versão anterior ou a nova.
+    NaNs viram células vazias. Aba nova ou com cabeçalho diferente é escrita inteira.
+
+    Returns:
+        dict: {'modo': 'incremental' | 'completo', 'linhas': linhas de dados, 'celulas': células escritas},
+        ou None em caso de erro.
+    """
+    try:
+        sh = obter_planilha()
+        if not sh: return
         
-        # 1. Abre ou cria a aba
-        try:
-            worksheet = sh.worksheet(tab_name)
-            # CRUCIAL: Limpa tudo antes de escrever. 
-            # Isso remove filtros antigos e linhas 'fantasmas' que causavam o erro de visualização.
-            worksheet.clear() 
-        except gspread.WorksheetNotFound:
-            worksheet = sh.add_worksheet(title=tab_name, rows=len(df)+20, cols=len(df.columns))
-            
-        # 2. Tratamento de dados
         # fillna('') deixa a célula vazia no Sheets, em vez de escrever a palavra "nan"
         df_clean = df.fillna('')
-        
-        # Prepara a lista de listas (Cabeçalho + Dados)
         dados = [df_clean.columns.values.tolist()] + df_clean.values.tolist()
-        
-        # 3. Escrita Robusta (Bloco do Teste)
-        try:
-            # Tenta sintaxe nova (gspread >= 6.0)
-            worksheet.update(values=dados, range_name='A1')
-        except TypeError:
-            # Fallback para sintaxe antiga (gspread < 6.0)
-            worksheet.update('A1', dados)
-        except Exception:
-            # Última tentativa genérica
-            worksheet.update(dados)
-            
-        # 4. Ajuste Visual (Opcional, mas bom para manter organizado)
+        colunas = len(df_clean.columns)
+
         try:
-            # Redimensiona para o tamanho exato dos dados
-            worksheet.resize(rows=len(dados), cols=len(df.columns))
-            # Ajusta largura das colunas
-            # (Se der erro aqui, ignoramos com pass para não travar o processo principal)
-            worksheet.columns_auto_resize(0, len(df.columns)-1)
-        except Exception:
-            pass
+            worksheet = obter_aba(tab_name)
+            atuais = agendador.executar(lambda: worksheet.get_all_values(value_render_option='UNFORMATTED_VALUE'))
+        except gspread.WorksheetNotFound:
+            worksheet = agendador.executar(lambda: sh.add_worksheet(title=tab_name, rows=len(df)+20, cols=colunas), escrita=True)
+            with _conexao_lock:
+                _conexao['abas'][tab_name] = worksheet
+            atuais = []
+
+        intervalos = calcular_escrita_incremental(atuais, dados, colunas_chave)
+        if intervalos is None:
+            _reescrever_aba(worksheet, dados, colunas)
+            return {'modo': 'completo', 'linhas': len(dados) - 1, 'celulas': len(dados) * colunas}
+
+        # A grade precisa comportar as linhas novas antes da escrita; o corte vem depois
+        linhas_grade = getattr(worksheet, 'row_count', len(atuais))
+        if linhas_grade < len(dados):
+            agendador.executar(lambda: worksheet.resize(rows=len(dados)), escrita=True)
+        if intervalos:
+            agendador.executar(lambda: worksheet.batch_update(intervalos), escrita=True)
+        if linhas_grade > len(dados):
+            agendador.executar(lambda: worksheet.resize(rows=len(dados)), escrita=True)
+
+        return {
+            'modo': 'incremental',
+            'linhas': sum(len(i['values']) for i in intervalos if len(i['values'][0]) == colunas),
+            'celulas': sum(len(linha) for i in intervalos for linha in i['values']),
+        }
         
     except Exception as e:
-        import streamlit as st
+        descartar_aba(tab_name)
         st.error(f"Erro ao salvar dados na aba '{tab_name}': {e}")
 
 def inserir_linha_google_sheet(dados_linha, tab_name="Inconsistências"):
@@ -340,59 +714,182 @@ def inserir_linha_google_sheet(dados_linha, tab_name="Inconsistências"):
     Insere uma linha no final da aba especificada.
     """
     try:
-        gc = authenticate_google_sheets()
-        if not gc: return
+        if not obter_cliente(): return
         
-        sh = gc.open_by_key(SHEET_KEY)
-        worksheet = sh.worksheet(tab_name)
-        worksheet.append_row(dados_linha)
+        worksheet = obter_aba(tab_name)
+        agendador.executar(lambda: worksheet.append_row(dados_linha), escrita=True)
         
     except Exception as e:
+        descartar_aba(tab_name)
         st.error(f"Erro ao inserir linha em '{tab_name}': {e}")
 
+class AcumuladorLinhas:
+    """
+    Junta as linhas a inserir em cada aba durante a sincronização e grava cada aba
+    com um único append_rows, em vez de um append_row por linha.
+
+    Ex.: pendencias = AcumuladorLinhas()
+         pendencias.adicionar(linha, "Inconsistências")   # quantas vezes for preciso
+         pendencias.gravar()                              # uma requisição por aba
+    """
+
+    def __init__(self):
+        self._linhas = {}
+
+    def adicionar(self, linha, tab_name="Inconsistências"):
+        self._linhas.setdefault(tab_name, []).append(list(linha))
+
+    def adicionar_varias(self, linhas, tab_name="Inconsistências"):
+        for linha in linhas:
+            self.adicionar(linha, tab_name)
+
+    @property
+    def pendentes(self):
+        """{aba: quantidade de linhas ainda não gravadas}"""
+        return {tab_name: len(linhas) for tab_name, linhas in self._linhas.items() if linhas}
+
+    def gravar(self):
+        """
+        Grava as linhas pendentes (append_rows por aba, pelo agendador de requisições).
+        Linhas de uma aba que falhou continuam pendentes para uma próxima chamada.
+
+        Returns:
+            dict: {aba: linhas gravadas}
+        """
+        gravadas = {}
+        if not self.pendentes or not obter_cliente():
+            return gravadas
+
+        for tab_name, linhas in list(self._linhas.items()):
+            if not linhas:
+                continue
+            try:
+                worksheet = obter_aba(tab_name)
+                agendador.executar(lambda: worksheet.append_rows(linhas), escrita=True)
+            except Exception as e:
+                descartar_aba(tab_name)
+                st.error(f"Erro ao inserir {len(linhas)} linhas em '{tab_name}': {e}")
+                continue
+            gravadas[tab_name] = len(linhas)
+            del self._linhas[tab_name]
+        return gravadas
+
+def _dataframe_da_aba(all_values, tab_name):
+    """
+    Converte os valores brutos de uma aba em DataFrame, buscando dinamicamente a linha de cabeçalho.
+    Retorna None se o cabeçalho não for encontrado.
+    """
+    # --- CORREÇÃO: Busca dinâmica pelo cabeçalho (igual ao baixar_dados) ---
+    header_row_index = -1
+    for i, row in enumerate(all_values[:10]): # Procura nas primeiras 10 linhas
+        # Procura por colunas chave para identificar a linha correta
+        row_str = [str(c).strip() for c in row]
+        if "Início" in row_str and "Status" in row_str:
+            header_row_index = i
+            break
+    
+    if header_row_index == -1:
+        st.warning(f"Cabeçalho não encontrado na aba '{tab_name}'. Verifique se existem colunas 'Início' e 'Status'.")
+        return None
+
+    headers = all_values[header_row_index]
+    # Remove espaços extras dos nomes das colunas para evitar erros no concat
+    headers = [h.strip() for h in headers] 
+    data = all_values[header_row_index + 1:]
+    
+    df = pd.DataFrame(data, columns=headers)
+    
+    # Remove colunas vazias ou duplicadas
+    return df.loc[:, ~df.columns.duplicated()]
+
+def _ler_valores_aba(tab_name):
+    """Valores brutos (formatados) de uma aba, com uma chamada get_all_values."""
+    worksheet = obter_aba(tab_name)
+    return agendador.executar(lambda: worksheet.get_all_values(value_render_option='FORMATTED_VALUE'))
+
+def abas_como_dataframes(valores_abas):
+    """
+    Converte {nome_aba: valores brutos} em {nome_aba: dataframe} com _dataframe_da_aba
+    (cabeçalho com 'Início' e 'Status', todas as colunas), como a consolidação espera.
+    Abas sem cabeçalho ficam de fora.
+    """
+    dfs = {}
+    for tab_name, all_values in valores_abas.items():
+        df = _dataframe_da_aba(all_values, tab_name)
+        if df is not None:
+            dfs[tab_name] = df
+    return dfs
+
 def ler_abas_planilha(abas_map):
     """
     Lê múltiplas abas buscando dinamicamente a linha de cabeçalho.
     Retorna um dicionário {nome_aba: dataframe}.
     """
     dfs = {}
-    gc = authenticate_google_sheets()
-    if not gc: return dfs
-    
-    sh = gc.open_by_key(SHEET_KEY)
+    if not obter_cliente(): return dfs
     
     for apt_cod, tab_name in abas_map.items():
         try:
-            worksheet = sh.worksheet(tab_name)
-            all_values = worksheet.get_all_values(value_render_option='FORMATTED_VALUE')
+            all_values = _ler_valores_aba(tab_name)
             
             if len(all_values) < 1:
                 continue
 
-            # --- CORREÇÃO: Busca dinâmica pelo cabeçalho (igual ao baixar_dados) ---
-            header_row_index = -1
-            for i, row in enumerate(all_values[:10]): # Procura nas primeiras 10 linhas
-                # Procura por colunas chave para identificar a linha correta
-                row_str = [str(c).strip() for c in row]
-                if "Início" in row_str and "Status" in row_str:
-                    header_row_index = i
-                    break
-            
-            if header_row_index != -1:
-                headers = all_values[header_row_index]
-                # Remove espaços extras dos nomes das colunas para evitar erros no concat
-                headers = [h.strip() for h in headers] 
-                data = all_values[header_row_index + 1:]
-                
-                df = pd.DataFrame(data, columns=headers)
-                
-                # Remove colunas vazias ou duplicadas
-                df = df.loc[:, ~df.columns.duplicated()]
-                dfs[tab_name] = df
-            else:
-                st.warning(f"Cabeçalho não encontrado na aba '{tab_name}'. Verifique se existem colunas 'Início' e 'Status'.")
+            dfs.update(abas_como_dataframes({tab_name: all_values}))
 
         except Exception as e:
+            descartar_aba(tab_name)
             st.warning(f"Aba '{tab_name}' não encontrada ou erro ao ler: {e}")
             
     return dfs
+
+def ler_valores_abas_em_lote(abas_map, abas_extras=("Reservas Consolidadas",), gc=None):
+    """
+    Lê todas as abas de `abas_map` (mais `abas_extras`) com uma única chamada values.batchGet.
+    Retorna os valores brutos {nome_aba: lista de linhas}, para que cada uso aplique a própria
+    regra de cabeçalho (abas_como_dataframes para a consolidação, reservas_da_aba para o .ics).
+    Abas vazias ficam de fora. Se o lote falhar (ex: alguma aba não existe), recorre à
+    leitura aba por aba.
+    """
+    valores = {}
+    tab_names = list(dict.fromkeys(list(abas_map.values()) + list(abas_extras)))
+    if not tab_names:
+        return valores
+
+    try:
+        sh = agendador.executar(lambda: gc.open_by_key(SHEET_KEY)) if gc is not None else obter_planilha()
+        if not sh: return valores
+        resposta = agendador.executar(lambda: sh.values_batch_get(
+            [absolute_range_name(tab_name) for tab_name in tab_names],
+            params={'valueRenderOption': 'FORMATTED_VALUE'}
+        ))
+    except Exception as e:
+        st.warning(f"Leitura em lote falhou ({e}). Lendo aba por aba.")
+        if not obter_cliente(): return valores
+        for tab_name in tab_names:
+            try:
+                all_values = _ler_valores_aba(tab_name)
+            except Exception as e:
+                descartar_aba(tab_name)
+                st.warning(f"Aba '{tab_name}' não encontrada ou erro ao ler: {e}")
+                continue
+            if all_values:
+                valores[tab_name] = all_values
+        return valores
+
+    # O batchGet devolve os intervalos na mesma ordem das abas pedidas
+    for tab_name, value_range in zip(tab_names, resposta.get('valueRanges', [])):
+        # Diferente do get_all_values, o batchGet não completa linhas com células vazias no final
+        all_values = fill_gaps(value_range.get('values', []))
+        if all_values:
+            valores[tab_name] = all_values
+
+    return valores
+
+def ler_abas_planilha_em_lote(abas_map, abas_extras=("Reservas Consolidadas",), gc=None):
+    """
+    Lê todas as abas de `abas_map` (mais `abas_extras`) com uma única chamada values.batchGet
+    (ver ler_valores_abas_em_lote).
+    Retorna o mesmo formato de ler_abas_planilha: {nome_aba: dataframe}.
+    """
+    return abas_como_dataframes(ler_valores_abas_em_lote(abas_map, abas_extras, gc=gc))
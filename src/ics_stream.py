@@ -0,0 +1,287 @@
+import io
+import re
+from collections import namedtuple
+from datetime import date, datetime
+from functools import lru_cache
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+import pandas as pd
+from icalendar import Calendar
+
+# Leitor de .ics em fluxo: percorre o arquivo linha a linha (com desdobramento de
+# linhas, RFC 5545 §3.1) e extrai só as propriedades usadas pelo sistema, sem montar
+# a árvore de componentes do icalendar. Conteúdo fora do que o leitor entende
+# (datas em formato diferente, TZID sem equivalente no zoneinfo, codificação base64,
+# evento sem DTSTART/DTEND) cai no icalendar, como antes.
+
+EventoICS = namedtuple('EventoICS', ['inicio', 'fim', 'summary', 'uid', 'descricao'])
+
+# Propriedade bruta de data: texto do valor + parâmetros relevantes
+DataBruta = namedtuple('DataBruta', ['valor', 'tzid', 'tipo'])
+
+_PROPRIEDADES_TEXTO = {'SUMMARY': 2, 'UID': 3, 'DESCRIPTION': 4}
+_PROPRIEDADES_DATA = {'DTSTART': 0, 'DTEND': 1}
+_PROPRIEDADES_LIDAS = _PROPRIEDADES_TEXTO.keys() | _PROPRIEDADES_DATA.keys()
+
+_RE_DATA_ICS = re.compile(r'(\d{4})(\d{2})(\d{2})(?:T(\d{2})(\d{2})(\d{2})(Z?))?')
+_RE_ESCAPE = re.compile(r'\\([\\;,nN])')
+_ESCAPES = {'\\': '\\', ';': ';', ',': ',', 'n': '\n', 'N': '\n'}
+UTC = ZoneInfo('UTC')
+
+
+class ConteudoICSNaoSuportado(ValueError):
+    """Conteúdo que o leitor em fluxo não interpreta; o chamador deve usar o icalendar."""
+
+
+def desdobrar_linhas(linhas):
+    """
+    Junta as linhas dobradas (continuações começam com espaço ou tab) de um iterável
+    de linhas em bytes e devolve as linhas lógicas já decodificadas em UTF-8.
+    O desdobramento é feito antes da decodificação para não partir caracteres multibyte.
+    """
+    partes = None
+    for bruta in linhas:
+        linha = bruta.rstrip(b'\r\n')
+        if linha[:1] in (b' ', b'\t'):
+            if partes is not None:
+                partes.append(linha[1:])
+            continue
+        if partes:
+            yield b''.join(partes).decode('utf-8', 'replace')
+        partes = [linha] if linha else None
+    if partes:
+        yield b''.join(partes).decode('utf-8', 'replace')
+
+
+def _dividir_fora_de_aspas(texto, separador):
+    partes, atual, entre_aspas = [], [], False
+    for c in texto:
+        if c == '"':
+            entre_aspas = not entre_aspas
+        elif c == separador and not entre_aspas:
+            partes.append(''.join(atual))
+            atual = []
+            continue
+        atual.append(c)
+    partes.append(''.join(atual))
+    return partes
+
+
+def separar_propriedade(linha):
+    """
+    Separa uma linha lógica em (NOME, parâmetros, valor).
+    Ex.: 'DTSTART;TZID="America/Sao_Paulo":20250101T150000' ->
+         ('DTSTART', {'TZID': 'America/Sao_Paulo'}, '20250101T150000')
+    """
+    dois_pontos = linha.find(':')
+    if dois_pontos < 0:
+        return linha.upper(), {}, ''
+    cabeca = linha[:dois_pontos]
+    if cabeca.count('"') % 2:
+        # ':' dentro de um parâmetro entre aspas (ex.: ALTREP="http://...")
+        entre_aspas = False
+        for i, c in enumerate(linha):
+            if c == '"':
+                entre_aspas = not entre_aspas
+            elif c == ':' and not entre_aspas:
+                dois_pontos = i
+                break
+        cabeca = linha[:dois_pontos]
+
+    valor = linha[dois_pontos + 1:]
+    if ';' not in cabeca:
+        return cabeca.upper(), {}, valor
+
+    nome, *brutos = _dividir_fora_de_aspas(cabeca, ';') if '"' in cabeca else cabeca.split(';')
+    parametros = {}
+    for bruto in brutos:
+        chave, _, val = bruto.partition('=')
+        parametros[chave.strip().upper()] = val.strip().strip('"')
+    return nome.upper(), parametros, valor
+
+
+def desescapar_texto(valor):
+    """Desfaz o escape de valores TEXT (\\n, \\N, \\, \\; e \\\\)."""
+    if '\\' not in valor:
+        return valor
+    return _RE_ESCAPE.sub(lambda m: _ESCAPES[m.group(1)], valor)
+
+
+def _linhas_da_fonte(fonte):
+    if isinstance(fonte, (bytes, bytearray)):
+        return io.BytesIO(bytes(fonte))
+    return None
+
+
+def _conteudo_da_fonte(fonte):
+    if isinstance(fonte, (bytes, bytearray)):
+        return bytes(fonte)
+    with open(fonte, 'rb') as f:
+        return f.read()
+
+
+def iterar_eventos_brutos(linhas):
+    """
+    Gerador sobre as linhas lógicas (já desdobradas) de um calendário.
+    Para cada VEVENT devolve uma tupla (dtstart, dtend, summary, uid, descricao):
+    datas como DataBruta (texto ainda não convertido), textos já sem escape ou None.
+    Propriedades de componentes aninhados (ex.: VALARM) são ignoradas.
+    """
+    evento = None
+    aninhados = 0
+    for linha in linhas:
+        if linha[:6] == 'BEGIN:':
+            if evento is not None:
+                aninhados += 1
+            elif linha[6:].strip().upper() == 'VEVENT':
+                evento = [None, None, None, None, None]
+            continue
+        if linha[:4] == 'END:':
+            if evento is None:
+                continue
+            if aninhados:
+                aninhados -= 1
+            elif linha[4:].strip().upper() == 'VEVENT':
+                yield tuple(evento)
+                evento = None
+            continue
+        if evento is None or aninhados:
+            continue
+
+        # Descarta cedo as propriedades não usadas (DTSTAMP, SEQUENCE, ...)
+        fim_nome = linha.find(':')
+        separador = linha.find(';', 0, fim_nome)
+        if linha[:separador if separador >= 0 else fim_nome].upper() not in _PROPRIEDADES_LIDAS:
+            continue
+
+        nome, parametros, valor = separar_propriedade(linha)
+        posicao = _PROPRIEDADES_DATA.get(nome)
+        if posicao is not None:
+            evento[posicao] = DataBruta(valor.strip(), parametros.get('TZID'), parametros.get('VALUE'))
+            continue
+        posicao = _PROPRIEDADES_TEXTO.get(nome)
+        if posicao is not None:
+            if parametros.get('ENCODING'):
+                raise ConteudoICSNaoSuportado(f"{nome} com ENCODING={parametros['ENCODING']}")
+            evento[posicao] = desescapar_texto(valor)
+
+
+@lru_cache(maxsize=64)
+def _fuso(tzid):
+    try:
+        return ZoneInfo(tzid)
+    except (ZoneInfoNotFoundError, ValueError) as e:
+        raise ConteudoICSNaoSuportado(f"TZID desconhecido: {tzid}") from e
+
+
+def converter_data_ics(bruta):
+    """
+    Converte uma DataBruta como o icalendar faria em .dt: date para datas puras,
+    datetime em UTC para valores com 'Z', no fuso do TZID quando houver, ou ingênuo.
+    """
+    if bruta is None:
+        raise ConteudoICSNaoSuportado("Evento sem DTSTART/DTEND")
+    m = _RE_DATA_ICS.fullmatch(bruta.valor)
+    if not m or bruta.tipo not in (None, 'DATE', 'DATE-TIME'):
+        raise ConteudoICSNaoSuportado(f"Data não suportada: {bruta.valor}")
+    ano, mes, dia, hora, minuto, segundo, z = m.groups()
+    if hora is None:
+        return date(int(ano), int(mes), int(dia))
+    if z:
+        tz = UTC
+    elif bruta.tzid:
+        tz = _fuso(bruta.tzid)
+    else:
+        tz = None
+    return datetime(int(ano), int(mes), int(dia), int(hora), int(minuto), int(segundo), tzinfo=tz)
+
+
+def _iterar_eventos_em_fluxo(linhas):
+    for dtstart, dtend, summary, uid, descricao in iterar_eventos_brutos(desdobrar_linhas(linhas)):
+        yield EventoICS(converter_data_ics(dtstart), converter_data_ics(dtend), summary, uid, descricao)
+
+
+def _eventos_via_icalendar(conteudo):
+    """Caminho anterior (árvore completa do icalendar), usado para conteúdo não suportado."""
+    cal = Calendar.from_ical(conteudo)
+    eventos = []
+    for component in cal.walk('VEVENT'):
+        textos = [component.get(nome) for nome in ('summary', 'uid', 'description')]
+        eventos.append(EventoICS(
+            component.get('dtstart').dt,
+            component.get('dtend').dt,
+            *(str(t) if t is not None else None for t in textos)
+        ))
+    return eventos
+
+
+def ler_eventos_ics(fonte):
+    """
+    Lê os VEVENTs de um arquivo .ics (caminho) ou de um conteúdo em bytes.
+    Retorna uma lista de EventoICS(inicio, fim, summary, uid, descricao); textos
+    ausentes vêm como None. Usa o leitor em fluxo e recorre ao icalendar quando o
+    conteúdo tem algo que ele não interpreta.
+    """
+    linhas = _linhas_da_fonte(fonte)
+    try:
+        if linhas is not None:
+            return list(_iterar_eventos_em_fluxo(linhas))
+        with open(fonte, 'rb') as f:
+            return list(_iterar_eventos_em_fluxo(f))
+    except ConteudoICSNaoSuportado:
+        return _eventos_via_icalendar(_conteudo_da_fonte(fonte))
+
+
+def _datas_de_parede(valores):
+    """
+    Converte textos de DTSTART/DTEND ('YYYYMMDD', 'YYYYMMDDTHHMMSS' com ou sem 'Z')
+    para datetime64 de uma vez, no horário de parede: o fuso (Z ou TZID) é descartado
+    sem conversão, como datetime.replace(tzinfo=None), e datas puras viram meia-noite.
+    """
+    textos = pd.Series(valores, dtype='str').str.removesuffix('Z')
+    textos = textos.where(textos.str.len() != 8, textos + 'T000000')
+    datas = pd.to_datetime(textos, format='%Y%m%dT%H%M%S', errors='coerce')
+    if datas.isna().any():
+        raise ConteudoICSNaoSuportado(f"Data não suportada: {textos[datas.isna()].iloc[0]}")
+    return datas.to_numpy(dtype='datetime64[us]')
+
+
+def _colunas_em_fluxo(linhas):
+    inicios, fins, summaries, uids = [], [], [], []
+    for dtstart, dtend, summary, uid, _ in iterar_eventos_brutos(desdobrar_linhas(linhas)):
+        if dtstart is None or dtend is None:
+            raise ConteudoICSNaoSuportado("Evento sem DTSTART/DTEND")
+        if dtstart.tipo not in (None, 'DATE', 'DATE-TIME') or dtend.tipo not in (None, 'DATE', 'DATE-TIME'):
+            raise ConteudoICSNaoSuportado(f"VALUE={dtstart.tipo or dtend.tipo}")
+        inicios.append(dtstart.valor)
+        fins.append(dtend.valor)
+        summaries.append(summary)
+        uids.append(uid)
+    return {'inicio': _datas_de_parede(inicios), 'fim': _datas_de_parede(fins), 'summary': summaries, 'uid': uids}
+
+
+def ler_colunas_ics(fonte):
+    """
+    Lê os VEVENTs de um arquivo .ics (caminho) ou conteúdo em bytes direto em colunas:
+    {'inicio', 'fim': arrays datetime64[us] no horário de parede (sem fuso),
+     'summary', 'uid': listas de textos (None quando ausentes)}.
+    Conteúdo não suportado pelo leitor em fluxo passa pelo icalendar.
+    """
+    linhas = _linhas_da_fonte(fonte)
+    try:
+        if linhas is not None:
+            return _colunas_em_fluxo(linhas)
+        with open(fonte, 'rb') as f:
+            return _colunas_em_fluxo(f)
+    except ConteudoICSNaoSuportado:
+        eventos = _eventos_via_icalendar(_conteudo_da_fonte(fonte))
+
+    def sem_fuso(d):
+        return d.replace(tzinfo=None) if isinstance(d, datetime) else datetime.combine(d, datetime.min.time())
+
+    return {
+        'inicio': pd.DatetimeIndex([sem_fuso(e.inicio) for e in eventos], dtype='datetime64[us]').to_numpy(),
+        'fim': pd.DatetimeIndex([sem_fuso(e.fim) for e in eventos], dtype='datetime64[us]').to_numpy(),
+        'summary': [e.summary for e in eventos],
+        'uid': [e.uid for e in eventos],
+    }
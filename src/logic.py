@@ -1,19 +1,24 @@
+import numpy as np
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
-from datetime import datetime, time, date, timedelta
+from datetime import datetime, timedelta
 import os
-from icalendar import Calendar
+from functools import lru_cache
 from zoneinfo import ZoneInfo
 from src.gsheets_api import salvar_df_no_gsheet, ler_abas_planilha
-from src.config import OTA_URLS, APARTMENT_SHEET_MAP, CALENDARS_DIR
+from src.config import OTA_URLS, APARTMENT_SHEET_MAP, CALENDARS_DIR, REGRAS_SUMMARY, HORA_CHECKIN, HORA_CHECKOUT, FUNDO_CALENDARIO_CACHE_MAX
+from src.ics_stream import ler_colunas_ics
+from src.manifest import carregar_manifesto, salvar_manifesto, hash_dataframe, carregar_cache_consolidacao, salvar_cache_consolidacao, carregar_ids_reservas, salvar_ids_reservas
 
 # Tenta importar utilitários, com fallback se não existirem
 try:
-    from src.utils import get_holidays, parse_pt_date
+    from src.utils import get_holidays, mapa_feriados, parse_pt_date, parse_pt_dates
 except ImportError:
     def get_holidays(years): return pd.DataFrame(columns=['Data', 'Feriado'])
+    def mapa_feriados(years): return {}
     def parse_pt_date(d): return pd.NaT
+    def parse_pt_dates(datas): return pd.Series(pd.NaT, index=datas.index)
 
 '''# Mapa de meses para parse de datas em português
 MESES_MAP_REPLACE = {
@@ -24,42 +29,35 @@ MESES_MAP_REPLACE = {
 
 # --- 1. Funções de Backend (ETL e Arquivos) ---
 
-def ler_calendario_ics(filepath):
+def ler_calendario_ics(filepath, aplicar_regras=True):
     """
-    Lê um arquivo .ics e retorna um DataFrame.
+    Lê um arquivo .ics e retorna um DataFrame com 'Início', 'Fim', 'Summary' e 'UID'.
+    As colunas são montadas de uma vez a partir do leitor em fluxo: datas em
+    datetime64 no horário de parede (sem fuso) e Summary categórico.
+    Com aplicar_regras, o Summary sai padronizado por REGRAS_SUMMARY
+    (ex.: 'Reserved' -> 'Airbnb'), sem precisar reescrever o .ics baixado.
     """
     if not os.path.exists(filepath):
         return pd.DataFrame()
 
-    with open(filepath, 'rb') as f:
-        try:
-            cal = Calendar.from_ical(f.read())
-        except Exception:
-            return pd.DataFrame()
-
-    events = []
-    for component in cal.walk('VEVENT'):
-        start = component.get('dtstart').dt
-        end = component.get('dtend').dt
-        summary = str(component.get('summary'))
-        
-        # Normaliza datas para datetime
-        if isinstance(start, date) and not isinstance(start, datetime):
-            start = datetime.combine(start, datetime.min.time())
-        if isinstance(end, date) and not isinstance(end, datetime):
-            end = datetime.combine(end, datetime.min.time())
-            
-        # Remove timezone info
-        start = start.replace(tzinfo=None)
-        end = end.replace(tzinfo=None)
-
-        events.append({
-            'Início': start,
-            'Fim': end,
-            'Summary': summary
-        })
-
-    return pd.DataFrame(events)
+    try:
+        colunas = ler_colunas_ics(filepath)
+    except Exception:
+        return pd.DataFrame()
+
+    if len(colunas['inicio']) == 0:
+        return pd.DataFrame()
+
+    # Summary ausente vira 'None', como no str(component.get('summary')) de antes
+    summaries = pd.Series(colunas['summary'], dtype=object).fillna('None').astype('str')
+    if aplicar_regras:
+        summaries = summaries.replace(REGRAS_SUMMARY)
+    return pd.DataFrame({
+        'Início': colunas['inicio'],
+        'Fim': colunas['fim'],
+        'Summary': summaries.astype('category'),
+        'UID': pd.Series(colunas['uid'], dtype='str'),
+    })
 
 def merge_ical_files(file_ota, file_google, output_filename):
     """
@@ -101,33 +99,84 @@ def merge_ical_files(file_ota, file_google, output_filename):
     
     return df_merged
 
-def verificar_inconsistencias(df_merged):
+def _pares_sobrepostos(inicios, fins):
+    """
+    Varredura (sweep) sobre intervalos já ordenados por início.
+    Para cada reserva i, as candidatas são as seguintes até a primeira que começa no
+    fim de i ou depois (busca binária em `inicios`). Retorna os arrays (i, j), i < j,
+    de todos os pares sobrepostos, em ordem crescente de i e depois de j.
+    Inícios NaT devem estar no final (como em sort_values); datas NaT não geram pares.
+    """
+    inicios = np.asarray(inicios, dtype='datetime64[ns]')
+    fins = np.asarray(fins, dtype='datetime64[ns]')
+    validos = int((~np.isnat(inicios)).sum())
+    ini, fim = inicios[:validos].view('i8'), fins[:validos].view('i8')
+    fim_valido = ~np.isnat(fins[:validos])
+
+    posicoes = np.arange(validos)
+    limite = np.searchsorted(ini, fim, side='left')
+    quantidades = np.where(fim_valido, np.maximum(limite - posicoes - 1, 0), 0)
+
+    i = np.repeat(posicoes, quantidades)
+    deslocamento = np.arange(len(i)) - np.repeat(np.cumsum(quantidades) - quantidades, quantidades)
+    j = i + 1 + deslocamento
+
+    sobrepostos = fim_valido[j] & (ini[i] < fim[j])
+    return i[sobrepostos], j[sobrepostos]
+
+def verificar_inconsistencias(df_merged, coluna_grupo=None, coluna_resumo='Summary'):
     """
     Verifica sobreposições de reservas no DataFrame mesclado.
+    Ordena por 'Início' e faz uma varredura com busca binária sobre os arrays de datas,
+    emitindo todos os pares sobrepostos (mesmas colunas e ordem da verificação par a par).
+
+    Args:
+        df_merged (pd.DataFrame): Reservas com 'Início', 'Fim' e a coluna de resumo.
+        coluna_grupo (str, opcional): Ex: 'Apartamento'. Só compara reservas do mesmo grupo,
+            permitindo verificar a tabela consolidada inteira de uma vez; a coluna é
+            incluída no resultado.
+        coluna_resumo (str): Coluna usada para descrever cada reserva ('Summary', 'Quem'...).
     """
     if df_merged.empty:
         return pd.DataFrame()
         
-    inconsistencias = []
-    df = df_merged.sort_values('Início')
-    
-    for i in range(len(df)):
-        for j in range(i + 1, len(df)):
-            reserva1 = df.iloc[i]
-            reserva2 = df.iloc[j]
-            
-            if reserva2['Início'] >= reserva1['Fim']:
-                break
-                
-            if (reserva1['Início'] < reserva2['Fim']) and (reserva2['Início'] < reserva1['Fim']):
-                inconsistencias.append({
-                    'Reserva 1': f"{reserva1['Summary']} ({reserva1['Início']} - {reserva1['Fim']})",
-                    'Reserva 2': f"{reserva2['Summary']} ({reserva2['Início']} - {reserva2['Fim']})",
-                    'Conflito': 'Sim',
-                    'Data Detecção': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                })
-                
-    return pd.DataFrame(inconsistencias)
+    if coluna_grupo:
+        df = df_merged.sort_values([coluna_grupo, 'Início'])
+        grupos = df[coluna_grupo].to_numpy()
+        quebras = np.flatnonzero(grupos[1:] != grupos[:-1]) + 1
+        fatias = zip(np.r_[0, quebras], np.r_[quebras, len(df)])
+    else:
+        df = df_merged.sort_values('Início')
+        fatias = [(0, len(df))]
+
+    inicios = pd.to_datetime(df['Início']).to_numpy(dtype='datetime64[ns]')
+    fins = pd.to_datetime(df['Fim']).to_numpy(dtype='datetime64[ns]')
+
+    pares_i, pares_j = [], []
+    for a, b in fatias:
+        i, j = _pares_sobrepostos(inicios[a:b], fins[a:b])
+        pares_i.append(i + a)
+        pares_j.append(j + a)
+    pares_i, pares_j = np.concatenate(pares_i), np.concatenate(pares_j)
+
+    if len(pares_i) == 0:
+        return pd.DataFrame()
+
+    # Descrição apenas das reservas envolvidas, no mesmo formato de antes
+    resumos = df[coluna_resumo].to_numpy(dtype=object)
+    inicios_obj = df['Início'].astype(object).to_numpy()
+    fins_obj = df['Fim'].astype(object).to_numpy()
+    descricoes = {k: f"{resumos[k]} ({inicios_obj[k]} - {fins_obj[k]})" for k in np.union1d(pares_i, pares_j)}
+
+    inconsistencias = pd.DataFrame({
+        'Reserva 1': [descricoes[k] for k in pares_i],
+        'Reserva 2': [descricoes[k] for k in pares_j],
+        'Conflito': 'Sim',
+        'Data Detecção': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+    })
+    if coluna_grupo:
+        inconsistencias.insert(0, coluna_grupo, grupos[pares_i])
+    return inconsistencias
 
 
 def verificar_disponibilidade(df, data_inicio, data_fim):
@@ -155,6 +204,175 @@ def verificar_disponibilidade(df, data_inicio, data_fim):
     return aptos_livres, aptos_ocupados
 
 
+class IndiceDisponibilidade:
+    """
+    Índice de intervalos por apartamento para consultas de disponibilidade.
+
+    Montado uma única vez a partir da tabela consolidada: para cada apartamento guarda os
+    inícios ordenados e o maior fim acumulado (prefix max). Um apartamento está ocupado em
+    [t0, t1) se alguma reserva com início < t1 tiver fim > t0, o que se resolve com uma
+    busca binária. Mesmos resultados de verificar_disponibilidade.
+    """
+
+    def __init__(self, df):
+        self.apartamentos = []
+        self._inicios = {}
+        self._maior_fim = {}
+        if df is None or df.empty:
+            return
+
+        inicios = df['Início']
+        fins = df['Fim']
+        if inicios.dtype == object:
+            inicios = pd.to_datetime(inicios, errors='coerce')
+        if fins.dtype == object:
+            fins = pd.to_datetime(fins, errors='coerce')
+        validos = inicios.notna() & fins.notna()
+
+        tabela = pd.DataFrame({
+            'Apartamento': df['Apartamento'][validos],
+            'inicio': self._em_inteiros(inicios[validos]),
+            'fim': self._em_inteiros(fins[validos]),
+        }).sort_values(['Apartamento', 'inicio'], kind='stable')
+
+        for apt, grupo in tabela.groupby('Apartamento', sort=True):
+            self.apartamentos.append(apt)
+            self._inicios[apt] = grupo['inicio'].to_numpy()
+            self._maior_fim[apt] = np.maximum.accumulate(grupo['fim'].to_numpy())
+
+    @staticmethod
+    def _em_inteiros(datas):
+        """Datas (escalares ou arrays) em nanossegundos desde a época, para comparação rápida."""
+        return np.asarray(pd.to_datetime(datas), dtype='datetime64[ns]').astype('i8')
+
+    def _selecionar(self, apartamentos):
+        if apartamentos is None:
+            return self.apartamentos
+        escolhidos = set(apartamentos)
+        return [apt for apt in self.apartamentos if apt in escolhidos]
+
+    def intervalos(self, apto):
+        """
+        Retorna (inícios ordenados, maior fim acumulado) das reservas de `apto`, em
+        nanossegundos desde a época. Apartamento sem reservas no índice: dois arrays vazios.
+        """
+        vazio = np.empty(0, dtype='i8')
+        return self._inicios.get(apto, vazio), self._maior_fim.get(apto, vazio)
+
+    def consultar(self, data_inicio, data_fim, apartamentos=None):
+        """
+        Retorna (livres, ocupados) no intervalo, como verificar_disponibilidade.
+        `apartamentos` restringe a consulta (ex: filtro da tela); None = todos.
+        """
+        t0 = pd.Timestamp(data_inicio).value
+        t1 = pd.Timestamp(data_fim).value
+        livres, ocupados = [], []
+        for apt in self._selecionar(apartamentos):
+            k = np.searchsorted(self._inicios[apt], t1, side='left')
+            (ocupados if k > 0 and self._maior_fim[apt][k - 1] > t0 else livres).append(apt)
+        return livres, ocupados
+
+    def consultar_lote(self, periodos, apartamentos=None):
+        """
+        Responde vários intervalos de uma vez.
+
+        Args:
+            periodos: lista de pares (data_inicio, data_fim).
+            apartamentos: restringe a consulta; None = todos.
+
+        Returns:
+            list: um par (livres, ocupados) por período, na ordem recebida.
+        """
+        if len(periodos) == 0:
+            return []
+        t0 = self._em_inteiros([p[0] for p in periodos])
+        t1 = self._em_inteiros([p[1] for p in periodos])
+        aptos = self._selecionar(apartamentos)
+
+        # Matriz apartamentos x períodos: True = ocupado
+        ocupado = np.zeros((len(aptos), len(periodos)), dtype=bool)
+        for linha, apt in enumerate(aptos):
+            k = np.searchsorted(self._inicios[apt], t1, side='left')
+            maior_fim = self._maior_fim[apt][np.maximum(k - 1, 0)]
+            ocupado[linha] = (k > 0) & (maior_fim > t0)
+
+        return [
+            ([apt for apt, o in zip(aptos, coluna) if not o], [apt for apt, o in zip(aptos, coluna) if o])
+            for coluna in ocupado.T
+        ]
+
+
+def buscar_janelas_livres(reservas, noites, inicio=None, horizonte_dias=60, apartamentos=None, max_por_apartamento=None):
+    """
+    Encontra as janelas livres de cada apartamento que comportam uma estadia de `noites`.
+
+    Uma única passada sobre as reservas ordenadas de cada apartamento (inícios ordenados
+    e maior fim acumulado de IndiceDisponibilidade.intervalos): há um intervalo livre antes
+    de cada reserva que começa depois do maior fim anterior, e outro após a última. Cada
+    intervalo é ajustado às regras de check-in às 15h e check-out às 11h. Um apartamento
+    sem reservas fica livre no horizonte inteiro.
+
+    Args:
+        reservas: IndiceDisponibilidade (ex: snapshot.indice) ou DataFrame consolidado.
+        noites (int): Duração da estadia desejada.
+        inicio: Primeiro dia possível de check-in (padrão: hoje).
+        horizonte_dias (int): Último check-out possível = inicio + horizonte_dias.
+        apartamentos (list, opcional): Restringe a busca; None = todos os do índice. Os pedidos
+            que não têm reservas entram como livres na janela inteira.
+        max_por_apartamento (int, opcional): Devolve só as N primeiras janelas de cada apartamento.
+
+    Returns:
+        pd.DataFrame: Colunas 'Apartamento', 'Check-in', 'Check-out' (primeira estadia possível
+        na janela), 'Livre Até' (último check-out possível), 'Noites Livres' e
+        'Opções de Check-in' (quantos dias de chegada diferentes cabem na janela).
+    """
+    colunas = ['Apartamento', 'Check-in', 'Check-out', 'Livre Até', 'Noites Livres', 'Opções de Check-in']
+    if not isinstance(reservas, IndiceDisponibilidade):
+        reservas = IndiceDisponibilidade(reservas)
+
+    dia = pd.Timedelta(days=1).value
+    checkin = pd.Timedelta(hours=HORA_CHECKIN).value
+    checkout = pd.Timedelta(hours=HORA_CHECKOUT).value
+
+    primeiro_dia = pd.Timestamp(inicio if inicio is not None else datetime.now()).normalize()
+    h0 = primeiro_dia.value + checkin
+    h1 = (primeiro_dia + pd.Timedelta(days=horizonte_dias)).value + checkout
+
+    aptos = reservas.apartamentos if apartamentos is None else sorted(set(apartamentos))
+
+    janelas = []
+    for apt in aptos:
+        inicios, maior_fim = reservas.intervalos(apt)
+
+        # Intervalos livres [g0, g1): antes de cada reserva e depois da última
+        g0 = np.maximum(np.concatenate(([h0], maior_fim)), h0)
+        g1 = np.minimum(np.concatenate((inicios, [h1])), h1)
+
+        # Regras de horário: primeiro check-in às 15h a partir de g0, último check-out às 11h até g1
+        dia_checkin = -((checkin - g0) // dia)          # ceil((g0 - 15h) / dia)
+        dia_checkout = (g1 - checkout) // dia
+        noites_livres = dia_checkout - dia_checkin
+        cabe = noites_livres >= noites
+        if max_por_apartamento:
+            cabe &= np.cumsum(cabe) <= max_por_apartamento
+        if not cabe.any():
+            continue
+
+        entradas = dia_checkin[cabe] * dia + checkin
+        janelas.append(pd.DataFrame({
+            'Apartamento': apt,
+            'Check-in': pd.to_datetime(entradas),
+            'Check-out': pd.to_datetime(entradas + noites * dia - checkin + checkout),
+            'Livre Até': pd.to_datetime(dia_checkout[cabe] * dia + checkout),
+            'Noites Livres': noites_livres[cabe],
+            'Opções de Check-in': noites_livres[cabe] - noites + 1,
+        }))
+
+    if not janelas:
+        return pd.DataFrame(columns=colunas)
+    return pd.concat(janelas, ignore_index=True).sort_values(['Check-in', 'Apartamento'], kind='stable', ignore_index=True)
+
+
 def tratar_dataframe_consolidado(df):
     """
     Realiza a limpeza, padronização de datas e regras de negócio no DataFrame de reservas.
@@ -175,78 +393,184 @@ def tratar_dataframe_consolidado(df):
     """
     if df is None or df.empty:
         return pd.DataFrame()
+
+    # 1. Remove duplicatas de colunas (o df de entrada nunca é alterado, então não precisa de cópia prévia)
+    if df.columns.has_duplicates:
+        df = df.loc[:, ~df.columns.duplicated()]
+
+    # 2. Conversão de datas (vetorizada, coluna inteira). Células vazias ou só com espaços viram NaT,
+    #    então a limpeza de linhas sem início e a de datas inválidas é um único filtro
+    inicio = parse_pt_dates(df['Início'])
+    fim = parse_pt_dates(df['Fim'])
+    validas = inicio.notna() & fim.notna()
+    inicio, fim = inicio[validas], fim[validas]
+
+    # 3. Check-in 15h / Check-out 11h só para datas puras (meia-noite exata)
+    inicio = inicio.mask(inicio == inicio.dt.normalize(), inicio + pd.Timedelta(hours=HORA_CHECKIN))
+    fim = fim.mask(fim == fim.dt.normalize(), fim + pd.Timedelta(hours=HORA_CHECKOUT))
+
+    # Filtro e datas numa única cópia nova (sem atribuir colunas numa fatia de df)
+    df_tratado = df.loc[validas].assign(Início=inicio, Fim=fim)
+
+    # 4. Atualiza Status
+    df_tratado = atualizar_status_concluido(df_tratado)
     
-    df_tratado = df.copy()
-    
-    # 1. Remove duplicatas de colunas
-    df_tratado = df_tratado.loc[:, ~df_tratado.columns.duplicated()]
-
-    # 2. Limpeza prévia de linhas vazias
-    if 'Início' in df_tratado.columns:
-        df_tratado = df_tratado.dropna(subset=['Início'])
-        # Garante que é string antes de usar .str
-        df_tratado = df_tratado[df_tratado['Início'].astype(str).str.strip() != '']
-
-    # 3. Aplica conversão de datas
-    if 'Início' in df_tratado.columns:
-        df_tratado['Início'] = df_tratado['Início'].apply(parse_pt_date)
-    if 'Fim' in df_tratado.columns:
-        df_tratado['Fim'] = df_tratado['Fim'].apply(parse_pt_date)
-
-    # 4. Remove linhas onde a data não pôde ser entendida (NaT)
-    df_tratado = df_tratado.dropna(subset=['Início', 'Fim'])
-
-    def add_default_hours(dt, hour_val):
-        # Adiciona hora apenas se for meia-noite exata (data pura)
-        if pd.notnull(dt) and dt.time() == time(0, 0):
-            return dt + timedelta(hours=hour_val)
-        return dt
-
-    # 5. Check-in 15h / Check-out 11h
-    df_tratado['Início'] = df_tratado['Início'].apply(lambda x: add_default_hours(x, 15))
-    df_tratado['Fim'] = df_tratado['Fim'].apply(lambda x: add_default_hours(x, 11))
-
-    # 6. Atualiza Status
-    agora = datetime.now()
-    if 'Status' not in df_tratado.columns:
-        df_tratado['Status'] = ''
-        
-    df_tratado.loc[df_tratado['Fim'] < agora, 'Status'] = 'Concluído'
-    
-    # 7. Garante Origem
+    # 5. Garante Origem
     if 'Origem' not in df_tratado.columns:
         df_tratado['Origem'] = 'Desconhecido'
 
     return df_tratado
 
-def consolidar_e_salvar_reservas(add_log_func):
+def atualizar_status_concluido(df, agora=None):
+    """
+    Marca como 'Concluído' as reservas cuja data final é anterior a `agora`.
+    Espera a coluna 'Fim' já convertida para datetime.
+    """
+    if agora is None:
+        agora = datetime.now()
+    if 'Status' not in df.columns:
+        df['Status'] = ''
+        
+    df.loc[df['Fim'] < agora, 'Status'] = 'Concluído'
+    return df
+
+def _datas_chave(coluna):
+    """Datas de uma coluna (datetime ou texto 'dd/mm/YYYY HH:MM') como 'YYYY-MM-DDTHH:MM'; '' se inválida."""
+    if pd.api.types.is_datetime64_any_dtype(coluna):
+        datas = coluna
+    else:
+        textos = coluna.fillna('').astype(str).str.strip()
+        datas = pd.to_datetime(textos, format='%d/%m/%Y %H:%M', errors='coerce')
+        # Outros formatos: ISO antes, para '2030-01-10' não virar 1º de outubro com dayfirst
+        for formato in ({'format': 'ISO8601'}, {'format': 'mixed', 'dayfirst': True}):
+            faltando = datas.isna() & textos.ne('')
+            if not faltando.any():
+                break
+            datas[faltando] = pd.to_datetime(textos[faltando], errors='coerce', **formato)
+    textos = np.datetime_as_string(datas.to_numpy(dtype='datetime64[m]'), unit='m')
+    return pd.Series(textos, index=coluna.index, dtype=str).replace('NaT', '')
+
+def chaves_reservas(df):
+    """
+    Chave determinística de cada reserva, independente da posição da linha:
+    'apartamento|uid:UID' quando a linha traz o UID do calendário da OTA (coluna 'UID'
+    ou 'uid', como em download_and_parse_calendar) e, nas demais,
+    'apartamento|início|fim|origem', com datas 'YYYY-MM-DDTHH:MM' e a origem em minúsculas.
+    Linhas repetidas recebem '#2', '#3'... na ordem em que aparecem.
+    """
+    if df is None or df.empty:
+        return pd.Series([], dtype=str)
+
+    def texto(nome):
+        if nome not in df.columns:
+            return pd.Series('', index=df.index, dtype=str)
+        return df[nome].fillna('').astype(str).str.strip()
+
+    apartamento = texto('Apartamento')
+    chaves = (apartamento + '|' + _datas_chave(df['Início']) + '|' + _datas_chave(df['Fim'])
+              + '|' + texto('Origem').str.casefold())
+    coluna_uid = next((c for c in ('UID', 'uid') if c in df.columns), None)
+    if coluna_uid:
+        uids = texto(coluna_uid)
+        chaves = chaves.where(uids.eq(''), apartamento + '|uid:' + uids)
+
+    ocorrencia = chaves.groupby(chaves, sort=False).cumcount()
+    return chaves.where(ocorrencia.eq(0), chaves + '#' + (ocorrencia + 1).astype(str))
+
+def semear_ids_reservas(mapa, df_planilha):
+    """
+    Incorpora ao mapa de ids (ver manifest.carregar_ids_reservas) os idReserva que já
+    estão na aba consolidada. A planilha prevalece: é o que os leitores veem e o que
+    outra máquina (app ou CLI, cada um com seu calendars/) pode ter gravado.
+    """
+    if df_planilha is None or df_planilha.empty or 'idReserva' not in df_planilha.columns \
+            or not {'Início', 'Fim'} <= set(df_planilha.columns):
+        return mapa
+
+    ids = pd.to_numeric(df_planilha['idReserva'], errors='coerce')
+    validos = ids.notna() & (ids > 0) & (ids % 1 == 0)
+    da_planilha = pd.Series(ids[validos].astype(int).to_numpy(), index=chaves_reservas(df_planilha)[validos].to_numpy())
+    # id repetido na planilha (ex: edição manual): vale a primeira linha
+    da_planilha = da_planilha[~da_planilha.duplicated()]
+    ids_planilha = {chave: int(i) for chave, i in da_planilha.items()}
+
+    usados = set(ids_planilha.values())
+    mapa['ids'] = {chave: i for chave, i in mapa['ids'].items() if i not in usados}
+    mapa['ids'].update(ids_planilha)
+    mapa['proximo_id'] = max(mapa['proximo_id'], max(mapa['ids'].values(), default=0) + 1)
+    return mapa
+
+def atribuir_ids_reservas(chaves, mapa):
+    """
+    idReserva de cada chave: o já registrado no mapa ou, para reservas novas, os próximos
+    números (ids de reservas removidas não são reutilizados). Atualiza o mapa.
+    """
+    ids = chaves.map(mapa['ids'])
+    novas = ids.isna()
+    if novas.any():
+        proximo = mapa['proximo_id']
+        novos_ids = range(proximo, proximo + int(novas.sum()))
+        mapa['ids'].update(zip(chaves[novas], novos_ids))
+        mapa['proximo_id'] = proximo + len(novos_ids)
+        ids[novas] = list(novos_ids)
+    return ids.astype(int)
+
+def consolidar_e_salvar_reservas(add_log_func, forcar=False, dfs_dict=None, df_consolidado_atual=None):
     """
     Função isolada para consolidar reservas de todos os apartamentos.
+
+    Incremental: cada aba cujo conteúdo tem o mesmo hash da última consolidação reaproveita
+    as linhas já tratadas do cache local; apenas as abas alteradas passam por
+    tratar_dataframe_consolidado. Use forcar=True para retratar todas as abas.
+    `dfs_dict` permite reaproveitar abas já lidas (ex: ler_abas_planilha_em_lote) e
+    `df_consolidado_atual`, a aba 'Reservas Consolidadas' já lida, de onde vêm os
+    idReserva existentes. idReserva é estável: a mesma reserva mantém o mesmo id.
     """
     add_log_func("--- Iniciando Consolidação de Reservas ---")
     
     # 1. Ler as abas individuais
-    dfs_dict = ler_abas_planilha(APARTMENT_SHEET_MAP)
+    if dfs_dict is None:
+        dfs_dict = ler_abas_planilha({**APARTMENT_SHEET_MAP, 'consolidada': "Reservas Consolidadas"})
+        df_consolidado_atual = dfs_dict.pop("Reservas Consolidadas", None)
     
     all_reservas = []
     total_linhas_lidas = 0
+    manifesto = carregar_manifesto()
+    cache = {} if forcar else carregar_cache_consolidacao()
+    novo_cache = {}
+    abas_processadas, abas_reaproveitadas = [], []
     
     if dfs_dict:
         for tab_name, df in dfs_dict.items():
             if df is not None and not df.empty:
-                df = df.copy()
-                
-                # Preenche coluna de origem (Apartamento)
-                # Nota: tab_name é o nome da aba (ex: SM-C108)
-                df['Apartamento'] = tab_name 
-                
-                all_reservas.append(df)
+                sha256 = hash_dataframe(df)
+                em_cache = cache.get(tab_name)
+
+                if em_cache is not None and em_cache.get('sha256') == sha256:
+                    df_tratado = em_cache['df']
+                    abas_reaproveitadas.append(tab_name)
+                else:
+                    df = df.copy()
+                    
+                    # Preenche coluna de origem (Apartamento)
+                    # Nota: tab_name é o nome da aba (ex: SM-C108)
+                    df['Apartamento'] = tab_name 
+                    
+                    # Tratamento (limpeza e padronização) apenas das abas alteradas
+                    df_tratado = tratar_dataframe_consolidado(df)
+                    abas_processadas.append(tab_name)
+
+                novo_cache[tab_name] = {'sha256': sha256, 'df': df_tratado}
+                manifesto['consolidacao'][tab_name] = {'sha256': sha256, 'linhas': len(df)}
+                all_reservas.append(df_tratado)
                 total_linhas_lidas += len(df)
                 # Log detalhado para debug (opcional)
                 # print(f"Aba {tab_name}: {len(df)} reservas encontradas.")
     else:
         add_log_func("Nenhuma aba foi lida corretamente. Verifique os nomes das abas e cabeçalhos.")
         return
+
+    add_log_func(f"Abas: {len(abas_processadas)} processadas, {len(abas_reaproveitadas)} reaproveitadas do cache.")
     
     if all_reservas:
         # 2. Concatenação (União)
@@ -256,14 +580,13 @@ def consolidar_e_salvar_reservas(add_log_func):
         qtd_final = len(df_consolidado)
         add_log_func(f"União realizada: {len(all_reservas)} abas resultando em {qtd_final} linhas totais.")
         
-        # 3. Tratamento inicial (limpeza e padronização externa)
-        # Certifique-se que esta função trata erros caso colunas essenciais faltem
-        if 'tratar_dataframe_consolidado' in globals():
-            df_consolidado = tratar_dataframe_consolidado(df_consolidado)
+        # 3. O status depende da data atual: recalcula também para as linhas vindas do cache
+        df_consolidado = atualizar_status_concluido(df_consolidado)
         
-        # 4. Adicionar/Regerar idReserva sequencial
+        # 4. idReserva estável: o id registrado para a chave da reserva, ou um novo
         df_consolidado.reset_index(drop=True, inplace=True)
-        df_consolidado['idReserva'] = df_consolidado.index + 1
+        mapa_ids = semear_ids_reservas(carregar_ids_reservas(), df_consolidado_atual)
+        df_consolidado['idReserva'] = atribuir_ids_reservas(chaves_reservas(df_consolidado), mapa_ids)
         
         # 5. Formatar Datas
         for col in ['Início', 'Fim']:
@@ -292,13 +615,103 @@ def consolidar_e_salvar_reservas(add_log_func):
         df_consolidado['Última Atualização'] = timestamp_agora.strftime('%d/%m/%Y %H:%M:%S')
 
         # 8. Salvar
-        salvar_df_no_gsheet(df_consolidado, "Reservas Consolidadas")
+        resumo_escrita = salvar_df_no_gsheet(df_consolidado, "Reservas Consolidadas")
+        if resumo_escrita:
+            add_log_func(f"Planilha ({resumo_escrita['modo']}): {resumo_escrita['linhas']} linhas, "
+                         f"{resumo_escrita['celulas']} células escritas.")
+        salvar_cache_consolidacao(novo_cache)
+        salvar_ids_reservas(mapa_ids)
+        salvar_manifesto(manifesto)
         add_log_func("✅ Sucesso: Reservas consolidadas salvas no Google Sheets.")
     else:
         add_log_func("Nenhuma reserva encontrada para consolidar (Listas vazias).")
 
 # --- 2. Função de Gráfico (Frontend Logic) ---
 
+# Cores do fundo do calendário
+COR_DOMINGO = "#E0E0E0"
+COR_SABADO = "#F5F5F5"
+COR_FERIADO = "#FFCDD2" # Vermelho claro/pastel
+
+def _montar_fundo_calendario(data_inicio, data_fim, feriados):
+    """
+    Monta o fundo do Gantt (sábados, domingos, feriados e viradas de mês) como listas
+    prontas de shapes e annotations, para serem atribuídas ao layout de uma só vez.
+
+    As datas vão como texto ('YYYY-MM-DD'), o que reduz o JSON enviado ao navegador.
+    Prioridade de cor: Feriado > Domingo > Sábado.
+
+    Args:
+        data_inicio, data_fim: Primeiro e último dia pintados (inclusive).
+        feriados (dict): date -> nome do feriado.
+
+    Returns:
+        tuple: (shapes, annotations), listas de dicts na mesma ordem do desenho dia a dia.
+    """
+    dias = pd.date_range(pd.Timestamp(data_inicio).normalize(), pd.Timestamp(data_fim).normalize(), freq='D')
+    if dias.empty:
+        return [], []
+
+    nomes_feriados = pd.Series(dias.date).map(feriados).to_numpy()
+    eh_feriado = pd.notna(nomes_feriados)
+    cores = np.select(
+        [eh_feriado, dias.weekday == 6, dias.weekday == 5],
+        [COR_FERIADO, COR_DOMINGO, COR_SABADO],
+        default=''
+    )
+    virada_mes = dias.day == 1
+
+    inicio_dia = dias.strftime('%Y-%m-%d')
+    fim_dia = (dias + pd.Timedelta(days=1)).strftime('%Y-%m-%d')
+    meio_dia = dias.strftime('%Y-%m-%d 12:00')
+    nomes_meses = dias.strftime('%b')
+
+    shapes, anotacoes = [], []
+    for i in np.flatnonzero((cores != '') | virada_mes):
+        if cores[i]:
+            # Fundo do dia
+            shapes.append(dict(type="rect", x0=inicio_dia[i], y0=0, x1=fim_dia[i], y1=1,
+                               xref="x", yref="paper", fillcolor=cores[i], layer="below", line_width=0))
+            # Se for feriado, escreve o nome na vertical
+            if eh_feriado[i]:
+                anotacoes.append(dict(
+                    x=meio_dia[i], y=0.5, xref="x", yref="paper",
+                    text=nomes_feriados[i].upper(),
+                    showarrow=False, textangle=-90, xanchor="center", yanchor="middle",
+                    font=dict(size=10, color="rgba(0, 0, 0, 0.4)")
+                ))
+        # Linha vertical separadora de meses e Nome do Mês
+        if virada_mes[i]:
+            anotacoes.append(dict(
+                x=inicio_dia[i], y=1, yref="paper", text=f"<b>{nomes_meses[i].capitalize()}</b>",
+                showarrow=False, xanchor="left", yanchor="bottom",
+                yshift=40,
+                font=dict(color="black", size=10)
+            ))
+            shapes.append(dict(type="line", x0=inicio_dia[i], y0=0, x1=inicio_dia[i], y1=1, xref="x", yref="paper",
+                               line=dict(color="black", width=1), opacity=0.3))
+
+    return shapes, anotacoes
+
+@lru_cache(maxsize=FUNDO_CALENDARIO_CACHE_MAX)
+def _camada_fundo_calendario(data_inicio, data_fim, is_mobile):
+    """
+    Camada de fundo do Gantt pronta para uso, guardada em cache LRU por
+    (data_inicio, data_fim, is_mobile): feriados, fins de semana e viradas de mês só
+    dependem do período, então mudanças de filtro, do modo mobile ou verificações de
+    disponibilidade só precisam adicionar as barras das reservas.
+
+    Retorna tuplas de go.layout.Shape e go.layout.Annotation já validados
+    (atribuí-los a uma figura cria cópias; o cache não é alterado).
+    """
+    # Feriados (date -> nome) direto do cache anual, sem passar pelo DataFrame de get_holidays
+    anos_feriados = range(data_inicio.year, data_fim.year + 2)
+    dict_feriados = {dia: nome for dia, (nome, _, _) in mapa_feriados(anos_feriados).items()}
+
+    shapes, anotacoes = _montar_fundo_calendario(data_inicio, data_fim, dict_feriados)
+    camada = go.Layout(shapes=shapes, annotations=anotacoes)
+    return tuple(camada.shapes), tuple(camada.annotations)
+
 def create_gantt_chart(df_grafico, is_mobile=False):
     """
     Gera o gráfico de Gantt (Timeline) com otimizações visuais para Mobile.
@@ -383,7 +796,7 @@ def create_gantt_chart(df_grafico, is_mobile=False):
 
     # --- Fundo e Elementos Visuais ---
     x_agora = agora.to_pydatetime()
-    fig.add_shape(
+    linha_agora = dict(
         type="line", x0=x_agora, y0=0, x1=x_agora, y1=1, 
         xref="x", yref="paper", 
         line=dict(color="red", width=2, dash="dot")
@@ -394,75 +807,10 @@ def create_gantt_chart(df_grafico, is_mobile=False):
     # 1. Definir até onde vamos pintar o fundo (180 dias ou +30 dias após última reserva)
     data_inicio_fundo = zoom_inicio
     data_fim_fundo = max(hoje + pd.Timedelta(days=180), df['Fim'].max() + pd.Timedelta(days=30))
-    dias_totais = (data_fim_fundo - data_inicio_fundo).days + 1
-    
-    # 2. Buscar feriados e mapear nomes
-    anos_feriados = list(range(data_inicio_fundo.year, data_fim_fundo.year + 2))
-    df_feriados = get_holidays(years=anos_feriados)
-    
-    # Cria um dicionário (data -> nome) para busca e exibição
-    dict_feriados = {}
-    if not df_feriados.empty and 'Data' in df_feriados.columns:
-        # A Data vem como string 'dd/mm/yyyy' do utils.py, precisamos converter para date object
-        for idx, row in df_feriados.iterrows():
-            try:
-                d_obj = datetime.strptime(row['Data'], '%d/%m/%Y').date()
-                dict_feriados[d_obj] = row['Feriado']
-            except (ValueError, TypeError):
-                pass
-
-    # 3. Cores
-    COR_DOMINGO = "#E0E0E0"
-    COR_SABADO = "#F5F5F5"
-    COR_FERIADO = "#FFCDD2" # Vermelho claro/pastel
     
-    # 4. Loop de renderização (Percorre o período estendido)
-    for i in range(dias_totais): 
-        dia = data_inicio_fundo + pd.Timedelta(days=i)
-        dia_date = dia.date()
-        
-        cor = None
-        holiday_name = None
-        
-        # Lógica de prioridade: Feriado > Domingo > Sábado
-        if dia_date in dict_feriados:
-            cor = COR_FERIADO
-            holiday_name = dict_feriados[dia_date]
-        elif dia.weekday() == 6: 
-            cor = COR_DOMINGO
-        elif dia.weekday() == 5: 
-            cor = COR_SABADO
-        
-        if cor:
-            # Desenha o fundo
-            fig.add_shape(type="rect", x0=dia, y0=0, x1=dia + pd.Timedelta(days=1), y1=1,
-                          xref="x", yref="paper", fillcolor=cor, layer="below", line_width=0)
-            
-            # Se for feriado, escreve o nome na vertical
-            if holiday_name:
-                fig.add_annotation(
-                    x=dia + pd.Timedelta(hours=12), # Centro do dia
-                    y=0.5, # Centro da altura
-                    xref="x",
-                    yref="paper",
-                    text=holiday_name.upper(), # Uppercase para ficar mais legível
-                    showarrow=False,
-                    textangle=-90, # Texto na vertical (lendo de cima para baixo)
-                    xanchor="center",
-                    yanchor="middle",
-                    font=dict(size=10, color="rgba(0, 0, 0, 0.4)") # Cinza translúcido discreto
-                )
-        
-        # Linha vertical separadora de meses e Nome do Mês
-        if dia.day == 1:
-            nome_mes = dia.strftime('%b').capitalize()
-            fig.add_annotation(
-                x=dia, y=1, yref="paper", text=f"<b>{nome_mes}</b>",
-                showarrow=False, xanchor="left", yanchor="bottom", 
-                yshift=40,
-                font=dict(color="black", size=10)
-            )
-            fig.add_shape(type="line", x0=dia, y0=0, x1=dia, y1=1, xref="x", yref="paper", line=dict(color="black", width=1), opacity=0.3)
+    # 2. Camada de fundo (feriados, fins de semana e meses) reaproveitada do cache
+    shapes_fundo, anotacoes_fundo = _camada_fundo_calendario(data_inicio_fundo.date(), data_fim_fundo.date(), is_mobile)
+    fig.update_layout(shapes=[linha_agora, *shapes_fundo], annotations=anotacoes_fundo)
 
     # --- Layout ---
     fig.update_layout(
@@ -507,8 +855,8 @@ def create_gantt_chart(df_grafico, is_mobile=False):
     
     # Adiciona nomes dos apartamentos dentro do gráfico no modo mobile
     if is_mobile:
-        for apt in ordem_apartamentos:
-            fig.add_annotation(
+        fig.update_layout(annotations=list(fig.layout.annotations) + [
+            dict(
                 x=0,
                 y=apt,
                 xref="paper",
@@ -525,5 +873,58 @@ def create_gantt_chart(df_grafico, is_mobile=False):
                 borderwidth=1,
                 borderpad=2
             )
+            for apt in ordem_apartamentos
+        ])
     
-    return fig
\ No newline at end of file
+    return fig
+
+
+def aplicar_destaque_selecao(fig_base, livres, dt_ini, dt_fim, is_mobile=False):
+    """
+    Retorna uma cópia do gráfico base com o destaque "Sua Seleção" e o zoom no período.
+
+    fig_base pode ser um go.Figure ou o dicionário de fig.to_dict(); o original não é
+    alterado, então a mesma base serve para várias verificações seguidas. A cópia é
+    feita sem revalidar o layout (shapes e anotações do fundo já foram validados ao
+    montar a base); só o traço do destaque e o novo range passam pela validação.
+    """
+    if fig_base is None:
+        return None
+
+    base = fig_base.to_dict() if isinstance(fig_base, go.Figure) else fig_base
+    fig = go.Figure(base, _validate=False)
+    if not livres:
+        return fig
+
+    duracao_ms = (dt_fim - dt_ini).total_seconds() * 1000
+
+    fig.add_trace(go.Bar(
+        name="Sua Seleção",
+        x=[duracao_ms] * len(livres),
+        y=livres,
+        base=[dt_ini] * len(livres),
+        orientation='h',
+        marker=dict(color='rgba(255, 215, 0, 0.5)', line=dict(width=1, color='gold')),
+        text=["SUA SELEÇÃO"] * len(livres),
+        textposition='inside',
+        insidetextanchor='middle',
+        textfont=dict(color='black', size=12, weight='bold'),
+        hoverinfo="text",
+        hovertext=[
+            f"<b>DISPONÍVEL: {ap}</b><br>Início: {dt_ini.strftime('%d/%m %H:%M')}<br>Fim: {dt_fim.strftime('%d/%m %H:%M')}"
+            for ap in livres
+        ]
+    ))
+
+    # --- AJUSTE DE ZOOM CONSISTENTE ---
+    # Se for mobile, usa um range menor (8 dias à frente) para manter as barras largas (zoom in)
+    # Se for desktop, usa um range maior (20 dias à frente)
+    days_fwd = 8 if is_mobile else 20
+    days_back = 2 if is_mobile else 3
+
+    fig.update_layout(
+        barmode='overlay',
+        xaxis=dict(range=[dt_ini - pd.Timedelta(days=days_back), dt_fim + pd.Timedelta(days=days_fwd)]),
+        xaxis2=dict(range=[dt_ini - pd.Timedelta(days=days_back), dt_fim + pd.Timedelta(days=days_fwd)])
+    )
+    return fig
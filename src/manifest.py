@@ -0,0 +1,94 @@
+import json
+import hashlib
+import pandas as pd
+from datetime import datetime
+from src.config import SYNC_MANIFEST_FILE, CONSOLIDACAO_CACHE_FILE, RESERVAS_IDS_FILE
+from src.arquivos import gravacao_atomica, gravar_json_atomico
+
+# Manifesto da sincronização incremental.
+# Estrutura:
+# {
+#   "atualizado_em": "dd/mm/YYYY HH:MM:SS",
+#   "apartamentos": {"c108": {"feeds": {"airbnb": sha256, ...}, "planilha": sha256, "processado_em": ...}},
+#   "consolidacao": {"SM-C108": {"sha256": ..., "linhas": 42}, ...}
+# }
+
+
+def hash_valores(linhas):
+    """
+    Retorna o sha256 de uma lista de linhas (lista de listas), como as devolvidas pelo gspread.
+    """
+    payload = json.dumps(linhas, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+def hash_dataframe(df):
+    """
+    Retorna o sha256 do cabeçalho + valores de um DataFrame ('' para DataFrame vazio).
+    """
+    if df is None or df.empty:
+        return ''
+    linhas = [[str(c) for c in df.columns]] + df.astype(str).values.tolist()
+    return hash_valores(linhas)
+
+def carregar_manifesto():
+    """
+    Lê o manifesto da última sincronização. Retorna um manifesto vazio se não existir.
+    """
+    try:
+        with open(SYNC_MANIFEST_FILE, 'r', encoding='utf-8') as f:
+            manifesto = json.load(f)
+    except (OSError, ValueError):
+        manifesto = {}
+    manifesto.setdefault('apartamentos', {})
+    manifesto.setdefault('consolidacao', {})
+    return manifesto
+
+def salvar_manifesto(manifesto):
+    manifesto['atualizado_em'] = datetime.now().strftime('%d/%m/%Y %H:%M:%S')
+    gravar_json_atomico(SYNC_MANIFEST_FILE, manifesto, ensure_ascii=False, indent=2)
+
+def apartamento_inalterado(manifesto, apt, entradas):
+    """
+    True se as entradas (hashes dos feeds e da aba) forem idênticas às da última execução.
+    """
+    anterior = manifesto.get('apartamentos', {}).get(apt)
+    if not anterior:
+        return False
+    return anterior.get('feeds') == entradas['feeds'] and anterior.get('planilha') == entradas['planilha']
+
+def registrar_apartamento(manifesto, apt, entradas):
+    manifesto['apartamentos'][apt] = {
+        'feeds': entradas['feeds'],
+        'planilha': entradas['planilha'],
+        'processado_em': datetime.now().strftime('%d/%m/%Y %H:%M:%S')
+    }
+
+def carregar_cache_consolidacao():
+    """
+    Lê o cache de linhas tratadas por aba: {aba: {'sha256': ..., 'df': DataFrame}}.
+    """
+    try:
+        return pd.read_pickle(CONSOLIDACAO_CACHE_FILE)
+    except Exception:
+        return {}
+
+def salvar_cache_consolidacao(cache):
+    with gravacao_atomica(CONSOLIDACAO_CACHE_FILE) as f:
+        pd.to_pickle(cache, f)
+
+def carregar_ids_reservas():
+    """
+    Lê o mapa de ids das reservas: {'proximo_id': int, 'ids': {chave_da_reserva: idReserva}}.
+    Retorna um mapa vazio se o arquivo não existir.
+    """
+    try:
+        with open(RESERVAS_IDS_FILE, 'r', encoding='utf-8') as f:
+            mapa = json.load(f)
+    except (OSError, ValueError):
+        mapa = {}
+    mapa.setdefault('proximo_id', 1)
+    mapa.setdefault('ids', {})
+    return mapa
+
+def salvar_ids_reservas(mapa):
+    gravar_json_atomico(RESERVAS_IDS_FILE, mapa, ensure_ascii=False)
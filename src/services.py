@@ -1,23 +1,93 @@
 import streamlit as st
 import pandas as pd
+from dataclasses import dataclass, field
+from datetime import datetime
 from src.config import OTA_URLS, APARTMENT_SHEET_MAP, CALENDARS_DIR
-from src.data_loader import baixar_calendario_ota, atualizar_summaries_ical, save_dataframe_to_ical
-from src.gsheets_api import baixar_dados_google_sheet, inserir_linha_google_sheet
-from src.logic import merge_ical_files, verificar_inconsistencias, consolidar_e_salvar_reservas
-from src.utils import get_holidays
+from src.data_loader import baixar_calendarios_otas, save_dataframe_to_ical, hash_feed_ics
+from src.gsheets_api import ler_abas_planilha_em_lote, ler_valores_abas_em_lote, abas_como_dataframes, reservas_da_aba, AcumuladorLinhas, obter_metricas_requisicoes, baixar_tabela_consolidada, selecionar_colunas_reservas, proximos_hospedes_da_tabela, ultimas_reservas_da_tabela
+from src.logic import merge_ical_files, verificar_inconsistencias, consolidar_e_salvar_reservas, tratar_dataframe_consolidado, IndiceDisponibilidade
+from src.utils import get_holidays, obter_metricas_cache_datas
+from src.manifest import carregar_manifesto, salvar_manifesto, apartamento_inalterado, registrar_apartamento, hash_dataframe
+from src.arquivos import bloqueio_apartamento
 import os
 
 
 
 
-def sincronizar_dados_completo():
+@dataclass
+class SnapshotConsolidado:
+    """
+    Retrato da aba 'Reservas Consolidadas', baixado uma única vez e compartilhado
+    por todos os painéis do app.
+
+    bruto: a aba como está na planilha (todas as colunas, em texto).
+    reservas: tabela tratada (datas convertidas) usada no gráfico e na disponibilidade.
+    versao: hash do conteúdo bruto, muda sempre que a planilha muda.
+    indice: IndiceDisponibilidade das reservas, montado junto com o snapshot
+    (e guardado no mesmo cache).
+    """
+    bruto: pd.DataFrame
+    reservas: pd.DataFrame
+    versao: str = ''
+    carregado_em: datetime = field(default_factory=datetime.now)
+    indice: IndiceDisponibilidade = None
+
+    def __post_init__(self):
+        if self.indice is None:
+            self.indice = IndiceDisponibilidade(self.reservas)
+
+    def proximos_hospedes(self):
+        """Próximo hóspede de cada apartamento (calculado em memória)."""
+        return proximos_hospedes_da_tabela(self.bruto)
+
+    def ultimas_reservas(self):
+        """3 reservas mais recentes de cada apartamento (calculado em memória)."""
+        return ultimas_reservas_da_tabela(self.bruto)
+
+def carregar_snapshot_consolidado(tab_name="Reservas Consolidadas"):
+    """
+    Baixa a aba consolidada com uma única chamada ao Sheets e monta o SnapshotConsolidado.
+    Se a aba estiver vazia ou mal formatada, reconstrói as reservas a partir das abas individuais.
+    """
+    df_bruto = baixar_tabela_consolidada(tab_name)
+    df = selecionar_colunas_reservas(df_bruto, tab_name) if not df_bruto.empty else pd.DataFrame()
+
+    # Se estiver vazia ou mal formatada, tenta reconstruir das abas individuais
+    if df.empty or len(df.columns) < 3:
+        dfs = ler_abas_planilha_em_lote(APARTMENT_SHEET_MAP, abas_extras=())
+        all_reservas = []
+        for apt, df_apt in dfs.items():
+            if df_apt is not None and not df_apt.empty:
+                df_apt['Apartamento'] = apt
+                all_reservas.append(df_apt)
+        df = pd.concat(all_reservas, ignore_index=True) if all_reservas else pd.DataFrame()
+
+    return SnapshotConsolidado(
+        bruto=df_bruto,
+        reservas=tratar_dataframe_consolidado(df),
+        versao=hash_dataframe(df_bruto if not df_bruto.empty else df)
+    )
+
+def _hash_feed_local(filename):
+    """hash_feed_ics do .ics já salvo em CALENDARS_DIR ('' se não existir)."""
+    try:
+        with open(os.path.join(CALENDARS_DIR, filename), 'rb') as f:
+            return hash_feed_ics(f.read())
+    except OSError:
+        return ''
+
+def sincronizar_dados_completo(forcar=False):
     """
     Executa todo o pipeline de sincronização:
-    1. Baixa calendários OTAs.
+    1. Baixa calendários OTAs (em paralelo).
     2. Baixa dados do Google Sheets e converte para ICS.
     3. Mescla calendários.
     4. Verifica inconsistências e reporta.
     5. Consolida todas as reservas em uma aba mestre.
+
+    A sincronização é incremental: um apartamento cujos feeds e aba da planilha têm
+    os mesmos hashes registrados no manifesto da última execução é pulado por completo.
+    Use forcar=True para reprocessar tudo.
     """
     log = []
     
@@ -25,63 +95,116 @@ def sincronizar_dados_completo():
         log.append(msg)
         print(msg) # Para debug no terminal
 
-    add_log("Iniciando sincronização...")
+    add_log("Iniciando sincronização..." + (" (completa forçada)" if forcar else ""))
     
     # Garante diretório
     if not os.path.exists(CALENDARS_DIR):
         os.makedirs(CALENDARS_DIR)
 
-    # 1. Processar cada apartamento
+    manifesto = carregar_manifesto()
+    metricas_sheets_inicio = obter_metricas_requisicoes()
+    processados, pulados = [], []
+    # Inconsistências de todos os apartamentos, gravadas de uma vez no fim do loop
+    pendencias = AcumuladorLinhas()
+
+    # 1. Baixar todos os calendários das OTAs em paralelo
+    add_log("--- Baixando calendários das OTAs ---")
+    resultados_download = baixar_calendarios_otas(OTA_URLS)
+    for resultado in resultados_download.values():
+        add_log(f"  {resultado}")
+
+    # Todas as abas dos apartamentos (e a consolidada) em uma única leitura.
+    # A consolidação usa as abas inteiras; o .ics de cada apartamento, só as colunas de reservas
+    valores_planilha = ler_valores_abas_em_lote(APARTMENT_SHEET_MAP)
+    dfs_planilha = abas_como_dataframes(valores_planilha)
+    add_log(f"--- Google Sheets: {len(dfs_planilha)} abas lidas em lote ---")
+
+    # 2. Processar cada apartamento
     for apt, urls in OTA_URLS.items():
         add_log(f"--- Processando {apt} ---")
         
-        # A. Baixar OTAs
+        # A. OTAs baixadas (o SUMMARY é padronizado na leitura, em ler_calendario_ics)
+        hashes_feeds = {}
         for ota, url in urls.items():
-            if url:
-                filename = f"{apt}_{ota}.ics"
-                if baixar_calendario_ota(url, filename):
-                    atualizar_summaries_ical(filename)
-                    add_log(f"  {ota} baixado.")
-                else:
-                    add_log(f"  Erro ao baixar {ota}.")
+            resultado = resultados_download.get((apt, ota))
+            if resultado is None:
+                continue
+            if resultado.alterado:
+                add_log(f"  {ota} baixado.")
+            elif resultado.sucesso:
+                add_log(f"  {ota} sem alterações (cache local).")
+            else:
+                add_log(f"  Erro ao baixar {ota} ({resultado.status}).")
+            # Hash sem o DTSTAMP (hash_feed_ics), que a OTA regera a cada download: feed com as
+            # mesmas reservas não força o reprocessamento. Em caso de erro, o do .ics local
+            # (o da última execução)
+            hashes_feeds[ota] = resultado.sha256 or _hash_feed_local(resultado.arquivo)
         
         # B. Baixar Google Sheet do Apartamento
         tab_name = APARTMENT_SHEET_MAP.get(apt)
-        if tab_name:
-            df_gs = baixar_dados_google_sheet(tab_name)
-            if not df_gs.empty:
-                filename_gs = f"{apt}_google.ics"
-                save_dataframe_to_ical(df_gs, filename_gs)
-                add_log(f"  Google Sheet ({tab_name}) baixado e convertido.")
-            else:
-                add_log(f"  Google Sheet ({tab_name}) vazio ou erro.")
-        
-        # C. Mesclar
+        df_gs = reservas_da_aba(valores_planilha[tab_name], tab_name) if tab_name in valores_planilha else pd.DataFrame()
+        entradas = {'feeds': hashes_feeds, 'planilha': hash_dataframe(df_gs)}
+
         # Ajuste de caminhos para usar os.path.join para compatibilidade
         file_airbnb = os.path.join(CALENDARS_DIR, f"{apt}_airbnb.ics")
         file_booking = os.path.join(CALENDARS_DIR, f"{apt}_booking.ics")
         file_google = os.path.join(CALENDARS_DIR, f"{apt}_google.ics")
         file_merged = os.path.join(CALENDARS_DIR, f"{apt}_merged.ics")
+
+        if not forcar and apartamento_inalterado(manifesto, apt, entradas) and os.path.exists(file_merged):
+            add_log("  Entradas idênticas à última sincronização: apartamento pulado.")
+            pulados.append(apt)
+            continue
+
+        # Arquivos do apartamento gravados sob trava: outra sincronização (app ou CLI)
+        # do mesmo apartamento espera esta terminar; apartamentos diferentes não se bloqueiam
+        with bloqueio_apartamento(apt, CALENDARS_DIR):
+            if tab_name:
+                if not df_gs.empty:
+                    filename_gs = f"{apt}_google.ics"
+                    save_dataframe_to_ical(df_gs, filename_gs)
+                    add_log(f"  Google Sheet ({tab_name}) baixado e convertido.")
+                else:
+                    add_log(f"  Google Sheet ({tab_name}) vazio ou erro.")
         
-        # Merge Final (OTA + Google)
-        # Verifica se pelo menos os arquivos básicos existem
-        if os.path.exists(file_airbnb) and os.path.exists(file_google):
-            # Nota: merge_ical_files deve ser capaz de lidar com a lógica de merge
-            df_final = merge_ical_files(file_airbnb, file_google, file_merged)
-            add_log(f"  Calendários mesclados em {file_merged}.")
+            # C. Mesclar
+            # Merge Final (OTA + Google)
+            # Verifica se pelo menos os arquivos básicos existem
+            if os.path.exists(file_airbnb) and os.path.exists(file_google):
+                # Nota: merge_ical_files deve ser capaz de lidar com a lógica de merge
+                df_final = merge_ical_files(file_airbnb, file_google, file_merged)
+                add_log(f"  Calendários mesclados em {file_merged}.")
             
-            # D. Verificar Inconsistências
-            df_incons = verificar_inconsistencias(df_final)
-            if not df_incons.empty:
-                add_log(f"  {len(df_incons)} inconsistências encontradas!")
-                # Salvar na planilha de inconsistências
-                for _, row in df_incons.iterrows():
-                    inserir_linha_google_sheet(row.tolist(), "Inconsistências")
-            else:
-                add_log("  Nenhuma inconsistência encontrada.")
+                # D. Verificar Inconsistências
+                df_incons = verificar_inconsistencias(df_final)
+                if not df_incons.empty:
+                    add_log(f"  {len(df_incons)} inconsistências encontradas!")
+                    # Salvar na planilha de inconsistências (ver pendencias.gravar)
+                    pendencias.adicionar_varias(df_incons.values.tolist(), "Inconsistências")
+                else:
+                    add_log("  Nenhuma inconsistência encontrada.")
+
+        registrar_apartamento(manifesto, apt, entradas)
+        processados.append(apt)
+
+    salvar_manifesto(manifesto)
+    for tab_name, qtd in pendencias.gravar().items():
+        add_log(f"{qtd} linhas gravadas em '{tab_name}' (uma requisição).")
+    add_log(f"Apartamentos: {len(processados)} processados, {len(pulados)} pulados"
+            + (f" ({', '.join(pulados)})." if pulados else "."))
                 
-    # 2. Consolidar Tudo (Chamada da Nova Função)
-    consolidar_e_salvar_reservas(add_log)
+    # 3. Consolidar Tudo (Chamada da Nova Função)
+    dfs_apartamentos = {tab: df for tab, df in dfs_planilha.items() if tab in APARTMENT_SHEET_MAP.values()}
+    consolidar_e_salvar_reservas(add_log, forcar=forcar, dfs_dict=dfs_apartamentos,
+                                 df_consolidado_atual=dfs_planilha.get("Reservas Consolidadas"))
+
+    metricas_datas = obter_metricas_cache_datas()
+    add_log(f"Cache de datas: {metricas_datas['acertos']} acertos, {metricas_datas['falhas']} falhas, "
+            f"{metricas_datas['tamanho']}/{metricas_datas['capacidade']} textos.")
+    metricas_sheets = {chave: valor - metricas_sheets_inicio[chave] for chave, valor in obter_metricas_requisicoes().items()}
+    add_log(f"Google Sheets: {metricas_sheets['requisicoes']} requisições "
+            f"({metricas_sheets['leituras']} leituras, {metricas_sheets['escritas']} escritas), "
+            f"{metricas_sheets['novas_tentativas']} novas tentativas, "
+            f"{(metricas_sheets['espera_cota_ms'] + metricas_sheets['espera_novas_tentativas_ms']) / 1000:.1f} s de espera.")
         
     return log
-
@@ -65,7 +65,7 @@ def render_custom_css():
     </style>
     """, unsafe_allow_html=True)
 
-def render_sidebar(last_sync_date, on_sync_click, on_mobile_mode_change=None):
+def render_sidebar(last_sync_date, on_sync_click, on_mobile_mode_change=None, manifesto=None):
     """
     Renders the sidebar with controls and sync status.
     
@@ -73,6 +73,7 @@ def render_sidebar(last_sync_date, on_sync_click, on_mobile_mode_change=None):
         last_sync_date (datetime or str): The timestamp of the last synchronization.
         on_sync_click (callable): Function to be called when sync button is clicked.
         on_mobile_mode_change (callable): Function to be called when mobile mode is toggled.
+        manifesto (dict): Sync manifest (hashes of the inputs of each apartment) to display.
     """
     with st.sidebar:
         st.title("Controles")
@@ -82,6 +83,8 @@ def render_sidebar(last_sync_date, on_sync_click, on_mobile_mode_change=None):
         
         if st.button("🔄 Sincronizar Dados Agora"):
             on_sync_click()
+
+        st.checkbox("Forçar sincronização completa", value=False, key="forcar_sync_completa", help="Reprocessa todos os apartamentos, mesmo os que não mudaram desde a última sincronização")
         
         # --- Exibir Última Sincronização ---
         if last_sync_date:
@@ -123,6 +126,10 @@ def render_sidebar(last_sync_date, on_sync_click, on_mobile_mode_change=None):
             </div>
             """, unsafe_allow_html=True)
         
+        if manifesto and manifesto.get('apartamentos'):
+            with st.expander("🧾 Manifesto da Sincronização"):
+                st.json(manifesto, expanded=False)
+        
         st.divider()
         st.info("Painel de controle do sistema.")
 
@@ -190,4 +197,49 @@ def render_gantt_chart():
     if st.session_state.get('gantt_fig'):
         # Atualizado para corrigir aviso de depreciação do Streamlit (2025)
         # De use_container_width=True para width="stretch"
-        st.plotly_chart(st.session_state.gantt_fig, width="stretch")
\ No newline at end of file
+        st.plotly_chart(st.session_state.gantt_fig, width="stretch")
+
+def render_free_windows(on_search_click):
+    """
+    Renders the free-window search panel (next available stays per apartment).
+
+    Args:
+        on_search_click (callable): Callback when the search button is clicked.
+            Results are read from st.session_state.janelas_livres.
+    """
+    st.markdown("### 🗓️ Janelas Livres")
+
+    c1, c2, c3, c4, c5 = st.columns([1, 1, 1, 1, 1])
+    with c1:
+        st.number_input("Noites", min_value=1, max_value=60, value=2, step=1, key="janelas_noites")
+    with c2:
+        st.date_input("A partir de", value=datetime.now().date(), key="janelas_inicio", format="DD/MM/YYYY")
+    with c3:
+        st.number_input("Horizonte (dias)", min_value=1, max_value=365, value=60, step=1, key="janelas_horizonte")
+    with c4:
+        st.number_input("Máx. por Apto", min_value=1, max_value=20, value=3, step=1, key="janelas_max")
+    with c5:
+        st.write("")
+        st.write("")
+        st.button("Buscar Janelas", on_click=on_search_click)
+
+    df_janelas = st.session_state.get('janelas_livres')
+    if df_janelas is None:
+        return
+    if df_janelas.empty:
+        st.warning("Nenhuma janela livre encontrada para essa duração no período.")
+        return
+
+    st.dataframe(
+        df_janelas,
+        hide_index=True,
+        width="stretch",
+        column_config={
+            "Apartamento": st.column_config.TextColumn("Apto"),
+            "Check-in": st.column_config.DatetimeColumn("Check-in", format="DD/MM/YYYY HH:mm"),
+            "Check-out": st.column_config.DatetimeColumn("Check-out", format="DD/MM/YYYY HH:mm"),
+            "Livre Até": st.column_config.DatetimeColumn("Livre Até", format="DD/MM/YYYY HH:mm", help="Último check-out possível na janela"),
+            "Noites Livres": st.column_config.NumberColumn("Noites Livres"),
+            "Opções de Check-in": st.column_config.NumberColumn("Opções", help="Quantos dias de chegada diferentes cabem na janela"),
+        }
+    )
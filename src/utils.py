@@ -1,7 +1,34 @@
+import json
+import threading
+from collections import OrderedDict
+import numpy as np
 import pandas as pd
 import holidays
 from datetime import date, timedelta, datetime
 from dateutil.easter import easter
+from src.config import PARSE_DATAS_CACHE_MAX, FERIADOS_CACHE_FILE
+from src.arquivos import gravar_json_atomico
+
+# Cache de feriados por ano, calculado uma vez por processo:
+# {ano: {date: (nome, abrangência, feriadão)}}
+_feriados_lock = threading.Lock()
+_feriados_por_ano = {}
+
+DIAS_SEMANA_PT = {
+    0: "Segunda-feira",
+    1: "Terça-feira",
+    2: "Quarta-feira",
+    3: "Quinta-feira",
+    4: "Sexta-feira",
+    5: "Sábado",
+    6: "Domingo"
+}
+
+MESES_PT = {
+    1: "Janeiro", 2: "Fevereiro", 3: "Março", 4: "Abril",
+    5: "Maio", 6: "Junho", 7: "Julho", 8: "Agosto",
+    9: "Setembro", 10: "Outubro", 11: "Novembro", 12: "Dezembro"
+}
 
 def get_holidays(years=[2025, 2026]):
     """
@@ -11,164 +38,211 @@ def get_holidays(years=[2025, 2026]):
     Colunas: "Feriado", "Data", "Dia da Semana", "Mês", "Abrangência", "Feriadão"
     Abrangência: "Brasil", "Pernambuco", "Recife"
     Feriadão: "Sim" para Carnaval, Semana Santa e feriados em Seg/Sex.
+    Derivado de feriados_do_ano (calculado uma vez por ano e processo).
     """
     if isinstance(years, int):
         years = [years]
         
     all_holidays_list = []
+    for year in years:
+        for feriado_date, (name, scope, is_feriadao) in feriados_do_ano(year).items():
+            all_holidays_list.append({
+                "Feriado": name,
+                "Data": feriado_date.strftime("%d/%m/%Y"),
+                "Dia da Semana": DIAS_SEMANA_PT[feriado_date.weekday()],
+                "Mês": MESES_PT[feriado_date.month],
+                "Abrangência": scope,
+                "Feriadão": is_feriadao
+            })
+        
+    return pd.DataFrame(all_holidays_list)
+
+def feriados_do_ano(year):
+    """
+    Retorna {date: (nome, abrangência, feriadão)} do ano, em ordem de data.
+    Calculado uma única vez por processo; na primeira vez, tenta ler o arquivo local
+    FERIADOS_CACHE_FILE (evita recalcular com a biblioteca holidays a cada início a frio).
+    O dicionário devolvido é compartilhado: não altere.
+    """
+    with _feriados_lock:
+        if year in _feriados_por_ano:
+            return _feriados_por_ano[year]
+
+        persistidos = _ler_feriados_persistidos()
+        if str(year) in persistidos:
+            feriados = {date.fromisoformat(d): (nome, escopo, feriadao) for d, nome, escopo, feriadao in persistidos[str(year)]}
+        else:
+            feriados = _calcular_feriados_ano(year)
+            persistidos[str(year)] = [[d.isoformat(), *info] for d, info in feriados.items()]
+            _salvar_feriados_persistidos(persistidos)
+
+        _feriados_por_ano[year] = feriados
+        return feriados
+
+def mapa_feriados(years):
+    """
+    Junta os feriados dos anos pedidos em um único dicionário {date: (nome, abrangência, feriadão)}.
+    """
+    mapa = {}
+    for year in years:
+        mapa.update(feriados_do_ano(year))
+    return mapa
+
+def limpar_cache_feriados():
+    """Esvazia o cache em memória (o arquivo local não é apagado)."""
+    with _feriados_lock:
+        _feriados_por_ano.clear()
+
+def _ler_feriados_persistidos():
+    """
+    Lê o arquivo de feriados. Ignora o arquivo se for de outra versão da biblioteca holidays.
+    Formato: {"versao_holidays": ..., "anos": {"2026": [["2026-01-01", nome, abrangência, feriadão], ...]}}
+    """
+    try:
+        with open(FERIADOS_CACHE_FILE, 'r', encoding='utf-8') as f:
+            conteudo = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if conteudo.get('versao_holidays') != holidays.__version__:
+        return {}
+    return conteudo.get('anos', {})
+
+def _salvar_feriados_persistidos(anos):
+    try:
+        gravar_json_atomico(FERIADOS_CACHE_FILE, {'versao_holidays': holidays.__version__, 'anos': anos}, ensure_ascii=False)
+    except OSError as e:
+        print(f"Aviso: não foi possível salvar o cache de feriados: {e}")
+
+def _calcular_feriados_ano(year):
+    """
+    Calcula os feriados de um ano (nacionais, de Pernambuco, do Recife e datas móveis).
+    Retorna {date: (nome, abrangência, feriadão)} em ordem de data.
+    """
+    feriados = {}
+
+    # 1. Feriados Nacionais (Brasil)
+    br_holidays = holidays.Brazil(years=year)
     
-    dia_semana_map = {
-        0: "Segunda-feira",
-        1: "Terça-feira",
-        2: "Quarta-feira",
-        3: "Quinta-feira",
-        4: "Sexta-feira",
-        5: "Sábado",
-        6: "Domingo"
-    }
+    # 2. Feriados Estaduais (Pernambuco)
+    pe_holidays = holidays.Brazil(subdiv='PE', years=year)
     
-    mes_map = {
-        1: "Janeiro", 2: "Fevereiro", 3: "Março", 4: "Abril",
-        5: "Maio", 6: "Junho", 7: "Julho", 8: "Agosto",
-        9: "Setembro", 10: "Outubro", 11: "Novembro", 12: "Dezembro"
-    }
+    # 3. Feriados Municipais (Recife) e Outros Manuais
+    manual_holidays = {}
+    
+    # Recife Fixos
+    manual_holidays[date(year, 3, 12)] = ("Aniversário do Recife", "Recife")
+    manual_holidays[date(year, 6, 24)] = ("São João", "Recife")
+    manual_holidays[date(year, 7, 16)] = ("Nossa Senhora do Carmo", "Recife")
+    manual_holidays[date(year, 12, 8)] = ("Nossa Senhora da Conceição", "Recife")
+    
+    # Data Magna (Garantir 6 de Março)
+    manual_holidays[date(year, 3, 6)] = ("Data Magna de Pernambuco", "Pernambuco")
+    
+    # Outros Feriados/Datas Comemorativas Solicitadas
+    manual_holidays[date(year, 8, 11)] = ("Criação dos Cursos Jurídicos", "Brasil") 
+    manual_holidays[date(year, 10, 15)] = ("Dia dos Professores", "Brasil")
+    manual_holidays[date(year, 10, 28)] = ("Dia do Servidor Público", "Brasil")
+    
+    # Dia do Comerciário (3ª segunda-feira de outubro)
+    oct_1 = date(year, 10, 1)
+    first_monday_offset = (7 - oct_1.weekday()) % 7
+    first_monday = oct_1 + timedelta(days=first_monday_offset)
+    third_monday = first_monday + timedelta(weeks=2)
+    manual_holidays[third_monday] = ("Dia do Comerciário", "Recife")
 
-    for year in years:
-        # 1. Feriados Nacionais (Brasil)
-        br_holidays = holidays.Brazil(years=year)
-        
-        # 2. Feriados Estaduais (Pernambuco)
-        pe_holidays = holidays.Brazil(subdiv='PE', years=year)
-        
-        # 3. Feriados Municipais (Recife) e Outros Manuais
-        manual_holidays = {}
-        
-        # Recife Fixos
-        manual_holidays[date(year, 3, 12)] = ("Aniversário do Recife", "Recife")
-        manual_holidays[date(year, 6, 24)] = ("São João", "Recife")
-        manual_holidays[date(year, 7, 16)] = ("Nossa Senhora do Carmo", "Recife")
-        manual_holidays[date(year, 12, 8)] = ("Nossa Senhora da Conceição", "Recife")
-        
-        # Data Magna (Garantir 6 de Março)
-        manual_holidays[date(year, 3, 6)] = ("Data Magna de Pernambuco", "Pernambuco")
-        
-        # Outros Feriados/Datas Comemorativas Solicitadas
-        manual_holidays[date(year, 8, 11)] = ("Criação dos Cursos Jurídicos", "Brasil") 
-        manual_holidays[date(year, 10, 15)] = ("Dia dos Professores", "Brasil")
-        manual_holidays[date(year, 10, 28)] = ("Dia do Servidor Público", "Brasil")
-        
-        # Dia do Comerciário (3ª segunda-feira de outubro)
-        oct_1 = date(year, 10, 1)
-        first_monday_offset = (7 - oct_1.weekday()) % 7
-        first_monday = oct_1 + timedelta(days=first_monday_offset)
-        third_monday = first_monday + timedelta(weeks=2)
-        manual_holidays[third_monday] = ("Dia do Comerciário", "Recife")
-
-        # Datas Móveis (Baseadas na Páscoa)
-        easter_date = easter(year)
-        
-        # Carnaval e Semana Santa
-        # Sábado de Zé Pereira (Carnaval) = Páscoa - 50 dias
-        carnaval_sat = easter_date - timedelta(days=50)
-        manual_holidays[carnaval_sat] = ("Sábado de Carnaval", "Brasil")
-        
-        # Domingo de Carnaval = Páscoa - 49 dias
-        carnaval_sun = easter_date - timedelta(days=49)
-        manual_holidays[carnaval_sun] = ("Domingo de Carnaval", "Brasil")
+    # Datas Móveis (Baseadas na Páscoa)
+    easter_date = easter(year)
+    
+    # Carnaval e Semana Santa
+    # Sábado de Zé Pereira (Carnaval) = Páscoa - 50 dias
+    carnaval_sat = easter_date - timedelta(days=50)
+    manual_holidays[carnaval_sat] = ("Sábado de Carnaval", "Brasil")
+    
+    # Domingo de Carnaval = Páscoa - 49 dias
+    carnaval_sun = easter_date - timedelta(days=49)
+    manual_holidays[carnaval_sun] = ("Domingo de Carnaval", "Brasil")
 
-        # Segunda de Carnaval = Páscoa - 48 dias
-        carnaval_mon = easter_date - timedelta(days=48)
-        manual_holidays[carnaval_mon] = ("Segunda-feira de Carnaval", "Brasil") 
-        
-        # Terça de Carnaval = Páscoa - 47 dias
-        carnaval_tue = easter_date - timedelta(days=47)
-        manual_holidays[carnaval_tue] = ("Terça-feira de Carnaval", "Brasil")
-        
-        # Quarta-feira de Cinzas = Páscoa - 46 dias
-        cinzas = easter_date - timedelta(days=46)
-        manual_holidays[cinzas] = ("Quarta-feira de Cinzas", "Brasil")
-        
-        # Quinta-feira Santa = Páscoa - 3 dias
-        quinta_santa = easter_date - timedelta(days=3)
-        manual_holidays[quinta_santa] = ("Quinta-feira Santa", "Recife")
-        
-        # Domingo de Páscoa
-        manual_holidays[easter_date] = ("Domingo de Páscoa", "Brasil")
-        
-        # Corpus Christi (60 dias após a Páscoa)
-        corpus_christi = easter_date + timedelta(days=60)
-        manual_holidays[corpus_christi] = ("Corpus Christi", "Recife")
-        
-        # Definir períodos de feriadão fixos (Carnaval e Semana Santa)
-        carnaval_dates = {carnaval_sat, carnaval_sun, carnaval_mon, carnaval_tue, cinzas}
-        
-        # Semana Santa: Quinta até Domingo (Sexta já é feriado, Domingo é Páscoa)
-        sexta_santa = easter_date - timedelta(days=2)
-        semana_santa_dates = {quinta_santa, sexta_santa, easter_date}
-        
-        # Unir todas as datas
-        all_dates = set(br_holidays.keys()) | set(pe_holidays.keys()) | set(manual_holidays.keys())
-        
-        sorted_dates = sorted(list(all_dates))
+    # Segunda de Carnaval = Páscoa - 48 dias
+    carnaval_mon = easter_date - timedelta(days=48)
+    manual_holidays[carnaval_mon] = ("Segunda-feira de Carnaval", "Brasil") 
+    
+    # Terça de Carnaval = Páscoa - 47 dias
+    carnaval_tue = easter_date - timedelta(days=47)
+    manual_holidays[carnaval_tue] = ("Terça-feira de Carnaval", "Brasil")
+    
+    # Quarta-feira de Cinzas = Páscoa - 46 dias
+    cinzas = easter_date - timedelta(days=46)
+    manual_holidays[cinzas] = ("Quarta-feira de Cinzas", "Brasil")
+    
+    # Quinta-feira Santa = Páscoa - 3 dias
+    quinta_santa = easter_date - timedelta(days=3)
+    manual_holidays[quinta_santa] = ("Quinta-feira Santa", "Recife")
+    
+    # Domingo de Páscoa
+    manual_holidays[easter_date] = ("Domingo de Páscoa", "Brasil")
+    
+    # Corpus Christi (60 dias após a Páscoa)
+    corpus_christi = easter_date + timedelta(days=60)
+    manual_holidays[corpus_christi] = ("Corpus Christi", "Recife")
+    
+    # Definir períodos de feriadão fixos (Carnaval e Semana Santa)
+    carnaval_dates = {carnaval_sat, carnaval_sun, carnaval_mon, carnaval_tue, cinzas}
+    
+    # Semana Santa: Quinta até Domingo (Sexta já é feriado, Domingo é Páscoa)
+    sexta_santa = easter_date - timedelta(days=2)
+    semana_santa_dates = {quinta_santa, sexta_santa, easter_date}
+    
+    # Unir todas as datas
+    all_dates = set(br_holidays.keys()) | set(pe_holidays.keys()) | set(manual_holidays.keys())
+    
+    sorted_dates = sorted(list(all_dates))
+    
+    for feriado_date in sorted_dates:
+        name = ""
+        scope = ""
         
-        for feriado_date in sorted_dates:
-            name = ""
-            scope = ""
+        # Verificar manuais primeiro para garantir override
+        if feriado_date in manual_holidays:
+            name, scope = manual_holidays[feriado_date]
+        else:
+            is_national = feriado_date in br_holidays
+            is_state = feriado_date in pe_holidays and not is_national
             
-            # Verificar manuais primeiro para garantir override
-            if feriado_date in manual_holidays:
-                name, scope = manual_holidays[feriado_date]
+            if is_national:
+                scope = "Brasil"
+                name = br_holidays.get(feriado_date)
+            elif is_state:
+                scope = "Pernambuco"
+                name = pe_holidays.get(feriado_date)
             else:
-                is_national = feriado_date in br_holidays
-                is_state = feriado_date in pe_holidays and not is_national
-                
-                if is_national:
-                    scope = "Brasil"
-                    name = br_holidays.get(feriado_date)
-                elif is_state:
-                    scope = "Pernambuco"
-                    name = pe_holidays.get(feriado_date)
-                else:
-                    continue
-            
-            # Filtrar "Revolução Pernambucana" se não for 6 de março (Data Magna)
-            if name == "Revolução Pernambucana" and feriado_date != date(year, 3, 6):
                 continue
-                
-            # Filtrar "Carnaval" genérico da lib holidays se já temos os específicos
-            if name == "Carnaval" and feriado_date in manual_holidays:
-                 pass
-            
-            # Filtrar "Quarta-feira de Cinzas" genérico se já temos
-            if name == "Quarta-feira de Cinzas" and feriado_date in manual_holidays:
-                 pass
-
-            # Lógica de Feriadão
-            is_feriadao = "Não"
-            weekday = feriado_date.weekday()
+        
+        # Filtrar "Revolução Pernambucana" se não for 6 de março (Data Magna)
+        if name == "Revolução Pernambucana" and feriado_date != date(year, 3, 6):
+            continue
             
-            # Carnaval ou Semana Santa
-            if feriado_date in carnaval_dates or feriado_date in semana_santa_dates:
-                is_feriadao = "Sim"
-            # Segunda (0) ou Sexta (4)
-            elif weekday == 0 or weekday == 4:
-                is_feriadao = "Sim"
-
-            all_holidays_list.append({
-                "Feriado": name,
-                "Data": feriado_date.strftime("%d/%m/%Y"),
-                "Dia da Semana": dia_semana_map[weekday],
-                "Mês": mes_map[feriado_date.month],
-                "Abrangência": scope,
-                "Feriadão": is_feriadao,
-                "_date_obj": feriado_date
-            })
+        # Filtrar "Carnaval" genérico da lib holidays se já temos os específicos
+        if name == "Carnaval" and feriado_date in manual_holidays:
+             pass
         
-    df = pd.DataFrame(all_holidays_list)
-    if "_date_obj" in df.columns:
-        df = df.drop(columns=["_date_obj"])
+        # Filtrar "Quarta-feira de Cinzas" genérico se já temos
+        if name == "Quarta-feira de Cinzas" and feriado_date in manual_holidays:
+             pass
+
+        # Lógica de Feriadão
+        is_feriadao = "Não"
+        weekday = feriado_date.weekday()
         
-    return df
+        # Carnaval ou Semana Santa
+        if feriado_date in carnaval_dates or feriado_date in semana_santa_dates:
+            is_feriadao = "Sim"
+        # Segunda (0) ou Sexta (4)
+        elif weekday == 0 or weekday == 4:
+            is_feriadao = "Sim"
+
+        feriados[feriado_date] = (name, scope, is_feriadao)
+
+    return feriados
 
 def parse_pt_date(date_str):
     """
@@ -235,6 +309,165 @@ def parse_pt_date(date_str):
     except Exception:
         return pd.NaT
 
+_MESES_PT = {
+    'jan': '01', 'fev': '02', 'mar': '03', 'abr': '04',
+    'mai': '05', 'jun': '06', 'jul': '07', 'ago': '08',
+    'set': '09', 'out': '10', 'nov': '11', 'dez': '12'
+}
+
+# Formatos mais comuns nas planilhas, já sem o sufixo de dia da semana e em minúsculas:
+# '8-dez.23' / '8-dez.2023', '10/01/2030' e '08/12/2023 15:00' (aba consolidada)
+_RE_DATA_PLANILHA = (
+    r'^(?:(?P<dia>\d{1,2})-(?P<mes>' + '|'.join(_MESES_PT) + r')\.(?P<ano>\d{2}|\d{4})'
+    r'|(?P<data>\d{1,2}/\d{1,2}/\d{4})(?P<hora> \d{1,2}:\d{2})?)$'
+)
+
+# Cache LRU texto -> datetime64[us], compartilhado por todas as sessões do processo.
+# As mesmas datas se repetem muito (check-out de uma reserva = check-in da seguinte)
+# e as mesmas células são relidas a cada sincronização e a cada carga do app.
+_cache_datas_lock = threading.Lock()
+_cache_datas = OrderedDict()
+
+METRICAS_CACHE_DATAS = {
+    'acertos': 0,
+    'falhas': 0,
+}
+
+def parse_pt_dates(datas):
+    """
+    Versão vetorizada de parse_pt_date para uma coluna inteira.
+    Cada texto distinto é procurado no cache de datas; os que faltam são convertidos
+    em bloco (ver _converter_datas_em_bloco) e guardados no cache.
+
+    Args:
+        datas: Series (ou lista) com as células de data da planilha.
+
+    Returns:
+        pd.Series: datetime64 com o mesmo índice e os mesmos valores de .apply(parse_pt_date).
+    """
+    if not isinstance(datas, pd.Series):
+        datas = pd.Series(datas, dtype=object)
+
+    valores = datas.to_numpy(dtype=object)
+    convertidas = np.full(len(valores), np.datetime64('NaT'), dtype='datetime64[us]')
+    eh_texto = np.fromiter((isinstance(v, str) for v in valores), dtype=bool, count=len(valores))
+    if not eh_texto.any():
+        return pd.Series(convertidas, index=datas.index)
+
+    codigos, unicos = pd.factorize(valores[eh_texto])
+    convertidos_unicos = _datas_com_cache(np.asarray(unicos, dtype=object))
+    if convertidos_unicos is None:
+        # Fora do que cabe em datetime64[us] sem perdas: mantém o comportamento do .apply
+        return datas.apply(parse_pt_date)
+
+    convertidas[eh_texto] = convertidos_unicos[codigos]
+    return pd.Series(convertidas, index=datas.index)
+
+def _datas_com_cache(textos):
+    """
+    Converte textos distintos consultando o cache LRU; só as falhas são convertidas.
+    Retorna um array datetime64[us] alinhado a `textos`, ou None (ver _converter_datas_em_bloco).
+    """
+    convertidos = np.full(len(textos), np.datetime64('NaT'), dtype='datetime64[us]')
+    faltantes = []
+    with _cache_datas_lock:
+        for i, texto in enumerate(textos):
+            data = _cache_datas.get(texto)
+            if data is None:
+                faltantes.append(i)
+            else:
+                _cache_datas.move_to_end(texto)
+                convertidos[i] = data
+        METRICAS_CACHE_DATAS['acertos'] += len(textos) - len(faltantes)
+        METRICAS_CACHE_DATAS['falhas'] += len(faltantes)
+
+    if not faltantes:
+        return convertidos
+
+    novos = _converter_datas_em_bloco(textos[faltantes])
+    if novos is None:
+        return None
+    convertidos[faltantes] = novos
+
+    with _cache_datas_lock:
+        for texto, data in zip(textos[faltantes], novos):
+            _cache_datas[texto] = data
+            _cache_datas.move_to_end(texto)
+        while len(_cache_datas) > PARSE_DATAS_CACHE_MAX:
+            _cache_datas.popitem(last=False)
+    return convertidos
+
+def obter_metricas_cache_datas():
+    """Retorna acertos, falhas e ocupação do cache de datas (contados por texto distinto)."""
+    with _cache_datas_lock:
+        metricas = dict(METRICAS_CACHE_DATAS)
+        metricas['tamanho'] = len(_cache_datas)
+    metricas['capacidade'] = PARSE_DATAS_CACHE_MAX
+    return metricas
+
+def limpar_cache_datas():
+    """Esvazia o cache de datas e zera os contadores."""
+    with _cache_datas_lock:
+        _cache_datas.clear()
+        METRICAS_CACHE_DATAS.update(acertos=0, falhas=0)
+
+def _converter_datas_em_bloco(textos):
+    """
+    Converte um array de textos com a semântica de parse_pt_date.
+    Remove os sufixos de dia da semana e identifica os formatos comuns com uma única
+    passada de regex, convertendo cada formato em bloco com pd.to_datetime. Apenas o que
+    sobra (formatos raros ou inválidos) é convertido linha a linha por parse_pt_date.
+    Retorna None se alguma data não couber em datetime64[us] (fuso horário ou nanossegundos).
+    """
+    convertidas = np.full(len(textos), np.datetime64('NaT'), dtype='datetime64[us]')
+
+    # Mesma limpeza de parse_pt_date: ponto final e sufixo '-qui' / '.qui'
+    texto = pd.Series(textos, dtype=object).str.strip()
+    tamanho = texto.str.len()
+    texto = texto.where(~((tamanho > 4) & texto.str.endswith('.')), texto.str[:-1])
+    tamanho = texto.str.len()
+    texto = texto.where(~((tamanho > 4) & texto.str[-4].isin(['-', '.'])), texto.str[:-4])
+    texto = texto.str.lower()
+
+    partes = texto.str.extract(_RE_DATA_PLANILHA)
+    eh_pt = partes['mes'].notna()
+    eh_barra = partes['data'].notna()
+    # '8-dez.23': monta a data a partir dos componentes (ano com 2 dígitos segue a regra do %y)
+    pt = partes[eh_pt]
+    ano = pt['ano'].astype(int)
+    ano = ano.where(pt['ano'].str.len() == 4, ano + np.where(ano < 69, 2000, 1900))
+    componentes = pd.DataFrame({
+        'year': ano,
+        'month': pt['mes'].map(_MESES_PT).astype(int),
+        'day': pt['dia'].astype(int),
+    })
+
+    grupos = [
+        (componentes, None),
+        (texto[eh_barra & partes['hora'].isna()], '%d/%m/%Y'),
+        (texto[eh_barra & partes['hora'].notna()], '%d/%m/%Y %H:%M'),
+    ]
+    resolvido = (texto == '').to_numpy().copy()
+    for trecho, formato in grupos:
+        if trecho.empty:
+            continue
+        em_bloco = pd.to_datetime(trecho, format=formato, errors='coerce').to_numpy(dtype='datetime64[us]')
+        ok = ~np.isnat(em_bloco)
+        linhas = trecho.index.to_numpy()[ok]
+        convertidas[linhas] = em_bloco[ok]
+        resolvido[linhas] = True
+
+    # Sobras: conversão linha a linha, com a mesma semântica de parse_pt_date
+    for linha in np.flatnonzero(~resolvido):
+        data = parse_pt_date(textos[linha])
+        if pd.isna(data):
+            continue
+        if data.tzinfo is not None or data.nanosecond:
+            return None
+        convertidas[linha] = data.to_datetime64()
+
+    return convertidas
+
 '''# --- TESTE ---
 datas_teste = [
     "27-dez.24-sex.",
@@ -0,0 +1,77 @@
+"""
+Benchmark: rerun do botão Verificar regerando o Gantt a cada clique (create_gantt_chart +
+destaque na figura) vs. gráfico base em cache na sessão com o destaque aplicado sobre uma
+cópia (aplicar_destaque_selecao). Inclui o to_dict() feito pelo st.plotly_chart.
+
+Uso: python tests/benchmark_destaque.py [reservas] [cliques]
+"""
+import sys
+import os
+import time
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+import plotly.graph_objects as go
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src import utils
+from src.logic import create_gantt_chart, aplicar_destaque_selecao, _camada_fundo_calendario
+from test_gantt import destaque_na_figura, _reservas_futuras
+
+
+def medir(func, repeticoes):
+    inicio = time.perf_counter()
+    for i in range(repeticoes):
+        func(i)
+    return (time.perf_counter() - inicio) / repeticoes
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    cliques = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    df = _reservas_futuras(n)
+    apts = sorted(df['Apartamento'].unique())
+    hoje = pd.Timestamp('today').normalize()
+
+    def periodo(i):
+        dt_ini = hoje + pd.Timedelta(days=i, hours=15)
+        return apts[: 1 + i % len(apts)], dt_ini, dt_ini + pd.Timedelta(days=3, hours=-4)
+
+    # Camada de fundo já aquecida nos dois casos: a diferença medida é só a do rerun
+    _camada_fundo_calendario.cache_clear()
+    create_gantt_chart(df, is_mobile=False)
+
+    def antes(i):
+        livres, dt_ini, dt_fim = periodo(i)
+        fig = create_gantt_chart(df, is_mobile=False)
+        destaque_na_figura(fig, livres, dt_ini, dt_fim, False).to_dict()
+
+    inicio = time.perf_counter()
+    base = create_gantt_chart(df, is_mobile=False).to_dict()
+    t_base = time.perf_counter() - inicio
+
+    def depois(i):
+        livres, dt_ini, dt_fim = periodo(i)
+        aplicar_destaque_selecao(base, livres, dt_ini, dt_fim, is_mobile=False).to_dict()
+
+    def copia_validada(i):
+        go.Figure(base)
+
+    t_antes = medir(antes, cliques)
+    t_depois = medir(depois, cliques)
+    t_copia = medir(copia_validada, cliques)
+
+    print(f"Reservas: {len(df)} | apartamentos: {len(apts)} | shapes: {len(base['layout']['shapes'])} | cliques: {cliques}")
+    print(f"Regerando o gráfico a cada clique: {t_antes * 1000:8.1f} ms/clique")
+    print(f"Base em cache + destaque na cópia: {t_depois * 1000:8.1f} ms/clique ({t_antes / t_depois:.0f}x)")
+    print(f"Montagem da base (1º clique):      {t_base * 1000:8.1f} ms")
+    print(f"(cópia revalidando com go.Figure:  {t_copia * 1000:8.1f} ms)")
+
+
+if __name__ == '__main__':
+    # Cache de feriados numa pasta temporária, fora do calendars/ do repositório
+    with tempfile.TemporaryDirectory() as pasta:
+        utils.FERIADOS_CACHE_FILE = Path(pasta) / 'feriados_cache.json'
+        main()
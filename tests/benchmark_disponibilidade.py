@@ -0,0 +1,45 @@
+"""
+Benchmark: 10 mil consultas de disponibilidade com verificar_disponibilidade (cópia e
+varredura do DataFrame a cada consulta) vs. IndiceDisponibilidade (busca binária),
+consulta a consulta e em lote.
+
+Uso: python tests/benchmark_disponibilidade.py [consultas] [reservas]
+"""
+import sys
+import os
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.logic import IndiceDisponibilidade, verificar_disponibilidade
+from test_indice_disponibilidade import gerar_reservas, gerar_periodos
+
+
+def medir(func, *args):
+    inicio = time.perf_counter()
+    resultado = func(*args)
+    return resultado, time.perf_counter() - inicio
+
+
+def main():
+    n_consultas = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    n_reservas = int(sys.argv[2]) if len(sys.argv) > 2 else 2_000
+    df = gerar_reservas(n_reservas)
+    periodos = gerar_periodos(n_consultas)
+    print(f"{n_consultas} consultas sobre {n_reservas} reservas")
+
+    original, t_original = medir(lambda: [verificar_disponibilidade(df, t0, t1) for t0, t1 in periodos])
+    indice, t_montagem = medir(IndiceDisponibilidade, df)
+    individual, t_individual = medir(lambda: [indice.consultar(t0, t1) for t0, t1 in periodos])
+    lote, t_lote = medir(indice.consultar_lote, periodos)
+
+    assert original == individual == lote
+    print(f"  verificar_disponibilidade : {t_original:8.3f} s")
+    print(f"  Montagem do índice        : {t_montagem:8.3f} s")
+    print(f"  Índice, uma a uma         : {t_individual:8.3f} s  ({t_original / t_individual:.0f}x)")
+    print(f"  Índice, em lote           : {t_lote:8.3f} s  ({t_original / t_lote:.0f}x)")
+    print("  Resultados idênticos.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""
+Benchmark: fundo do Gantt desenhado dia a dia (add_shape/add_annotation por chamada) vs.
+camada pré-calculada atribuída ao layout de uma vez (_montar_fundo_calendario).
+Mede o tempo de montagem do fundo, o tempo total de create_gantt_chart (com a camada de
+fundo fora e dentro do cache) e o tamanho do JSON da figura.
+
+Uso: python tests/benchmark_gantt.py [dias_de_reservas]
+"""
+import sys
+import os
+import time
+import tempfile
+from pathlib import Path
+
+import pandas as pd
+import plotly.graph_objects as go
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src import utils
+from src.logic import create_gantt_chart, _montar_fundo_calendario, _camada_fundo_calendario
+from src.utils import mapa_feriados
+from test_gantt import fundo_por_chamada
+from test_indice_disponibilidade import gerar_reservas
+
+
+def medir(func, *args, **kwargs):
+    inicio = time.perf_counter()
+    resultado = func(*args, **kwargs)
+    return resultado, time.perf_counter() - inicio
+
+
+def main():
+    dias = int(sys.argv[1]) if len(sys.argv) > 1 else 365
+    hoje = pd.Timestamp('today').normalize()
+    df = gerar_reservas(max(dias // 2, 10))
+    deslocamento = hoje - pd.Timestamp('2026-01-01')
+    df['Início'] += deslocamento
+    df['Fim'] += deslocamento
+    df['Origem'] = 'Airbnb'
+
+    _camada_fundo_calendario.cache_clear()
+    fig, t_total = medir(create_gantt_chart, df, is_mobile=False)
+    _, t_cache = medir(create_gantt_chart, df, is_mobile=False)
+
+    inicio = hoje - pd.Timedelta(days=2)
+    fim = max(hoje + pd.Timedelta(days=180), df['Fim'].max() + pd.Timedelta(days=30))
+    anos = list(range(inicio.year, fim.year + 2))
+    feriados = {dia: nome for dia, (nome, _, _) in mapa_feriados(anos).items()}
+    base = go.Figure(fig)
+    base.layout.shapes = base.layout.shapes[:1]
+    base.layout.annotations = []
+
+    antes = go.Figure(base)
+    _, t_antes = medir(fundo_por_chamada, antes, inicio, fim, feriados)
+
+    def montar_em_lote(figura):
+        shapes, anotacoes = _montar_fundo_calendario(inicio, fim, feriados)
+        figura.update_layout(shapes=list(figura.layout.shapes) + shapes, annotations=anotacoes)
+    depois = go.Figure(base)
+    _, t_depois = medir(montar_em_lote, depois)
+
+    tam_antes, tam_depois = len(antes.to_json()), len(depois.to_json())
+    print(f"Fundo de {(fim - inicio).days + 1} dias, {len(depois.layout.shapes)} shapes, {len(depois.layout.annotations)} anotações")
+    print(f"  Fundo dia a dia (add_shape)  : {t_antes:8.3f} s")
+    print(f"  Fundo em lote                : {t_depois:8.3f} s  ({t_antes / t_depois:.0f}x)")
+    print(f"  create_gantt_chart (total)   : {t_total:8.3f} s  (antes: ~{t_total - t_depois + t_antes:.3f} s)")
+    print(f"  create_gantt_chart (cache)   : {t_cache:8.3f} s  (fundo reaproveitado)")
+    print(f"  JSON da figura               : {tam_antes / 1024:8.1f} KB -> {tam_depois / 1024:.1f} KB")
+
+
+if __name__ == '__main__':
+    # Cache de feriados numa pasta temporária, fora do calendars/ do repositório
+    with tempfile.TemporaryDirectory() as pasta:
+        utils.FERIADOS_CACHE_FILE = Path(pasta) / 'feriados_cache.json'
+        main()
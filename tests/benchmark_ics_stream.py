@@ -0,0 +1,66 @@
+"""
+Benchmark: leitura de .ics com a árvore completa do icalendar (Calendar.from_ical + walk)
+vs. leitor em fluxo (src.ics_stream). Mede tempo e pico de memória (tracemalloc) nos
+arquivos de calendars/ e em um calendário sintético.
+
+Uso: python tests/benchmark_ics_stream.py [eventos_sinteticos]
+"""
+import sys
+import os
+import glob
+import tempfile
+import time
+import tracemalloc
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.ics_stream import ler_eventos_ics, _eventos_via_icalendar
+from test_ics_stream import gerar_ics, CALENDARIOS
+
+
+def via_icalendar(caminho):
+    with open(caminho, 'rb') as f:
+        return _eventos_via_icalendar(f.read())
+
+
+def medir(func, caminho):
+    # Tempo e memória em execuções separadas: o tracemalloc deixa a leitura ~10x mais lenta
+    inicio = time.perf_counter()
+    resultado = func(caminho)
+    duracao = time.perf_counter() - inicio
+    tracemalloc.start()
+    func(caminho)
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return resultado, duracao, pico
+
+
+def comparar(rotulo, caminhos):
+    t_antes = t_depois = 0.0
+    pico_antes = pico_depois = 0
+    eventos = 0
+    for caminho in caminhos:
+        antes, t, pico = medir(via_icalendar, caminho)
+        t_antes, pico_antes = t_antes + t, max(pico_antes, pico)
+        depois, t, pico = medir(ler_eventos_ics, caminho)
+        t_depois, pico_depois = t_depois + t, max(pico_depois, pico)
+        assert antes == depois, caminho
+        eventos += len(depois)
+    print(f"{rotulo}: {eventos} eventos")
+    print(f"  icalendar:    {t_antes:7.3f} s | pico {pico_antes / 2**20:7.1f} MiB")
+    print(f"  em fluxo:     {t_depois:7.3f} s | pico {pico_depois / 2**20:7.1f} MiB ({t_antes / t_depois:.0f}x mais rápido)")
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    comparar(f"calendars/ ({len(CALENDARIOS)} arquivos)", CALENDARIOS)
+
+    with tempfile.TemporaryDirectory() as pasta:
+        caminho = os.path.join(pasta, 'sintetico.ics')
+        with open(caminho, 'wb') as f:
+            f.write(gerar_ics(n))
+        comparar(f"Sintético ({os.path.getsize(caminho) / 2**20:.1f} MiB)", [caminho])
+
+
+if __name__ == '__main__':
+    main()
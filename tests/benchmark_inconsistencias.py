@@ -0,0 +1,43 @@
+"""
+Benchmark: verificação de sobreposições par a par (iloc em laço duplo) vs. varredura
+com busca binária de verificar_inconsistencias, em 50 mil eventos sintéticos.
+
+Uso: python tests/benchmark_inconsistencias.py [quantidade]
+"""
+import sys
+import os
+import time
+
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.logic import verificar_inconsistencias
+from test_inconsistencias import gerar_eventos, verificar_inconsistencias_par_a_par
+
+
+def medir(func, *args, **kwargs):
+    inicio = time.perf_counter()
+    resultado = func(*args, **kwargs)
+    return resultado, time.perf_counter() - inicio
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    eventos = gerar_eventos(n)
+    print(f"{n} eventos sintéticos")
+
+    par_a_par, t_original = medir(verificar_inconsistencias_par_a_par, eventos)
+    varredura, t_varredura = medir(verificar_inconsistencias, eventos)
+    agrupado, t_agrupado = medir(verificar_inconsistencias, eventos, coluna_grupo='Apartamento')
+
+    colunas = ['Reserva 1', 'Reserva 2', 'Conflito']
+    pd.testing.assert_frame_equal(varredura[colunas], par_a_par[colunas])
+    print(f"  Par a par (iloc)          : {t_original:8.3f} s  ({len(par_a_par)} conflitos)")
+    print(f"  Varredura                 : {t_varredura:8.3f} s  ({t_original / t_varredura:.0f}x)")
+    print(f"  Varredura por apartamento : {t_agrupado:8.3f} s  ({len(agrupado)} conflitos)")
+    print("  Pares idênticos.")
+
+
+if __name__ == '__main__':
+    main()
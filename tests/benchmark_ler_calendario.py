@@ -0,0 +1,45 @@
+"""
+Benchmark: ler_calendario_ics por evento (icalendar + dict por evento + DataFrame da lista)
+vs. colunar (leitor em fluxo + datas convertidas em bloco + Summary categórico).
+
+Uso: python tests/benchmark_ler_calendario.py [eventos_sinteticos]
+"""
+import sys
+import os
+import tempfile
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.logic import ler_calendario_ics
+from test_ics_stream import gerar_ics, CALENDARIOS
+from test_ler_calendario import ler_calendario_por_evento
+
+
+def medir(func, caminhos):
+    inicio = time.perf_counter()
+    linhas = sum(len(func(caminho)) for caminho in caminhos)
+    return linhas, time.perf_counter() - inicio
+
+
+def comparar(rotulo, caminhos):
+    linhas, t_antes = medir(ler_calendario_por_evento, caminhos)
+    _, t_depois = medir(lambda caminho: ler_calendario_ics(caminho, aplicar_regras=False), caminhos)
+    print(f"{rotulo}: {linhas} eventos")
+    print(f"  por evento: {t_antes:7.3f} s")
+    print(f"  colunar:    {t_depois:7.3f} s ({t_antes / t_depois:.0f}x mais rápido)")
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    comparar(f"calendars/ ({len(CALENDARIOS)} arquivos)", CALENDARIOS)
+
+    with tempfile.TemporaryDirectory() as pasta:
+        caminho = os.path.join(pasta, 'sintetico.ics')
+        with open(caminho, 'wb') as f:
+            f.write(gerar_ics(n))
+        comparar("Sintético", [caminho])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+"""
+Benchmark por feed: padronização do SUMMARY reescrevendo o .ics após o download
+(Calendar.from_ical + to_ical + nova gravação) e depois lendo-o, vs. regras aplicadas
+direto na leitura colunar (ler_calendario_ics), sem tocar no arquivo.
+
+Uso: python tests/benchmark_regras_summary.py [repeticoes]
+"""
+import sys
+import os
+import tempfile
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.logic import ler_calendario_ics
+from test_ics_stream import gerar_ics
+from test_regras_summary import atualizar_summaries_reescrevendo
+
+
+def medir(func, repeticoes):
+    inicio = time.perf_counter()
+    for _ in range(repeticoes):
+        func()
+    return (time.perf_counter() - inicio) / repeticoes
+
+
+def main():
+    repeticoes = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    with tempfile.TemporaryDirectory() as pasta:
+        # Tamanhos típicos dos feeds (Airbnb/Booking têm dezenas de eventos) e um feed grande
+        for eventos in (20, 200, 2000):
+            conteudo = gerar_ics(eventos)
+            caminho = os.path.join(pasta, f'feed_{eventos}.ics')
+
+            def antes():
+                with open(caminho, 'wb') as f:
+                    f.write(conteudo)
+                atualizar_summaries_reescrevendo(caminho)
+                ler_calendario_ics(caminho, aplicar_regras=False)
+
+            def depois():
+                with open(caminho, 'wb') as f:
+                    f.write(conteudo)
+                ler_calendario_ics(caminho)
+
+            t_antes = medir(antes, repeticoes)
+            t_depois = medir(depois, repeticoes)
+            print(f"Feed com {eventos:5d} eventos: reescrevendo {t_antes * 1000:8.1f} ms | "
+                  f"na leitura {t_depois * 1000:7.1f} ms | economia {(t_antes - t_depois) * 1000:8.1f} ms/feed")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,45 @@
+"""
+Benchmark: save_dataframe_to_ical com um icalendar.Event por reserva + cal.to_ical()
+vs. gravação vetorizada (linhas montadas por coluna e gravadas em blocos).
+Mede um DataFrame vindo da planilha (datas em texto) e um vindo do merge (datetime64).
+
+Uso: python tests/benchmark_salvar_ical.py [linhas]
+"""
+import sys
+import os
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src import data_loader
+from src.logic import ler_calendario_ics
+from test_salvar_ical import salvar_ical_por_evento, gerar_reservas_planilha
+
+
+def medir(func, *args):
+    inicio = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - inicio
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    with tempfile.TemporaryDirectory() as pasta:
+        data_loader.CALENDARS_DIR = Path(pasta)
+        planilha = gerar_reservas_planilha(n)
+        data_loader.save_dataframe_to_ical(planilha, 'base.ics')
+        merge = ler_calendario_ics(Path(pasta) / 'base.ics')
+
+        for rotulo, df in (("Planilha (datas em texto)", planilha), ("Merge (datetime64)", merge)):
+            t_antes = medir(salvar_ical_por_evento, df, Path(pasta) / 'antes.ics')
+            t_depois = medir(data_loader.save_dataframe_to_ical, df, 'depois.ics')
+            tamanho = (Path(pasta) / 'depois.ics').stat().st_size
+            print(f"{rotulo}: {len(df)} linhas, {tamanho / 2**20:.1f} MiB")
+            print(f"  um Event por reserva: {t_antes:7.3f} s")
+            print(f"  vetorizado:           {t_depois:7.3f} s ({t_antes / t_depois:.0f}x mais rápido)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+"""
+Benchmark: tratar_dataframe_consolidado anterior (cópias, astype(str) e .apply por linha para os
+horários padrão) vs. a versão com máscaras vetorizadas, com o cache de datas vazio e já preenchido.
+Gera 100 mil linhas sintéticas no formato das abas e confere que os resultados são idênticos.
+
+Uso: python tests/benchmark_tratar_consolidado.py [quantidade]
+"""
+import sys
+import os
+import time
+import warnings
+
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.logic import tratar_dataframe_consolidado
+from src.utils import limpar_cache_datas
+from test_tratar_consolidado import tratar_linha_a_linha, gerar_abas_concatenadas
+
+
+def medir(func, *args, frio=False):
+    if frio:
+        limpar_cache_datas()
+    inicio = time.perf_counter()
+    resultado = func(*args)
+    return resultado, time.perf_counter() - inicio
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    df = gerar_abas_concatenadas(n)
+    print(f"{n} linhas sintéticas")
+
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        anterior_frio, t_anterior_frio = medir(tratar_linha_a_linha, df, frio=True)
+        anterior, t_anterior = medir(tratar_linha_a_linha, df)
+        vetorizado_frio, t_frio = medir(tratar_dataframe_consolidado, df, frio=True)
+        vetorizado, t_quente = medir(tratar_dataframe_consolidado, df)
+
+    pd.testing.assert_frame_equal(vetorizado_frio, anterior_frio)
+    pd.testing.assert_frame_equal(vetorizado, anterior)
+    print(f"  {len(vetorizado)} reservas válidas")
+    print(f"  Anterior   (cache vazio)  : {t_anterior_frio:8.3f} s")
+    print(f"  Vetorizado (cache vazio)  : {t_frio:8.3f} s  ({t_anterior_frio / t_frio:.1f}x)")
+    print(f"  Anterior   (cache quente) : {t_anterior:8.3f} s")
+    print(f"  Vetorizado (cache quente) : {t_quente:8.3f} s  ({t_anterior / t_quente:.1f}x)")
+    print("  Resultados idênticos.")
+
+
+if __name__ == '__main__':
+    main()
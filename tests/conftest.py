@@ -0,0 +1,28 @@
+import sys
+import os
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src import gsheets_api, arquivos, utils
+
+
+@pytest.fixture(autouse=True)
+def agendador_isolado(monkeypatch):
+    # Cota de requisições própria de cada teste: os dublês do gspread fazem centenas de
+    # chamadas na suíte, que esgotariam a cota por minuto do agendador do processo
+    monkeypatch.setattr(gsheets_api, 'agendador', gsheets_api.AgendadorRequisicoes())
+
+
+@pytest.fixture(autouse=True)
+def travas_temporarias(tmp_path, monkeypatch):
+    # Travas de apartamento sem pasta explícita (sinccronizacao.py) vão para LOCKS_DIR:
+    # nos testes, uma pasta temporária em vez de calendars/locks do repositório
+    monkeypatch.setattr(arquivos, 'LOCKS_DIR', tmp_path / 'locks')
+
+
+@pytest.fixture(autouse=True)
+def cache_feriados_temporario(tmp_path, monkeypatch):
+    # create_gantt_chart -> mapa_feriados grava o cache de feriados em disco
+    monkeypatch.setattr(utils, 'FERIADOS_CACHE_FILE', tmp_path / 'feriados_cache.json')
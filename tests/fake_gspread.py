@@ -0,0 +1,160 @@
+"""
+Dublês do gspread para os testes: guardam os valores das abas em memória e contam
+as requisições que seriam feitas à API do Google Sheets (e as células escritas).
+"""
+import json
+from datetime import datetime, timedelta, timezone
+
+import gspread
+import requests
+from gspread.utils import a1_range_to_grid_range, fill_gaps
+
+
+def _agora_utc():
+    # Mesmo formato do google-auth: UTC sem fuso
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def erro_api(status, retry_after=None):
+    """APIError do gspread com o corpo de erro que a API do Google devolve."""
+    resposta = requests.Response()
+    resposta.status_code = status
+    if retry_after is not None:
+        resposta.headers['Retry-After'] = str(retry_after)
+    resposta._content = json.dumps({'error': {
+        'code': status,
+        'message': 'Quota exceeded for quota metric' if status == 429 else 'Erro',
+        'status': 'RESOURCE_EXHAUSTED' if status == 429 else 'UNAVAILABLE',
+    }}).encode()
+    return gspread.exceptions.APIError(resposta)
+
+
+class FakeCredentials:
+    def __init__(self, expira_em=timedelta(hours=1)):
+        self.token = 'token'
+        self.expiry = _agora_utc() + expira_em
+        self.renovacoes = 0
+
+    def refresh(self, request):
+        self.renovacoes += 1
+        self.expiry = _agora_utc() + timedelta(hours=1)
+
+
+class FakeHTTPClient:
+    def __init__(self, auth):
+        self.auth = auth
+
+
+class FakeWorksheet:
+    def __init__(self, planilha, title):
+        self.planilha = planilha
+        self.title = title
+
+    @property
+    def valores(self):
+        return self.planilha.abas[self.title]
+
+    def get_all_values(self, value_render_option=None):
+        self.planilha.registrar_requisicao()
+        return fill_gaps(self.valores)
+
+    def append_row(self, linha, **kwargs):
+        self.planilha.registrar_requisicao()
+        self.valores.append(list(linha))
+
+    def append_rows(self, linhas, **kwargs):
+        self.planilha.registrar_requisicao()
+        self.valores.extend(list(linha) for linha in linhas)
+
+    @property
+    def row_count(self):
+        return self.planilha.grades.get(self.title, max(len(self.valores), 1000))
+
+    def _escrever(self, intervalo, linhas):
+        grade = a1_range_to_grid_range(intervalo)
+        linha0, coluna0 = grade.get('startRowIndex', 0), grade.get('startColumnIndex', 0)
+        if linha0 + len(linhas) > self.row_count:
+            # Como a API: escrever além da grade é erro
+            raise ValueError(f"Range ({intervalo}) exceeds grid limits")
+        for i, linha in enumerate(linhas):
+            while len(self.valores) <= linha0 + i:
+                self.valores.append([])
+            destino = self.valores[linha0 + i]
+            destino.extend([''] * (coluna0 + len(linha) - len(destino)))
+            destino[coluna0:coluna0 + len(linha)] = list(linha)
+            self.planilha.celulas_escritas += len(linha)
+
+    def update(self, values=None, range_name=None, **kwargs):
+        self.planilha.registrar_requisicao()
+        self._escrever(range_name or 'A1', values)
+
+    def batch_update(self, data, **kwargs):
+        self.planilha.registrar_requisicao()
+        for intervalo in data:
+            self._escrever(intervalo['range'], intervalo['values'])
+
+    def clear(self):
+        self.planilha.registrar_requisicao()
+        self.valores.clear()
+
+    def resize(self, rows=None, cols=None):
+        self.planilha.registrar_requisicao()
+        if rows is not None:
+            del self.valores[rows:]
+            self.planilha.grades[self.title] = rows
+        if cols is not None:
+            for linha in self.valores:
+                del linha[cols:]
+
+    def columns_auto_resize(self, inicio, fim):
+        self.planilha.registrar_requisicao()
+
+
+class FakeSpreadsheet:
+    def __init__(self, abas):
+        self.abas = abas
+        self.requisicoes = 0
+        self.celulas_escritas = 0
+        self.grades = {}  # linhas da grade por aba (padrão: 1000 ou o tamanho dos valores)
+        self.falhas_429 = 0  # próximas requisições que respondem 429
+        self.falhas = []     # erros (APIError) das próximas requisições, em ordem
+
+    def registrar_requisicao(self):
+        self.requisicoes += 1
+        if self.falhas:
+            raise self.falhas.pop(0)
+        if self.falhas_429:
+            self.falhas_429 -= 1
+            raise erro_api(429)
+
+    def worksheet(self, title):
+        self.registrar_requisicao()
+        if title not in self.abas:
+            raise gspread.WorksheetNotFound(title)
+        return FakeWorksheet(self, title)
+
+    def add_worksheet(self, title, rows=100, cols=26):
+        self.registrar_requisicao()
+        self.abas[title] = []
+        return FakeWorksheet(self, title)
+
+    def values_batch_get(self, ranges, params=None):
+        self.registrar_requisicao()
+        value_ranges = []
+        for intervalo in ranges:
+            title = intervalo[1:-1].replace("''", "'")
+            if title not in self.abas:
+                raise Exception(f"Unable to parse range: {intervalo}")
+            value_ranges.append({'range': f"{intervalo}!A1:Z1000", 'values': self.abas[title]})
+        return {'spreadsheetId': 'fake', 'valueRanges': value_ranges}
+
+
+class FakeClient:
+    def __init__(self, abas, creds=None):
+        self.planilha = FakeSpreadsheet(abas)
+        self.http_client = FakeHTTPClient(creds or FakeCredentials())
+        self.aberturas = 0
+
+    def open_by_key(self, key):
+        self.aberturas += 1
+        return self.planilha
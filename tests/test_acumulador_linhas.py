@@ -0,0 +1,84 @@
+import sys
+import os
+from datetime import datetime
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src import gsheets_api
+from fake_gspread import FakeClient
+import sinccronizacao
+
+
+@pytest.fixture
+def planilha(monkeypatch):
+    gsheets_api.invalidar_conexao()
+    gc = FakeClient({'Inconsistências': [], 'SM-C108': [], 'SM-D014': []})
+    monkeypatch.setattr(gsheets_api, 'authenticate_google_sheets', lambda: gc)
+    esperas = []
+    # Sem variação aleatória: esperas exatas de SHEETS_ESPERA_INICIAL, 2x, 4x...
+    monkeypatch.setattr(gsheets_api, 'agendador', gsheets_api.AgendadorRequisicoes(dormir=esperas.append, aleatorio=lambda: 1.0))
+    gc.planilha.esperas = esperas
+    yield gc.planilha
+    gsheets_api.invalidar_conexao()
+
+
+def _conflitos(n):
+    return [[f"Reserva {i}", f"Reserva {i + 1}", 'Sim', '2030-01-01 10:00:00'] for i in range(n)]
+
+
+def test_uma_requisicao_por_aba(planilha):
+    pendencias = gsheets_api.AcumuladorLinhas()
+    pendencias.adicionar_varias(_conflitos(30), "Inconsistências")
+    pendencias.adicionar(['x'], 'SM-C108')
+    assert pendencias.pendentes == {"Inconsistências": 30, 'SM-C108': 1}
+
+    gravadas = pendencias.gravar()
+
+    assert gravadas == {"Inconsistências": 30, 'SM-C108': 1}
+    # Abertura de cada aba + um append_rows por aba (antes: 31 append_row)
+    assert planilha.requisicoes == 4
+    assert planilha.abas["Inconsistências"] == _conflitos(30)
+    assert pendencias.pendentes == {}
+    assert pendencias.gravar() == {}
+
+
+def test_429_repete_com_espera_crescente(planilha):
+    pendencias = gsheets_api.AcumuladorLinhas()
+    pendencias.adicionar_varias(_conflitos(3))
+    gsheets_api.obter_aba("Inconsistências")
+    planilha.falhas_429 = 2
+
+    assert pendencias.gravar() == {"Inconsistências": 3}
+    assert planilha.esperas == [gsheets_api.SHEETS_ESPERA_INICIAL, 2 * gsheets_api.SHEETS_ESPERA_INICIAL]
+    # Sem linhas duplicadas pelas novas tentativas
+    assert planilha.abas["Inconsistências"] == _conflitos(3)
+
+
+def test_429_persistente_mantem_linhas_pendentes(planilha):
+    pendencias = gsheets_api.AcumuladorLinhas()
+    pendencias.adicionar_varias(_conflitos(2))
+    gsheets_api.obter_aba("Inconsistências")
+    planilha.falhas_429 = gsheets_api.SHEETS_TENTATIVAS_LIMITE
+
+    assert pendencias.gravar() == {}
+    assert pendencias.pendentes == {"Inconsistências": 2}
+    assert len(planilha.esperas) == gsheets_api.SHEETS_TENTATIVAS_LIMITE - 1
+
+    # Próxima chamada grava o que ficou
+    assert pendencias.gravar() == {"Inconsistências": 2}
+    assert planilha.abas["Inconsistências"] == _conflitos(2)
+
+
+def test_passo_5_sem_sleep_fixo(planilha, monkeypatch):
+    itens = [{'Apartamento': 'c108' if i % 2 else 'd014', 'Início': datetime(2030, 1, i + 1),
+              'Fim': datetime(2030, 1, i + 2), 'Summary': 'Reserved', 'Origem': 'Airbnb'} for i in range(30)]
+
+    sinccronizacao.step_5_atualizar_google_sheets(itens)
+
+    assert len(planilha.abas['SM-C108']) == 15 and len(planilha.abas['SM-D014']) == 15
+    assert planilha.abas['SM-C108'][0][:2] == ['02/01/2030', '03/01/2030']
+    # Duas abas: abertura + um append_rows cada
+    assert planilha.requisicoes == 4
+    assert planilha.esperas == []
@@ -0,0 +1,124 @@
+import sys
+import os
+
+import gspread
+import pandas as pd
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src import gsheets_api
+from fake_gspread import FakeClient, erro_api
+
+ABA = "Reservas Consolidadas"
+
+
+class RelogioFalso:
+    """Relógio que só anda quando o agendador dorme."""
+
+    def __init__(self):
+        self.agora = 0.0
+        self.esperas = []
+
+    def __call__(self):
+        return self.agora
+
+    def dormir(self, segundos):
+        self.esperas.append(segundos)
+        self.agora += segundos
+
+
+@pytest.fixture
+def relogio():
+    return RelogioFalso()
+
+
+@pytest.fixture
+def planilha(monkeypatch, relogio):
+    gsheets_api.invalidar_conexao()
+    gc = FakeClient({ABA: [['idReserva', 'Início', 'Fim'], ['1', '01/01/2030 15:00', '03/01/2030 11:00']]})
+    monkeypatch.setattr(gsheets_api, 'authenticate_google_sheets', lambda: gc)
+    monkeypatch.setattr(gsheets_api, 'agendador', gsheets_api.AgendadorRequisicoes(relogio=relogio, dormir=relogio.dormir))
+    yield gc.planilha
+    gsheets_api.invalidar_conexao()
+
+
+def test_cota_por_minuto_de_leituras_e_escritas(relogio):
+    agendador = gsheets_api.AgendadorRequisicoes(leituras_por_minuto=10, escritas_por_minuto=5,
+                                                 relogio=relogio, dormir=relogio.dormir)
+
+    for _ in range(25):
+        agendador.executar(lambda: None)
+
+    # 10 de uma vez e depois uma a cada 6 s
+    assert relogio.esperas == [pytest.approx(6.0)] * 15
+    assert relogio.agora == pytest.approx(90.0)
+
+    # Escritas têm cota própria (e o balde encheu durante a espera das leituras)
+    relogio.esperas.clear()
+    for _ in range(5):
+        agendador.executar(lambda: None, escrita=True)
+    assert relogio.esperas == []
+
+    metricas = agendador.metricas()
+    assert (metricas['requisicoes'], metricas['leituras'], metricas['escritas']) == (30, 25, 5)
+    assert metricas['espera_cota_ms'] == pytest.approx(90000)
+
+
+def test_429_repetido_com_espera_exponencial_e_jitter(planilha, relogio):
+    planilha.falhas_429 = 3
+
+    df = gsheets_api.baixar_tabela_consolidada(ABA)
+
+    assert df['idReserva'].tolist() == ['1']
+    base = gsheets_api.SHEETS_ESPERA_INICIAL
+    assert len(relogio.esperas) == 3
+    for tentativa, espera in enumerate(relogio.esperas):
+        assert base * 2 ** tentativa * 0.5 <= espera <= base * 2 ** tentativa
+    metricas = gsheets_api.obter_metricas_requisicoes()
+    assert metricas['novas_tentativas'] == 3
+    assert metricas['falhas'] == 0
+    assert metricas['espera_novas_tentativas_ms'] == pytest.approx(sum(relogio.esperas) * 1000)
+
+
+def test_5xx_repetido_e_retry_after_respeitado(planilha, relogio):
+    planilha.falhas = [erro_api(503), erro_api(429, retry_after=30)]
+
+    pendencias = gsheets_api.AcumuladorLinhas()
+    pendencias.adicionar(['2', '05/01/2030 15:00', '07/01/2030 11:00'], ABA)
+
+    # Abertura da aba: 503 e depois 429 com Retry-After de 30 s
+    assert pendencias.gravar() == {ABA: 1}
+    assert relogio.esperas[1] == 30
+    assert planilha.abas[ABA][-1][0] == '2'
+
+
+def test_erro_definitivo_nao_e_repetido(relogio):
+    agendador = gsheets_api.AgendadorRequisicoes(relogio=relogio, dormir=relogio.dormir)
+    chamadas = []
+
+    def requisicao():
+        chamadas.append(1)
+        raise erro_api(400)
+
+    with pytest.raises(gspread.exceptions.APIError):
+        agendador.executar(requisicao)
+    assert chamadas == [1]
+    assert relogio.esperas == []
+    assert agendador.metricas()['falhas'] == 1
+
+
+def test_429_persistente_esgota_tentativas(planilha, relogio):
+    gsheets_api.obter_aba(ABA)
+    planilha.falhas_429 = gsheets_api.SHEETS_TENTATIVAS_LIMITE
+
+    # Os erros continuam tratados como antes (st.error e DataFrame vazio)
+    df = gsheets_api.baixar_dados_google_sheet(ABA)
+
+    assert isinstance(df, pd.DataFrame) and df.empty
+    assert len(relogio.esperas) == gsheets_api.SHEETS_TENTATIVAS_LIMITE - 1
+    # Teto da espera
+    assert max(relogio.esperas) <= gsheets_api.SHEETS_ESPERA_MAXIMA
+    metricas = gsheets_api.obter_metricas_requisicoes()
+    assert metricas['falhas'] == 1
+    assert metricas['requisicoes'] == 2 + gsheets_api.SHEETS_TENTATIVAS_LIMITE
@@ -0,0 +1,123 @@
+import sys
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src import data_loader
+
+ICS_V1 = b"BEGIN:VCALENDAR\r\nBEGIN:VEVENT\r\nSUMMARY:Reserved\r\nDTSTART;VALUE=DATE:20260110\r\nDTEND;VALUE=DATE:20260112\r\nEND:VEVENT\r\nEND:VCALENDAR\r\n"
+ICS_V2 = ICS_V1.replace(b"20260112", b"20260115")
+
+
+class _Feed:
+    """Estado do servidor local: conteúdo atual e contadores de requisições."""
+    conteudo = ICS_V1
+    usar_etag = True
+    requisicoes = 0
+    respostas_304 = 0
+
+
+class _HandlerCondicional(BaseHTTPRequestHandler):
+    def do_GET(self):
+        _Feed.requisicoes += 1
+        etag = '"%d"' % hash(_Feed.conteudo)
+        if _Feed.usar_etag and self.headers.get('If-None-Match') == etag:
+            _Feed.respostas_304 += 1
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(200)
+        if _Feed.usar_etag:
+            self.send_header('ETag', etag)
+            self.send_header('Last-Modified', 'Wed, 14 Jan 2026 10:00:00 GMT')
+        self.send_header('Content-Length', str(len(_Feed.conteudo)))
+        self.end_headers()
+        self.wfile.write(_Feed.conteudo)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def servidor():
+    _Feed.conteudo, _Feed.usar_etag, _Feed.requisicoes, _Feed.respostas_304 = ICS_V1, True, 0, 0
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), _HandlerCondicional)
+    httpd.block_on_close = False
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}/feed.ics"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture(autouse=True)
+def calendars_temporario(tmp_path, monkeypatch):
+    monkeypatch.setattr(data_loader, 'CALENDARS_DIR', tmp_path)
+    return tmp_path
+
+
+def test_etag_evita_novo_download(servidor, calendars_temporario):
+    primeiro = data_loader.baixar_feed_ota('ap1', 'airbnb', servidor, timeout=5)
+    assert primeiro.status == 'ok'
+    assert data_loader.ler_meta_feed('ap1_airbnb.ics')['etag']
+
+    segundo = data_loader.baixar_feed_ota('ap1', 'airbnb', servidor, timeout=5)
+    assert segundo.status == 'inalterado'
+    assert segundo.bytes == 0
+    assert segundo.sha256 == primeiro.sha256
+    assert _Feed.respostas_304 == 1
+
+    _Feed.conteudo = ICS_V2
+    terceiro = data_loader.baixar_feed_ota('ap1', 'airbnb', servidor, timeout=5)
+    assert terceiro.status == 'ok'
+    assert (calendars_temporario / 'ap1_airbnb.ics').read_bytes() == ICS_V2
+
+
+def test_hash_detecta_conteudo_igual_sem_validadores(servidor, calendars_temporario):
+    _Feed.usar_etag = False
+    data_loader.baixar_feed_ota('ap1', 'booking', servidor, timeout=5)
+    arquivo = calendars_temporario / 'ap1_booking.ics'
+    mtime = arquivo.stat().st_mtime_ns
+
+    resultado = data_loader.baixar_feed_ota('ap1', 'booking', servidor, timeout=5)
+    assert resultado.status == 'inalterado'
+    assert resultado.bytes == len(ICS_V1)
+    assert arquivo.stat().st_mtime_ns == mtime
+
+
+def test_sem_ics_local_ignora_cache(servidor, calendars_temporario):
+    data_loader.baixar_feed_ota('ap1', 'airbnb', servidor, timeout=5)
+    (calendars_temporario / 'ap1_airbnb.ics').unlink()
+
+    resultado = data_loader.baixar_feed_ota('ap1', 'airbnb', servidor, timeout=5)
+    assert resultado.status == 'ok'
+    assert _Feed.respostas_304 == 0
+    assert (calendars_temporario / 'ap1_airbnb.ics').read_bytes() == ICS_V1
+
+
+def _com_dtstamp(conteudo, carimbo):
+    return conteudo.replace(b"SUMMARY:Reserved\r\n", b"SUMMARY:Reserved\r\nDTSTAMP:" + carimbo + b"\r\n")
+
+
+def test_dtstamp_novo_a_cada_download_nao_conta_como_mudanca(servidor, calendars_temporario):
+    # Airbnb e Booking regeram o DTSTAMP de todos os eventos a cada requisição
+    _Feed.usar_etag = False
+    _Feed.conteudo = _com_dtstamp(ICS_V1, b"20251214T004524Z")
+    primeiro = data_loader.baixar_feed_ota('ap1', 'airbnb', servidor, timeout=5)
+
+    _Feed.conteudo = _com_dtstamp(ICS_V1, b"20251215T101010Z")
+    segundo = data_loader.baixar_feed_ota('ap1', 'airbnb', servidor, timeout=5)
+    assert segundo.status == 'inalterado'
+    assert segundo.sha256 == primeiro.sha256
+
+    _Feed.conteudo = _com_dtstamp(ICS_V2, b"20251216T101010Z")
+    assert data_loader.baixar_feed_ota('ap1', 'airbnb', servidor, timeout=5).status == 'ok'
+
+
+def test_hash_feed_ignora_dtstamp_dobrado():
+    dobrado = ICS_V1.replace(b"SUMMARY:Reserved\r\n", b"SUMMARY:Reserved\r\nDTSTAMP;X-A=1:20251214\r\n T004524Z\r\n")
+    assert data_loader.hash_feed_ics(dobrado) == data_loader.hash_feed_ics(ICS_V1)
+    assert data_loader.hash_feed_ics(ICS_V2) != data_loader.hash_feed_ics(ICS_V1)
@@ -0,0 +1,126 @@
+import sys
+import os
+import threading
+from datetime import timedelta
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src import gsheets_api
+from fake_gspread import FakeClient, FakeCredentials
+
+CABECALHO = ['Início', 'Fim', 'Quem', 'Origem', 'Status', 'Apartamento', 'Data Reserva']
+
+
+def _abas():
+    linha = ['10/01/2030 15:00', '12/01/2030 11:00', 'Fulano', 'Airbnb', '', 'SM-C108', '01/12/2029']
+    return {
+        'Reservas Consolidadas': [CABECALHO, linha],
+        'SM-C108': [CABECALHO, linha],
+        'Inconsistências': [],
+    }
+
+
+@pytest.fixture
+def cliente(monkeypatch):
+    gsheets_api.invalidar_conexao()
+    gc = FakeClient(_abas())
+    autenticacoes = []
+
+    def fake_authenticate():
+        autenticacoes.append(1)
+        return gc
+
+    monkeypatch.setattr(gsheets_api, 'authenticate_google_sheets', fake_authenticate)
+    for chave in gsheets_api.METRICAS_CONEXAO:
+        monkeypatch.setitem(gsheets_api.METRICAS_CONEXAO, chave, 0)
+    yield gc
+    gsheets_api.invalidar_conexao()
+
+
+def test_um_rerun_autentica_e_abre_uma_vez(cliente):
+    # Chamadas típicas de um rerun do app + sincronização
+    gsheets_api.baixar_dados_google_sheet("Reservas Consolidadas")
+    gsheets_api.baixar_proximos_hospedes_consolidados()
+    gsheets_api.baixar_ultimas_reservas_consolidadas()
+    gsheets_api.ler_abas_planilha({'c108': 'SM-C108'})
+    gsheets_api.inserir_linha_google_sheet(['a', 'b'], "Inconsistências")
+    gsheets_api.inserir_linha_google_sheet(['c', 'd'], "Inconsistências")
+
+    metricas = gsheets_api.obter_metricas_conexao()
+    assert metricas['autenticacoes'] == 1
+    assert metricas['aberturas_planilha'] == 1
+    assert metricas['aberturas_aba'] == 3
+    assert cliente.aberturas == 1
+    # 3 aberturas de aba + 6 chamadas de dados
+    assert cliente.planilha.requisicoes == 9
+    assert cliente.planilha.abas['Inconsistências'] == [['a', 'b'], ['c', 'd']]
+
+
+def test_token_expirando_e_renovado_sem_nova_autenticacao(cliente):
+    gsheets_api.obter_planilha()
+    creds = cliente.http_client.auth
+    creds.expiry = creds.expiry - timedelta(minutes=58)
+
+    gsheets_api.obter_planilha()
+
+    metricas = gsheets_api.obter_metricas_conexao()
+    assert creds.renovacoes == 1
+    assert metricas['renovacoes_token'] == 1
+    assert metricas['autenticacoes'] == 1
+    assert metricas['aberturas_planilha'] == 1
+
+
+def test_falha_na_renovacao_reautentica(cliente):
+    class CredenciaisQuebradas(FakeCredentials):
+        def refresh(self, request):
+            raise RuntimeError("refresh token revogado")
+
+    cliente.http_client.auth = CredenciaisQuebradas(expira_em=timedelta(minutes=1))
+    gsheets_api.obter_planilha()
+    gsheets_api.obter_planilha()
+
+    metricas = gsheets_api.obter_metricas_conexao()
+    assert metricas['autenticacoes'] == 2
+    assert metricas['aberturas_planilha'] == 2
+
+
+def test_aba_inexistente_nao_fica_em_cache(cliente):
+    assert gsheets_api.baixar_proximos_hospedes_consolidados("Não Existe").empty
+    cliente.planilha.abas['Não Existe'] = [CABECALHO]
+    gsheets_api.obter_aba("Não Existe")
+
+    assert gsheets_api.obter_metricas_conexao()['aberturas_aba'] == 1
+
+
+def test_abertura_lenta_nao_segura_o_lock(cliente, monkeypatch):
+    gsheets_api.obter_aba('SM-C108')
+    liberar, entrou = threading.Event(), threading.Event()
+    abrir = cliente.planilha.worksheet
+
+    def worksheet_lento(title):
+        if title == 'Inconsistências':
+            entrou.set()
+            assert liberar.wait(5)
+        return abrir(title)
+
+    monkeypatch.setattr(cliente.planilha, 'worksheet', worksheet_lento)
+    lenta = threading.Thread(target=gsheets_api.obter_aba, args=('Inconsistências',))
+    lenta.start()
+    assert entrou.wait(5)
+
+    # Com a abertura da outra aba em andamento, o cache responde sem esperar o lock
+    resultado = {}
+    rapida = threading.Thread(target=lambda: resultado.update(aba=gsheets_api.obter_aba('SM-C108')))
+    rapida.start()
+    rapida.join(2)
+    terminou_antes = not rapida.is_alive()
+    liberar.set()
+    lenta.join(5)
+    rapida.join(5)
+
+    assert terminou_antes
+    assert resultado['aba'].title == 'SM-C108'
+    assert gsheets_api.obter_aba('Inconsistências') is gsheets_api.obter_aba('Inconsistências')
+    assert gsheets_api.obter_metricas_conexao()['aberturas_aba'] == 2
@@ -0,0 +1,173 @@
+import sys
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src import data_loader
+
+ICS_EXEMPLO = b"""BEGIN:VCALENDAR
+VERSION:2.0
+BEGIN:VEVENT
+SUMMARY:Reserved
+DTSTART;VALUE=DATE:20260110
+DTEND;VALUE=DATE:20260112
+UID:exemplo@airbnb.com
+END:VEVENT
+END:VCALENDAR
+"""
+
+# Atraso (s) de cada caminho servido pelo servidor local
+ATRASOS = {'/lento': 0.6, '/medio': 0.4, '/rapido': 0.1, '/travado': 3.0}
+
+
+class _HandlerLento(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path == '/gotejando':
+            return self._gotejar()
+        atraso = ATRASOS.get(self.path)
+        if atraso is None:
+            self.send_response(404)
+            self.end_headers()
+            return
+        time.sleep(atraso)
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/calendar')
+        self.send_header('Content-Length', str(len(ICS_EXEMPLO)))
+        self.end_headers()
+        self.wfile.write(ICS_EXEMPLO)
+
+    def _gotejar(self):
+        # Responde na hora, mas manda o corpo 1 byte a cada 0,25 s
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/calendar')
+        self.send_header('Content-Length', str(len(ICS_EXEMPLO)))
+        self.end_headers()
+        try:
+            for i in range(len(ICS_EXEMPLO)):
+                self.wfile.write(ICS_EXEMPLO[i:i + 1])
+                self.wfile.flush()
+                time.sleep(0.25)
+        except OSError:
+            pass
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def servidor():
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), _HandlerLento)
+    httpd.block_on_close = False
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture(autouse=True)
+def calendars_temporario(tmp_path, monkeypatch):
+    monkeypatch.setattr(data_loader, 'CALENDARS_DIR', tmp_path)
+    return tmp_path
+
+
+def test_tempo_total_limitado_pelo_feed_mais_lento(servidor, calendars_temporario):
+    urls = {
+        'ap1': {'airbnb': f"{servidor}/lento", 'booking': f"{servidor}/medio"},
+        'ap2': {'airbnb': f"{servidor}/lento", 'booking': None},
+        'ap3': {'airbnb': f"{servidor}/rapido", 'booking': f"{servidor}/medio"},
+    }
+
+    inicio = time.monotonic()
+    resultados = data_loader.baixar_calendarios_otas(urls, max_workers=6, timeout=5)
+    decorrido = time.monotonic() - inicio
+
+    soma_atrasos = 0.6 + 0.4 + 0.6 + 0.1 + 0.4
+    assert decorrido < soma_atrasos
+    assert list(resultados) == [('ap1', 'airbnb'), ('ap1', 'booking'), ('ap2', 'airbnb'),
+                                ('ap3', 'airbnb'), ('ap3', 'booking')]
+    for (apt, ota), resultado in resultados.items():
+        assert resultado.sucesso
+        assert resultado.bytes == len(ICS_EXEMPLO)
+        assert (calendars_temporario / f"{apt}_{ota}.ics").read_bytes() == ICS_EXEMPLO
+
+
+def test_limite_de_concorrencia(servidor):
+    urls = {f"ap{i}": {'airbnb': f"{servidor}/medio"} for i in range(4)}
+
+    inicio = time.monotonic()
+    resultados = data_loader.baixar_calendarios_otas(urls, max_workers=2, timeout=5)
+    decorrido = time.monotonic() - inicio
+
+    # 4 downloads de 0.4s com 2 workers: pelo menos duas "rodadas"
+    assert decorrido >= 0.8
+    assert all(r.sucesso for r in resultados.values())
+
+
+def test_prazo_por_feed_e_erros(servidor, calendars_temporario):
+    urls = {
+        'ap1': {'airbnb': f"{servidor}/travado", 'booking': f"{servidor}/rapido"},
+        'ap2': {'airbnb': f"{servidor}/inexistente"},
+    }
+
+    inicio = time.monotonic()
+    resultados = data_loader.baixar_calendarios_otas(urls, timeout=0.5)
+    decorrido = time.monotonic() - inicio
+
+    assert decorrido < 2.0
+    assert resultados[('ap1', 'airbnb')].status == 'timeout'
+    assert resultados[('ap1', 'booking')].status == 'ok'
+    assert resultados[('ap2', 'airbnb')].status == 'erro'
+    assert not (calendars_temporario / 'ap1_airbnb.ics').exists()
+
+
+def test_baixar_calendario_ota_mantem_retorno_booleano(servidor, calendars_temporario):
+    assert data_loader.baixar_calendario_ota(f"{servidor}/rapido", 'teste.ics', timeout=5) is True
+    assert (calendars_temporario / 'teste.ics').read_bytes() == ICS_EXEMPLO
+    assert data_loader.baixar_calendario_ota(None, 'teste.ics') is False
+
+
+def test_baixar_calendario_ota_usa_o_download_dos_feeds(servidor, calendars_temporario):
+    # Mesmo caminho de baixar_feed_ota: cache do feed e prazo total
+    assert data_loader.baixar_calendario_ota(f"{servidor}/rapido", 'ap1_airbnb.ics', timeout=5) is True
+    assert data_loader.ler_meta_feed('ap1_airbnb.ics')['url'] == f"{servidor}/rapido"
+    assert data_loader.baixar_calendario_ota(f"{servidor}/travado", 'ap1_booking.ics', timeout=0.5) is False
+    assert not (calendars_temporario / 'ap1_booking.ics').exists()
+
+
+def test_servidor_gotejando_respeita_o_prazo(servidor, calendars_temporario):
+    inicio = time.monotonic()
+    resultado = data_loader.baixar_feed_ota('ap1', 'airbnb', f"{servidor}/gotejando", timeout=1)
+    decorrido = time.monotonic() - inicio
+
+    # Antes: o prazo só era conferido a cada bloco de 64 KiB e o download levava o corpo inteiro
+    assert resultado.status == 'timeout'
+    assert decorrido < 1.5
+    assert not (calendars_temporario / 'ap1_airbnb.ics').exists()
+
+
+def test_prazo_total_da_leva(monkeypatch, calendars_temporario):
+    liberar = threading.Event()
+
+    def feed(apt, ota, url, timeout):
+        if url == 'preso':
+            liberar.wait(5)
+        return data_loader.ResultadoDownload(apt, ota, f"{apt}_{ota}.ics", 'ok')
+
+    monkeypatch.setattr(data_loader, 'baixar_feed_ota', feed)
+    monkeypatch.setattr(data_loader, 'OTA_DOWNLOAD_FOLGA', 0.3)
+
+    inicio = time.monotonic()
+    resultados = data_loader.baixar_calendarios_otas({'ap1': {'airbnb': 'preso', 'booking': 'rapido'}}, timeout=0.2)
+    decorrido = time.monotonic() - inicio
+    liberar.set()
+
+    assert decorrido < 1.5
+    assert resultados[('ap1', 'booking')].status == 'ok'
+    assert resultados[('ap1', 'airbnb')].status == 'timeout'
+    assert 'prazo total' in resultados[('ap1', 'airbnb')].erro
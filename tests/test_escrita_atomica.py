@@ -0,0 +1,149 @@
+import sys
+import os
+import threading
+import time
+import multiprocessing
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src import arquivos, data_loader
+from src.logic import ler_calendario_ics
+from test_salvar_ical import gerar_reservas_planilha
+
+
+@pytest.fixture(autouse=True)
+def pastas_temporarias(tmp_path, monkeypatch):
+    monkeypatch.setattr(arquivos, 'LOCKS_DIR', tmp_path / 'locks')
+    monkeypatch.setattr(data_loader, 'CALENDARS_DIR', tmp_path)
+    return tmp_path
+
+
+def _sobras(pasta):
+    return [p.name for p in pasta.iterdir() if p.name.endswith('.tmp')]
+
+
+def test_gravacao_substitui_arquivo_inteiro(tmp_path):
+    destino = tmp_path / 'c108_google.ics'
+    destino.write_bytes(b'antigo')
+
+    arquivos.gravar_bytes_atomico(destino, b'novo conteudo')
+
+    assert destino.read_bytes() == b'novo conteudo'
+    assert _sobras(tmp_path) == []
+
+
+def test_erro_no_meio_preserva_original(tmp_path):
+    destino = tmp_path / 'c108_merged.ics'
+    destino.write_bytes(b'BEGIN:VCALENDAR\r\nEND:VCALENDAR\r\n')
+    os.chmod(destino, 0o640)
+
+    with pytest.raises(RuntimeError):
+        with arquivos.gravacao_atomica(destino) as f:
+            f.write(b'BEGIN:VCALENDAR\r\nBEGIN:VEVENT\r\n')
+            raise RuntimeError('falha no meio da gravação')
+
+    assert destino.read_bytes() == b'BEGIN:VCALENDAR\r\nEND:VCALENDAR\r\n'
+    assert _sobras(tmp_path) == []
+
+    arquivos.gravar_json_atomico(destino, {'ok': True})
+    if os.name != 'nt':
+        assert os.stat(destino).st_mode & 0o777 == 0o640
+
+
+def test_leitor_nunca_ve_arquivo_parcial(tmp_path):
+    # Uma thread regrava o .ics sem parar enquanto outra lê: toda leitura vê o calendário inteiro
+    df = gerar_reservas_planilha(3000)
+    data_loader.save_dataframe_to_ical(df, 'ap_google.ics')
+    esperado = len(ler_calendario_ics(tmp_path / 'ap_google.ics', aplicar_regras=False))
+    assert esperado > 0
+
+    parar = threading.Event()
+    erros = []
+
+    def gravar():
+        try:
+            while not parar.is_set():
+                data_loader.save_dataframe_to_ical(df, 'ap_google.ics')
+        except Exception as e:
+            erros.append(e)
+
+    escritor = threading.Thread(target=gravar)
+    escritor.start()
+    try:
+        tamanhos = [len(ler_calendario_ics(tmp_path / 'ap_google.ics', aplicar_regras=False)) for _ in range(15)]
+    finally:
+        parar.set()
+        escritor.join()
+
+    assert erros == []
+    assert set(tamanhos) == {esperado}
+    assert _sobras(tmp_path) == []
+
+
+def test_trava_reentrante_e_por_apartamento():
+    ordem = []
+
+    with arquivos.bloqueio_apartamento('c108'):
+        with arquivos.bloqueio_apartamento('c108'):
+            ordem.append('aninhado')
+
+        # Outro apartamento não espera pelo c108
+        with arquivos.bloqueio_apartamento('c109'):
+            ordem.append('c109')
+
+        concorrente = threading.Thread(target=lambda: _registrar_sob_trava('c108', ordem, 'thread'))
+        concorrente.start()
+        time.sleep(0.2)
+        ordem.append('dono')
+    concorrente.join()
+
+    assert ordem == ['aninhado', 'c109', 'dono', 'thread']
+
+
+def _registrar_sob_trava(apt, ordem, rotulo):
+    with arquivos.bloqueio_apartamento(apt):
+        ordem.append(rotulo)
+
+
+def _incrementar_contador(pasta_locks, contador, vezes):
+    # Executado em outro processo: lê, espera e regrava o contador sob a trava
+    arquivos.LOCKS_DIR = pasta_locks
+    for _ in range(vezes):
+        with arquivos.bloqueio_apartamento('c108'):
+            valor = int(open(contador).read())
+            time.sleep(0.01)
+            arquivos.gravar_bytes_atomico(contador, str(valor + 1).encode())
+
+
+def test_sincronizacoes_concorrentes_serializadas_entre_processos(tmp_path):
+    contador = tmp_path / 'contador.txt'
+    contador.write_text('0')
+    contexto = multiprocessing.get_context('spawn')
+    processos = [contexto.Process(target=_incrementar_contador, args=(tmp_path / 'locks', contador, 10)) for _ in range(3)]
+    for p in processos:
+        p.start()
+    for p in processos:
+        p.join(timeout=60)
+
+    assert [p.exitcode for p in processos] == [0, 0, 0]
+    # Sem a trava, leituras intercaladas perderiam incrementos
+    assert contador.read_text() == '30'
+
+
+def test_download_grava_ics_e_meta_sob_trava(tmp_path, monkeypatch):
+    monkeypatch.setattr(data_loader, '_baixar_conteudo', lambda url, timeout, headers=None: (b'BEGIN:VCALENDAR\r\nEND:VCALENDAR\r\n', {'ETag': '"v1"'}))
+    travas = []
+    original = arquivos.bloqueio_apartamento
+    monkeypatch.setattr(data_loader, 'bloqueio_apartamento', lambda apt, pasta: (travas.append(apt), original(apt, pasta))[1])
+
+    resultado = data_loader.baixar_feed_ota('c108', 'airbnb', 'http://exemplo/c108.ics')
+
+    assert resultado.status == 'ok'
+    assert travas == ['c108']
+    # Trava ao lado dos calendários do data_loader, não no calendars/ do repositório
+    assert (tmp_path / 'locks' / 'c108.lock').exists()
+    assert (tmp_path / 'c108_airbnb.ics').read_bytes().startswith(b'BEGIN:VCALENDAR')
+    assert data_loader.ler_meta_feed('c108_airbnb.ics')['etag'] == '"v1"'
+    assert _sobras(tmp_path) == []
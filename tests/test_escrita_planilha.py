@@ -0,0 +1,180 @@
+import sys
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src import gsheets_api
+from fake_gspread import FakeClient
+
+ABA = 'Reservas Consolidadas'
+COLUNAS = ['idReserva', 'Apartamento', 'Início', 'Fim', 'Dias', 'Quem', 'Origem', 'Status', 'Última Atualização']
+
+
+def gerar_consolidada(n, atualizacao='01/03/2030 10:00:00', seed=7):
+    """Tabela no formato de consolidar_e_salvar_reservas: n reservas em 4 apartamentos."""
+    rng = np.random.default_rng(seed)
+    inicios = pd.Timestamp('2030-01-01 15:00') + pd.to_timedelta(np.sort(rng.integers(0, 700, n)), unit='D')
+    dias = rng.integers(1, 8, n)
+    fins = inicios + pd.to_timedelta(dias, unit='D') - pd.Timedelta(hours=4)
+    return pd.DataFrame({
+        'idReserva': np.arange(1, n + 1),
+        'Apartamento': [f"SM-C{100 + i % 4}" for i in range(n)],
+        'Início': inicios.strftime('%d/%m/%Y %H:%M'),
+        'Fim': fins.strftime('%d/%m/%Y %H:%M'),
+        'Dias': dias,
+        'Quem': [f"Hóspede {i}" for i in range(n)],
+        'Origem': rng.choice(['Airbnb', 'Booking', 'Direto'], n),
+        'Status': [np.nan if i % 5 else 'Concluído' for i in range(n)],
+        'Última Atualização': atualizacao,
+    })
+
+
+def salvar_reescrevendo_tudo(worksheet, df):
+    """Escrita anterior: limpa a aba e envia todas as linhas de novo."""
+    df_clean = df.fillna('')
+    dados = [df_clean.columns.values.tolist()] + df_clean.values.tolist()
+    worksheet.clear()
+    worksheet.update(values=dados, range_name='A1')
+    worksheet.resize(rows=len(dados), cols=len(df.columns))
+    worksheet.columns_auto_resize(0, len(df.columns) - 1)
+
+
+@pytest.fixture
+def planilha(monkeypatch):
+    gsheets_api.invalidar_conexao()
+    gc = FakeClient({ABA: []})
+    monkeypatch.setattr(gsheets_api, 'authenticate_google_sheets', lambda: gc)
+    yield gc.planilha
+    gsheets_api.invalidar_conexao()
+
+
+def _linhas(df):
+    df_clean = df.fillna('')
+    return [[gsheets_api._celula_canonica(c) for c in linha] for linha in df_clean.values.tolist()]
+
+
+def _aba(planilha, sem_atualizacao=True):
+    linhas = [[gsheets_api._celula_canonica(c) for c in linha] for linha in planilha.abas[ABA][1:]]
+    return [linha[:-1] for linha in linhas] if sem_atualizacao else linhas
+
+
+def _sem_atualizacao(linhas):
+    return [linha[:-1] for linha in linhas]
+
+
+def test_mudanca_de_uma_reserva_escreve_uma_linha(planilha):
+    df = gerar_consolidada(500)
+    assert gsheets_api.salvar_df_no_gsheet(df, ABA)['modo'] == 'completo'
+
+    df2 = gerar_consolidada(500, atualizacao='02/03/2030 10:00:00')
+    df2.loc[123, 'Quem'] = 'Novo Hóspede'
+    planilha.celulas_escritas = 0
+    resumo = gsheets_api.salvar_df_no_gsheet(df2, ABA)
+
+    # Uma linha inteira + a hora da sincronização na primeira linha
+    assert resumo == {'modo': 'incremental', 'linhas': 1, 'celulas': len(COLUNAS) + 1}
+    assert planilha.celulas_escritas == len(COLUNAS) + 1
+    assert _aba(planilha) == _sem_atualizacao(_linhas(df2))
+    assert planilha.abas[ABA][1][-1] == '02/03/2030 10:00:00'
+    assert planilha.abas[ABA][124][-1] == '02/03/2030 10:00:00'
+    assert planilha.abas[ABA][2][-1] == '01/03/2030 10:00:00'
+
+    # Mesma mudança com a escrita anterior
+    planilha.celulas_escritas = 0
+    salvar_reescrevendo_tudo(gsheets_api.obter_aba(ABA), df2)
+    assert planilha.celulas_escritas == (len(df2) + 1) * len(COLUNAS)
+
+
+def test_datas_editadas_mantem_a_linha_pelo_id(planilha):
+    df = gerar_consolidada(300)
+    gsheets_api.salvar_df_no_gsheet(df, ABA)
+
+    # Check-out adiado: mesmo idReserva, chave composta diferente, e a reserva muda de posição na tabela
+    df2 = gerar_consolidada(300, atualizacao='02/03/2030 10:00:00')
+    df2.loc[40, ['Fim', 'Dias']] = ['28/12/2031 11:00', 9]
+    df2 = pd.concat([df2.drop(index=40), df2.loc[[40]]], ignore_index=True)
+    planilha.celulas_escritas = 0
+    resumo = gsheets_api.salvar_df_no_gsheet(df2, ABA)
+
+    assert resumo['linhas'] == 1
+    assert planilha.celulas_escritas == len(COLUNAS) + 1
+    # Continua na linha 41 da aba (42 contando o cabeçalho), só com o novo check-out
+    assert planilha.abas[ABA][41][:5] == [41, df2.iloc[-1]['Apartamento'], df2.iloc[-1]['Início'], '28/12/2031 11:00', 9]
+    assert sorted(_aba(planilha)) == sorted(_sem_atualizacao(_linhas(df2)))
+
+
+def test_sem_mudancas_so_atualiza_a_hora(planilha):
+    df = gerar_consolidada(50)
+    gsheets_api.salvar_df_no_gsheet(df, ABA)
+    requisicoes = planilha.requisicoes
+
+    resumo = gsheets_api.salvar_df_no_gsheet(gerar_consolidada(50, atualizacao='05/03/2030 08:00:00'), ABA)
+
+    assert resumo['celulas'] == 1
+    # Leitura da aba + um batch_update, sem clear nem resize
+    assert planilha.requisicoes - requisicoes == 2
+    assert planilha.abas[ABA][1][-1] == '05/03/2030 08:00:00'
+
+
+def test_remocoes_e_insercoes_ocupam_as_vagas(planilha):
+    df = gerar_consolidada(200)
+    gsheets_api.salvar_df_no_gsheet(df, ABA)
+
+    novas = gerar_consolidada(3, seed=99)
+    novas['Início'] = ['01/01/2035 15:00', '05/01/2035 15:00', '09/01/2035 15:00']
+    df2 = pd.concat([df.drop(index=[10, 50, 51, 52, 199]), novas], ignore_index=True)
+    planilha.celulas_escritas = 0
+    resumo = gsheets_api.salvar_df_no_gsheet(df2, ABA)
+
+    # 3 novas nas vagas + 1 linha do fim que sobe para a vaga restante
+    assert resumo['linhas'] == 4
+    assert len(planilha.abas[ABA]) == len(df2) + 1
+    assert sorted(_aba(planilha)) == sorted(_sem_atualizacao(_linhas(df2)))
+
+
+def test_tabela_maior_que_a_grade(planilha):
+    df2 = gerar_consolidada(30)
+    gsheets_api.salvar_df_no_gsheet(df2.head(20), ABA)
+    assert planilha.grades[ABA] == 21
+
+    resumo = gsheets_api.salvar_df_no_gsheet(df2, ABA)
+
+    assert resumo['linhas'] == 10
+    assert _aba(planilha) == _sem_atualizacao(_linhas(df2))
+    assert planilha.grades[ABA] == 31
+
+
+def test_cabecalho_diferente_reescreve_a_aba(planilha):
+    gsheets_api.salvar_df_no_gsheet(gerar_consolidada(20), ABA)
+
+    df2 = gerar_consolidada(10).drop(columns=['Dias'])
+    resumo = gsheets_api.salvar_df_no_gsheet(df2, ABA)
+
+    assert resumo['modo'] == 'completo'
+    assert planilha.abas[ABA][0] == df2.columns.tolist()
+    assert _aba(planilha, sem_atualizacao=False) == _linhas(df2)
+
+
+def test_chaves_repetidas_e_valores_numericos():
+    cabecalho = ['Apartamento', 'Início', 'Fim', 'Origem', 'Dias']
+    atuais = [cabecalho, ['A', '1', '2', 'X', 3], ['A', '1', '2', 'X', 4]]
+
+    # 3.0 (float do DataFrame) e 3 (lido da planilha) são o mesmo valor
+    assert gsheets_api.calcular_escrita_incremental(atuais, [cabecalho, ['A', '1', '2', 'X', 3.0], ['A', '1', '2', 'X', 4]]) == []
+    intervalos = gsheets_api.calcular_escrita_incremental(atuais, [cabecalho, ['A', '1', '2', 'X', 3], ['A', '1', '2', 'X', 5]])
+    assert intervalos == [{'range': 'A3:E3', 'values': [['A', '1', '2', 'X', 5]]}]
+
+
+def test_id_prevalece_sobre_chave_composta():
+    cabecalho = ['idReserva', 'Apartamento', 'Início', 'Fim', 'Origem']
+    atuais = [cabecalho, [7, 'A', '1', '2', 'X'], [8, 'A', '5', '6', 'X'], ['', 'B', '1', '2', 'X']]
+
+    # Reservas 7 e 8 trocam de datas: cada uma fica na sua linha; sem id, casa pela chave composta
+    dados = [cabecalho, [8, 'A', '1', '2', 'X'], [7, 'A', '5', '6', 'X'], ['', 'B', '1', '2', 'X']]
+    intervalos = gsheets_api.calcular_escrita_incremental(atuais, dados)
+
+    assert intervalos == [{'range': 'A2:E3', 'values': [[7, 'A', '5', '6', 'X'], [8, 'A', '1', '2', 'X']]}]
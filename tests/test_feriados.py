@@ -0,0 +1,70 @@
+import sys
+import os
+import json
+from datetime import date
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src import utils
+
+
+@pytest.fixture(autouse=True)
+def arquivo_temporario(tmp_path, monkeypatch):
+    monkeypatch.setattr(utils, 'FERIADOS_CACHE_FILE', tmp_path / 'feriados_cache.json')
+    utils.limpar_cache_feriados()
+    yield tmp_path / 'feriados_cache.json'
+    utils.limpar_cache_feriados()
+
+
+def test_feriados_indexados_por_data():
+    feriados = utils.feriados_do_ano(2026)
+
+    assert feriados[date(2026, 2, 14)] == ("Sábado de Carnaval", "Brasil", "Sim")
+    assert feriados[date(2026, 3, 6)] == ("Data Magna de Pernambuco", "Pernambuco", "Sim")
+    assert feriados[date(2026, 12, 8)] == ("Nossa Senhora da Conceição", "Recife", "Não")
+    assert list(feriados) == sorted(feriados)
+
+
+def test_get_holidays_derivado_do_cache():
+    df = utils.get_holidays([2026, 2027])
+
+    assert df.columns.tolist() == ["Feriado", "Data", "Dia da Semana", "Mês", "Abrangência", "Feriadão"]
+    assert len(df) == len(utils.feriados_do_ano(2026)) + len(utils.feriados_do_ano(2027))
+    natal = df[df['Data'] == '25/12/2026'].iloc[0]
+    assert natal['Dia da Semana'] == 'Sexta-feira'
+    assert natal['Mês'] == 'Dezembro'
+    assert natal['Feriadão'] == 'Sim'
+    assert utils.get_holidays(2026).equals(df.iloc[:len(utils.feriados_do_ano(2026))])
+
+
+def test_calculado_uma_vez_por_processo(monkeypatch):
+    chamadas = []
+    calcular = utils._calcular_feriados_ano
+    monkeypatch.setattr(utils, '_calcular_feriados_ano', lambda ano: chamadas.append(ano) or calcular(ano))
+
+    utils.get_holidays([2026, 2027])
+    utils.mapa_feriados(range(2026, 2028))
+    utils.feriados_do_ano(2026)
+
+    assert chamadas == [2026, 2027]
+
+
+def test_arquivo_local_evita_recalculo_no_inicio_a_frio(monkeypatch, arquivo_temporario):
+    esperado = utils.feriados_do_ano(2026)
+    assert arquivo_temporario.exists()
+
+    # Novo processo: memória vazia, o arquivo basta
+    utils.limpar_cache_feriados()
+    monkeypatch.setattr(utils, '_calcular_feriados_ano', lambda ano: pytest.fail("não deveria recalcular"))
+    assert utils.feriados_do_ano(2026) == esperado
+
+
+def test_arquivo_de_outra_versao_e_ignorado(arquivo_temporario):
+    arquivo_temporario.write_text(json.dumps({
+        'versao_holidays': '0.0',
+        'anos': {'2026': [['2026-01-01', 'Inventado', 'Brasil', 'Não']]},
+    }), encoding='utf-8')
+
+    assert utils.feriados_do_ano(2026)[date(2026, 1, 1)][0] != 'Inventado'
@@ -0,0 +1,177 @@
+import sys
+import os
+import json
+from datetime import date
+
+import pandas as pd
+import plotly.graph_objects as go
+from plotly.utils import PlotlyJSONEncoder
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.logic import create_gantt_chart, aplicar_destaque_selecao, _montar_fundo_calendario, _camada_fundo_calendario
+from test_indice_disponibilidade import gerar_reservas
+
+FERIADOS = {date(2026, 12, 25): 'Natal', date(2027, 1, 1): 'Confraternização Universal', date(2026, 12, 26): 'Sábado Feriado'}
+
+
+def fundo_por_chamada(fig, data_inicio_fundo, data_fim_fundo, dict_feriados):
+    """Laço anterior de create_gantt_chart (add_shape/add_annotation por dia), usado como referência."""
+    dias_totais = (data_fim_fundo - data_inicio_fundo).days + 1
+    for i in range(dias_totais):
+        dia = data_inicio_fundo + pd.Timedelta(days=i)
+        dia_date = dia.date()
+        cor = None
+        holiday_name = None
+        if dia_date in dict_feriados:
+            cor = "#FFCDD2"
+            holiday_name = dict_feriados[dia_date]
+        elif dia.weekday() == 6:
+            cor = "#E0E0E0"
+        elif dia.weekday() == 5:
+            cor = "#F5F5F5"
+        if cor:
+            fig.add_shape(type="rect", x0=dia, y0=0, x1=dia + pd.Timedelta(days=1), y1=1,
+                          xref="x", yref="paper", fillcolor=cor, layer="below", line_width=0)
+            if holiday_name:
+                fig.add_annotation(x=dia + pd.Timedelta(hours=12), y=0.5, xref="x", yref="paper",
+                                   text=holiday_name.upper(), showarrow=False, textangle=-90,
+                                   xanchor="center", yanchor="middle",
+                                   font=dict(size=10, color="rgba(0, 0, 0, 0.4)"))
+        if dia.day == 1:
+            nome_mes = dia.strftime('%b').capitalize()
+            fig.add_annotation(x=dia, y=1, yref="paper", text=f"<b>{nome_mes}</b>",
+                               showarrow=False, xanchor="left", yanchor="bottom", yshift=40,
+                               font=dict(color="black", size=10))
+            fig.add_shape(type="line", x0=dia, y0=0, x1=dia, y1=1, xref="x", yref="paper",
+                          line=dict(color="black", width=1), opacity=0.3)
+    return fig
+
+
+def _normalizar(elementos):
+    """Converte as coordenadas de data para Timestamp, para comparar texto e objetos datetime."""
+    normalizados = []
+    for elemento in elementos:
+        d = elemento.to_plotly_json()
+        for chave in ('x', 'x0', 'x1'):
+            if chave in d and d.get('xref', 'x') == 'x':
+                d[chave] = pd.Timestamp(d[chave])
+        normalizados.append(d)
+    return normalizados
+
+
+def test_fundo_igual_ao_desenho_dia_a_dia():
+    inicio, fim = pd.Timestamp('2026-11-20'), pd.Timestamp('2027-02-10 11:00')
+
+    referencia = fundo_por_chamada(go.Figure(), inicio, fim, FERIADOS)
+    shapes, anotacoes = _montar_fundo_calendario(inicio, fim, FERIADOS)
+    novo = go.Figure(layout=dict(shapes=shapes, annotations=anotacoes))
+
+    assert len(novo.layout.shapes) > 0
+    assert _normalizar(novo.layout.shapes) == _normalizar(referencia.layout.shapes)
+    assert _normalizar(novo.layout.annotations) == _normalizar(referencia.layout.annotations)
+
+
+def _reservas_futuras(n=40):
+    df = gerar_reservas(n)
+    df['Origem'] = 'Airbnb'
+    df['Fim'] = df['Fim'] + (pd.Timestamp('today').normalize() - pd.Timestamp('2026-01-01'))
+    return df
+
+
+def test_gantt_com_fundo_e_linha_de_agora():
+    df = _reservas_futuras()
+
+    fig = create_gantt_chart(df, is_mobile=True)
+
+    assert fig.layout.shapes[0].line.color == 'red'
+    assert any(s.fillcolor == '#E0E0E0' for s in fig.layout.shapes)
+    # Nomes dos apartamentos no modo mobile continuam após o fundo
+    textos = [a.text for a in fig.layout.annotations]
+    assert textos[-len(df['Apartamento'].unique()):] == [f"<b>{apt}</b>" for apt in sorted(df['Apartamento'].unique())]
+
+
+def test_camada_de_fundo_reaproveitada_entre_graficos():
+    _camada_fundo_calendario.cache_clear()
+    df = _reservas_futuras()
+
+    primeiro = create_gantt_chart(df, is_mobile=False)
+    # Outro filtro de apartamentos com o mesmo período (mantém a reserva que termina por último)
+    apt_ultima = df.loc[df['Fim'].idxmax(), 'Apartamento']
+    outro_apt = next(apt for apt in df['Apartamento'].unique() if apt != apt_ultima)
+    filtrado = create_gantt_chart(df[df['Apartamento'] != outro_apt], is_mobile=False)
+
+    info = _camada_fundo_calendario.cache_info()
+    assert (info.hits, info.misses) == (1, 1)
+    assert primeiro.layout.shapes[1:] == filtrado.layout.shapes[1:]
+
+    # Alterar a figura não altera a camada guardada no cache
+    primeiro.layout.shapes[1].fillcolor = 'black'
+    shapes_cache, _ = _camada_fundo_calendario(*_chave_do_fundo(df))
+    assert shapes_cache[0].fillcolor != 'black'
+
+    create_gantt_chart(df, is_mobile=True)
+    assert _camada_fundo_calendario.cache_info().misses == 2
+
+
+def _chave_do_fundo(df, is_mobile=False):
+    """Mesma chave calculada por create_gantt_chart para o período das reservas."""
+    hoje = pd.Timestamp('today').normalize()
+    fim = max(hoje + pd.Timedelta(days=180), df['Fim'].max() + pd.Timedelta(days=30))
+    return (hoje - pd.Timedelta(days=2)).date(), fim.date(), is_mobile
+
+
+def destaque_na_figura(fig, livres, dt_ini, dt_fim, is_mobile):
+    """Destaque como era aplicado em app.gerar_grafico_e_verificar (direto na figura recém-gerada), usado como referência."""
+    duracao_ms = (dt_fim - dt_ini).total_seconds() * 1000
+    fig.add_trace(go.Bar(
+        name="Sua Seleção", x=[duracao_ms] * len(livres), y=livres, base=[dt_ini] * len(livres), orientation='h',
+        marker=dict(color='rgba(255, 215, 0, 0.5)', line=dict(width=1, color='gold')),
+        text=["SUA SELEÇÃO"] * len(livres), textposition='inside', insidetextanchor='middle',
+        textfont=dict(color='black', size=12, weight='bold'), hoverinfo="text",
+        hovertext=[f"<b>DISPONÍVEL: {ap}</b><br>Início: {dt_ini.strftime('%d/%m %H:%M')}<br>Fim: {dt_fim.strftime('%d/%m %H:%M')}" for ap in livres]
+    ))
+    days_fwd = 8 if is_mobile else 20
+    days_back = 2 if is_mobile else 3
+    fig.update_layout(
+        barmode='overlay',
+        xaxis=dict(range=[dt_ini - pd.Timedelta(days=days_back), dt_fim + pd.Timedelta(days=days_fwd)]),
+        xaxis2=dict(range=[dt_ini - pd.Timedelta(days=days_back), dt_fim + pd.Timedelta(days=days_fwd)])
+    )
+    return fig
+
+
+def _json(fig):
+    return json.dumps(fig if isinstance(fig, dict) else fig.to_dict(), cls=PlotlyJSONEncoder, sort_keys=True)
+
+
+def test_destaque_sobre_copia_igual_ao_da_figura_regerada():
+    df = _reservas_futuras()
+    livres = sorted(df['Apartamento'].unique())[:2]
+    dt_ini = pd.Timestamp('today').normalize() + pd.Timedelta(days=5, hours=15)
+    dt_fim = dt_ini + pd.Timedelta(days=3, hours=-4)
+
+    for is_mobile in (False, True):
+        fig = create_gantt_chart(df, is_mobile=is_mobile)
+        base = fig.to_dict()
+        referencia = destaque_na_figura(go.Figure(fig), livres, dt_ini, dt_fim, is_mobile)
+
+        novo = aplicar_destaque_selecao(base, livres, dt_ini, dt_fim, is_mobile=is_mobile)
+
+        assert _json(novo) == _json(referencia)
+        assert _json(aplicar_destaque_selecao(fig, livres, dt_ini, dt_fim, is_mobile=is_mobile)) == _json(referencia)
+        # A base guardada na sessão não recebe o destaque nem o zoom
+        assert _json(base) == _json(fig)
+        assert [t.name for t in fig.data] == [t['name'] for t in base['data']]
+
+
+def test_sem_apartamentos_livres_retorna_copia_da_base():
+    fig = create_gantt_chart(_reservas_futuras(), is_mobile=False)
+    base = fig.to_dict()
+
+    copia = aplicar_destaque_selecao(base, [], None, None)
+
+    assert _json(copia) == _json(base)
+    copia.layout.shapes[0].line.color = 'blue'
+    assert base['layout']['shapes'][0]['line']['color'] == 'red'
+    assert aplicar_destaque_selecao(None, ['AP'], None, None) is None
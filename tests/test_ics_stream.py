@@ -0,0 +1,91 @@
+import sys
+import os
+import glob
+from datetime import date, datetime
+from zoneinfo import ZoneInfo
+
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.ics_stream import ler_eventos_ics, separar_propriedade, desdobrar_linhas, _eventos_via_icalendar
+
+CALENDARIOS = sorted(glob.glob(os.path.join(os.path.dirname(__file__), '..', 'calendars', '*.ics')))
+
+
+def gerar_ics(n, inicio=date(2025, 1, 1)):
+    """Calendário sintético no formato dos feeds do Airbnb (datas puras, UID e DESCRIPTION dobrada)."""
+    linhas = ["BEGIN:VCALENDAR", "VERSION:2.0", "PRODID:-//Airbnb Inc//Hosting Calendar 1.0//EN", "CALSCALE:GREGORIAN"]
+    base = inicio.toordinal()
+    for i in range(n):
+        d0, d1 = date.fromordinal(base + 2 * i), date.fromordinal(base + 2 * i + 1 + i % 3)
+        linhas += [
+            "BEGIN:VEVENT",
+            "SUMMARY:" + ("Reserved" if i % 2 else "Airbnb (Not available)"),
+            f"DTSTART;VALUE=DATE:{d0:%Y%m%d}",
+            f"DTEND;VALUE=DATE:{d1:%Y%m%d}",
+            "DTSTAMP:20251214T004519Z",
+            f"UID:1418fb94e984-{i:032x}@airbnb.com",
+            "DESCRIPTION:Reservation URL: https://www.airbnb.com/hosting/reservations/d",
+            f" etails/HM{i:08d}\\nPhone Number (Last 4 Digits): {i % 10000:04d}",
+            "END:VEVENT",
+        ]
+    linhas.append("END:VCALENDAR")
+    return ("\r\n".join(linhas) + "\r\n").encode('utf-8')
+
+
+@pytest.mark.parametrize('arquivo', CALENDARIOS, ids=os.path.basename)
+def test_mesmos_eventos_do_icalendar_nos_calendarios_reais(arquivo):
+    with open(arquivo, 'rb') as f:
+        assert ler_eventos_ics(arquivo) == _eventos_via_icalendar(f.read())
+
+
+def test_conteudo_com_fusos_escapes_e_dobras():
+    conteudo = (
+        "BEGIN:VCALENDAR\r\nBEGIN:VEVENT\r\n"
+        "SUMMARY:Fam\xedlia Concei\xe7\xe3o\\, 2 h\xf3spedes\\; check-in \\Ncedo\r\n"
+        "DTSTART;TZID=\"America/Sao_Paulo\":20250110T150000\r\n"
+        "DTEND:20250112T140000Z\r\n"
+        "UID:abc@exemplo\r\n"
+        "DESCRIPTION;ALTREP=\"http://exemplo/a:b\":linha um\\nlinha d\r\n"
+        " ois\r\n"
+        "BEGIN:VALARM\r\nSUMMARY:alarme\r\nDESCRIPTION:lembrete\r\nEND:VALARM\r\n"
+        "END:VEVENT\r\n"
+        "BEGIN:VEVENT\r\nDTSTART:20250201T100000\r\nDTEND;VALUE=DATE:20250203\r\nEND:VEVENT\r\n"
+        "END:VCALENDAR\r\n"
+    ).encode('utf-8')
+    # Dobra no meio de um caractere multibyte (o icalendar decodifica antes de desdobrar e o corrompe)
+    pos = conteudo.index('\xe7'.encode('utf-8')) + 1
+    dobrado = conteudo[:pos] + b"\r\n " + conteudo[pos:]
+
+    eventos = ler_eventos_ics(dobrado)
+
+    assert eventos == ler_eventos_ics(conteudo) == _eventos_via_icalendar(conteudo)
+    primeiro, segundo = eventos
+    assert primeiro.summary == "Fam\xedlia Concei\xe7\xe3o, 2 h\xf3spedes; check-in \ncedo"
+    assert primeiro.inicio == datetime(2025, 1, 10, 15, tzinfo=ZoneInfo('America/Sao_Paulo'))
+    assert primeiro.fim.utcoffset().total_seconds() == 0
+    assert primeiro.descricao == "linha um\nlinha dois"
+    assert (segundo.inicio, segundo.fim, segundo.summary, segundo.uid) == (datetime(2025, 2, 1, 10), date(2025, 2, 3), None, None)
+
+
+def test_fuso_customizado_recorre_ao_icalendar():
+    conteudo = (
+        b"BEGIN:VCALENDAR\r\nBEGIN:VTIMEZONE\r\nTZID:Hora de Brasilia\r\n"
+        b"BEGIN:STANDARD\r\nDTSTART:19700101T000000\r\nTZOFFSETFROM:-0300\r\nTZOFFSETTO:-0300\r\nEND:STANDARD\r\n"
+        b"END:VTIMEZONE\r\nBEGIN:VEVENT\r\nSUMMARY:Direto\r\n"
+        b"DTSTART;TZID=Hora de Brasilia:20250110T150000\r\nDTEND;TZID=Hora de Brasilia:20250112T110000\r\n"
+        b"END:VEVENT\r\nEND:VCALENDAR\r\n"
+    )
+
+    (evento,) = ler_eventos_ics(conteudo)
+
+    assert evento.summary == 'Direto'
+    assert evento.inicio.replace(tzinfo=None) == datetime(2025, 1, 10, 15)
+    assert evento.inicio.utcoffset().total_seconds() == -3 * 3600
+
+
+def test_separar_propriedade_e_desdobrar():
+    assert separar_propriedade('dtstart;VALUE=DATE;X-A="a;b:c":20250101') == ('DTSTART', {'VALUE': 'DATE', 'X-A': 'a;b:c'}, '20250101')
+    assert separar_propriedade('SUMMARY:a:b') == ('SUMMARY', {}, 'a:b')
+    assert list(desdobrar_linhas([b"A:1\r\n", b" 2\r\n", b"\t3\n", b"\r\n", b"B:x"])) == ['A:123', 'B:x']
@@ -0,0 +1,124 @@
+import sys
+import os
+
+import pandas as pd
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src import gsheets_api, logic, manifest
+from fake_gspread import FakeClient
+
+ABA = "Reservas Consolidadas"
+
+
+def _aba(*reservas):
+    return pd.DataFrame(list(reservas), columns=['Início', 'Fim', 'Quem', 'Origem', 'Status'])
+
+
+def _consolidada(planilha):
+    valores = planilha.abas[ABA]
+    return pd.DataFrame(valores[1:], columns=valores[0])
+
+
+@pytest.fixture
+def ambiente(tmp_path, monkeypatch):
+    monkeypatch.setattr(manifest, 'SYNC_MANIFEST_FILE', tmp_path / 'sync_manifest.json')
+    monkeypatch.setattr(manifest, 'CONSOLIDACAO_CACHE_FILE', tmp_path / 'consolidacao_cache.pkl')
+    monkeypatch.setattr(manifest, 'RESERVAS_IDS_FILE', tmp_path / 'reservas_ids.json')
+    gsheets_api.invalidar_conexao()
+    gc = FakeClient({ABA: []})
+    monkeypatch.setattr(gsheets_api, 'authenticate_google_sheets', lambda: gc)
+    yield gc.planilha
+    gsheets_api.invalidar_conexao()
+
+
+def _abas_iniciais():
+    return {
+        'SM-C108': _aba(['10/01/2030', '12/01/2030', 'Ana', 'Airbnb', ''],
+                        ['20/01/2030', '25/01/2030', 'Bruno', 'Booking', '']),
+        'SM-C109': _aba(['05/02/2030', '08/02/2030', 'Carla', 'Direto', ''],
+                        ['05/02/2030', '08/02/2030', 'Carla', 'Direto', '']),
+    }
+
+
+def test_ids_estaveis_com_reserva_nova_no_inicio(ambiente):
+    abas = _abas_iniciais()
+    logic.consolidar_e_salvar_reservas(lambda msg: None, dfs_dict=abas)
+    antes = _consolidada(ambiente).set_index('Quem')['idReserva']
+    assert sorted(_consolidada(ambiente)['idReserva'].astype(int)) == [1, 2, 3, 4]
+
+    # Nova reserva antes de todas: com index + 1 todos os ids mudariam
+    abas['SM-C108'] = pd.concat([_aba(['01/01/2030', '03/01/2030', 'Davi', 'Airbnb', '']), abas['SM-C108']], ignore_index=True)
+    ambiente.celulas_escritas = 0
+    logic.consolidar_e_salvar_reservas(lambda msg: None, dfs_dict=abas, df_consolidado_atual=_consolidada(ambiente))
+
+    depois = _consolidada(ambiente)
+    assert depois.loc[depois['Quem'] == 'Davi', 'idReserva'].tolist() == [5]
+    assert depois[depois['Quem'] != 'Davi'].groupby('Quem')['idReserva'].apply(sorted).to_dict() == \
+        antes.groupby(level=0).apply(sorted).to_dict()
+    # Só a linha nova e (se mudou de segundo) a hora da sincronização vão para a planilha
+    assert ambiente.celulas_escritas <= len(depois.columns) + 1
+
+
+def test_ids_semeados_da_planilha(ambiente):
+    # Mapa local vazio (ex: outra máquina): os ids vêm da aba consolidada
+    abas = _abas_iniciais()
+    atual = pd.DataFrame({
+        'idReserva': ['41', '17', '8', '9'],
+        'Apartamento': ['SM-C108', 'SM-C108', 'SM-C109', 'SM-C109'],
+        'Início': ['10/01/2030 15:00', '20/01/2030 15:00', '05/02/2030 15:00', '05/02/2030 15:00'],
+        'Fim': ['12/01/2030 11:00', '25/01/2030 11:00', '08/02/2030 11:00', '08/02/2030 11:00'],
+        'Origem': ['Airbnb', 'Booking', 'Direto', 'Direto'],
+        'Status': ['', '', '', ''],
+    })
+    abas['SM-C109'] = pd.concat([abas['SM-C109'], _aba(['01/03/2030', '04/03/2030', 'Eva', 'Airbnb', ''])], ignore_index=True)
+
+    logic.consolidar_e_salvar_reservas(lambda msg: None, dfs_dict=abas, df_consolidado_atual=atual)
+
+    ids = _consolidada(ambiente).set_index('Quem')['idReserva'].astype(int)
+    assert ids['Ana'] == 41 and ids['Bruno'] == 17
+    assert sorted(ids['Carla']) == [8, 9]
+    assert ids['Eva'] == 42
+    assert manifest.carregar_ids_reservas()['proximo_id'] == 43
+
+
+def test_chave_normalizada_e_uid():
+    df = pd.DataFrame({
+        'Apartamento': ['SM-C108', 'SM-C108', 'SM-C108'],
+        'Início': ['10/01/2030 15:00', '2030-01-10 15:00:00', '10/01/2030 15:00'],
+        'Fim': ['12/01/2030 11:00', '2030-01-12 11:00:00', '12/01/2030 11:00'],
+        'Origem': ['Airbnb ', 'airbnb', 'Airbnb'],
+        'uid': ['', None, 'abc@airbnb.com'],
+    })
+    chaves = logic.chaves_reservas(df)
+    assert chaves.tolist() == [
+        'SM-C108|2030-01-10T15:00|2030-01-12T11:00|airbnb',
+        'SM-C108|2030-01-10T15:00|2030-01-12T11:00|airbnb#2',
+        'SM-C108|uid:abc@airbnb.com',
+    ]
+    # Mesmas chaves com as datas já convertidas (linhas vindas do cache)
+    df['Início'] = pd.to_datetime(['2030-01-10 15:00'] * 3)
+    df['Fim'] = pd.to_datetime(['2030-01-12 11:00'] * 3)
+    assert logic.chaves_reservas(df).tolist() == chaves.tolist()
+
+
+def test_ids_removidos_nao_sao_reutilizados():
+    mapa = {'proximo_id': 1, 'ids': {}}
+    primeira = logic.atribuir_ids_reservas(pd.Series(['a', 'b', 'c'], dtype=str), mapa)
+    segunda = logic.atribuir_ids_reservas(pd.Series(['c', 'd', 'a'], dtype=str), mapa)
+
+    assert primeira.tolist() == [1, 2, 3]
+    assert segunda.tolist() == [3, 4, 1]
+    assert mapa['proximo_id'] == 5
+
+
+def test_planilha_prevalece_sobre_mapa_local():
+    mapa = {'proximo_id': 6, 'ids': {'x': 5, 'y': 3}}
+    planilha = pd.DataFrame({'idReserva': ['5'], 'Apartamento': ['A'], 'Início': ['01/01/2030 15:00'],
+                             'Fim': ['02/01/2030 11:00'], 'Origem': ['Direto']})
+
+    mapa = logic.semear_ids_reservas(mapa, planilha)
+
+    assert mapa['ids'] == {'y': 3, 'A|2030-01-01T15:00|2030-01-02T11:00|direto': 5}
+    assert mapa['proximo_id'] == 6
@@ -0,0 +1,108 @@
+import sys
+import os
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.logic import verificar_inconsistencias
+
+
+def verificar_inconsistencias_par_a_par(df_merged):
+    """Implementação anterior (laço duplo com iloc), usada como referência."""
+    if df_merged.empty:
+        return pd.DataFrame()
+    inconsistencias = []
+    df = df_merged.sort_values('Início')
+    for i in range(len(df)):
+        for j in range(i + 1, len(df)):
+            reserva1 = df.iloc[i]
+            reserva2 = df.iloc[j]
+            if reserva2['Início'] >= reserva1['Fim']:
+                break
+            if (reserva1['Início'] < reserva2['Fim']) and (reserva2['Início'] < reserva1['Fim']):
+                inconsistencias.append({
+                    'Reserva 1': f"{reserva1['Summary']} ({reserva1['Início']} - {reserva1['Fim']})",
+                    'Reserva 2': f"{reserva2['Summary']} ({reserva2['Início']} - {reserva2['Fim']})",
+                    'Conflito': 'Sim',
+                    'Data Detecção': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                })
+    return pd.DataFrame(inconsistencias)
+
+
+def gerar_eventos(n, apartamentos=('SM-C108', 'SM-D209', 'CB-F216'), seed=0):
+    """Eventos sintéticos com estadias de 0 a 7 noites, parte deles sobrepostos."""
+    rng = np.random.default_rng(seed)
+    inicios = pd.Timestamp('2026-01-01 15:00') + pd.to_timedelta(rng.integers(0, 40 * n, n), unit='h')
+    fins = inicios + pd.to_timedelta(rng.integers(0, 8, n) * 24 - 4, unit='h')
+    return pd.DataFrame({
+        'Início': inicios,
+        'Fim': fins,
+        'Summary': [f"Reserva {k}" for k in range(n)],
+        'Apartamento': rng.choice(list(apartamentos), n),
+    })
+
+
+def _sem_data_deteccao(df):
+    return df.drop(columns=['Data Detecção'], errors='ignore').reset_index(drop=True)
+
+
+def test_mesmos_pares_da_verificacao_par_a_par():
+    df = gerar_eventos(400)
+    # Casos de borda: fim igual ao início seguinte, duração zero, datas ausentes e empates
+    extras = pd.DataFrame({
+        'Início': pd.to_datetime(['2026-02-01 15:00', '2026-02-03 11:00', '2026-02-02 00:00', None, '2026-02-02 12:00', '2026-02-02 12:00']),
+        'Fim': pd.to_datetime(['2026-02-03 11:00', '2026-02-05 11:00', '2026-02-02 00:00', '2026-02-04 00:00', None, '2026-02-02 13:00']),
+        'Summary': ['a', 'b', 'zero', 'sem início', 'sem fim', 'empate'],
+        'Apartamento': 'SM-C108',
+    })
+    df = pd.concat([df, extras], ignore_index=True)
+
+    esperado = verificar_inconsistencias_par_a_par(df)
+    obtido = verificar_inconsistencias(df)
+
+    assert len(obtido) > 0
+    pd.testing.assert_frame_equal(_sem_data_deteccao(obtido), _sem_data_deteccao(esperado))
+    assert obtido.columns.tolist() == ['Reserva 1', 'Reserva 2', 'Conflito', 'Data Detecção']
+
+
+def test_sem_conflitos_retorna_vazio():
+    df = pd.DataFrame({
+        'Início': pd.to_datetime(['2026-01-01 15:00', '2026-01-03 15:00']),
+        'Fim': pd.to_datetime(['2026-01-03 11:00', '2026-01-05 11:00']),
+        'Summary': ['a', 'b'],
+    })
+    assert verificar_inconsistencias(df).empty
+    assert verificar_inconsistencias(df.iloc[0:0]).empty
+
+
+def test_agrupado_por_apartamento_em_uma_passada():
+    df = gerar_eventos(600)
+    df = df.drop_duplicates(subset=['Apartamento', 'Início'])
+
+    obtido = verificar_inconsistencias(df, coluna_grupo='Apartamento')
+
+    esperado = pd.concat(
+        [verificar_inconsistencias_par_a_par(grupo).assign(Apartamento=apt)
+         for apt, grupo in df.groupby('Apartamento')],
+        ignore_index=True,
+    )
+    assert obtido.columns.tolist() == ['Apartamento', 'Reserva 1', 'Reserva 2', 'Conflito', 'Data Detecção']
+    pd.testing.assert_frame_equal(
+        _sem_data_deteccao(obtido),
+        _sem_data_deteccao(esperado)[['Apartamento', 'Reserva 1', 'Reserva 2', 'Conflito']],
+    )
+
+
+def test_coluna_de_resumo_da_tabela_consolidada():
+    df = pd.DataFrame({
+        'Início': pd.to_datetime(['2026-01-01 15:00', '2026-01-02 15:00']),
+        'Fim': pd.to_datetime(['2026-01-03 11:00', '2026-01-04 11:00']),
+        'Quem': ['Fulano', 'Beltrano'],
+        'Apartamento': ['SM-C108', 'SM-C108'],
+    })
+    obtido = verificar_inconsistencias(df, coluna_grupo='Apartamento', coluna_resumo='Quem')
+    assert obtido.loc[0, 'Reserva 1'] == 'Fulano (2026-01-01 15:00:00 - 2026-01-03 11:00:00)'
+    assert obtido.loc[0, 'Apartamento'] == 'SM-C108'
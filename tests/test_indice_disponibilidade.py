@@ -0,0 +1,89 @@
+import sys
+import os
+import pickle
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.logic import IndiceDisponibilidade, verificar_disponibilidade
+from src.services import SnapshotConsolidado
+
+APARTAMENTOS = ['SM-C108', 'SM-D209', 'CB-F216', 'CB-D116']
+
+
+def gerar_reservas(n, seed=1):
+    """Reservas sintéticas com check-in 15h e check-out 11h, algumas sobrepostas."""
+    rng = np.random.default_rng(seed)
+    inicios = pd.Timestamp('2026-01-01 15:00') + pd.to_timedelta(rng.integers(0, 365, n), unit='D')
+    fins = inicios + pd.to_timedelta(rng.integers(1, 10, n), unit='D') - pd.Timedelta(hours=4)
+    return pd.DataFrame({'Início': inicios, 'Fim': fins, 'Apartamento': rng.choice(APARTAMENTOS, n)})
+
+
+def gerar_periodos(n, seed=2):
+    rng = np.random.default_rng(seed)
+    inicios = pd.Timestamp('2025-12-20 15:00') + pd.to_timedelta(rng.integers(0, 400, n), unit='D')
+    fins = inicios + pd.to_timedelta(rng.integers(1, 15, n), unit='D') - pd.Timedelta(hours=4)
+    return list(zip(inicios, fins))
+
+
+def test_mesmo_resultado_de_verificar_disponibilidade():
+    df = gerar_reservas(300)
+    indice = IndiceDisponibilidade(df)
+
+    for t0, t1 in gerar_periodos(200):
+        assert indice.consultar(t0, t1) == verificar_disponibilidade(df, t0, t1)
+
+
+def test_filtro_de_apartamentos_e_datas_invalidas():
+    df = gerar_reservas(150)
+    # Colunas em texto, datas ilegíveis e um apartamento só com linhas inválidas
+    df = df.astype({'Início': str, 'Fim': str}).astype(object)
+    df.loc[len(df)] = ['lixo', '2026-03-01 11:00:00', 'SM-C108']
+    df.loc[len(df)] = ['2026-03-01 15:00:00', None, 'FANTASMA']
+    indice = IndiceDisponibilidade(df)
+    selecao = ['SM-C108', 'CB-F216', 'FANTASMA']
+
+    assert 'FANTASMA' not in indice.apartamentos
+    for t0, t1 in gerar_periodos(100):
+        esperado = verificar_disponibilidade(df[df['Apartamento'].isin(selecao)], t0, t1)
+        assert indice.consultar(t0, t1, apartamentos=selecao) == esperado
+
+
+def test_consulta_em_lote():
+    df = gerar_reservas(300)
+    indice = IndiceDisponibilidade(df)
+    periodos = gerar_periodos(500)
+
+    em_lote = indice.consultar_lote(periodos, apartamentos=APARTAMENTOS[:3])
+
+    assert em_lote == [indice.consultar(t0, t1, apartamentos=APARTAMENTOS[:3]) for t0, t1 in periodos]
+    assert indice.consultar_lote([]) == []
+
+
+def test_limites_e_tabela_vazia():
+    df = pd.DataFrame({
+        'Início': pd.to_datetime(['2026-01-10 15:00']),
+        'Fim': pd.to_datetime(['2026-01-12 11:00']),
+        'Apartamento': ['SM-C108'],
+    })
+    indice = IndiceDisponibilidade(df)
+    # Check-out às 11h e novo check-in às 15h do mesmo dia não conflitam
+    assert indice.consultar(pd.Timestamp('2026-01-12 15:00'), pd.Timestamp('2026-01-14 11:00')) == (['SM-C108'], [])
+    assert indice.consultar(pd.Timestamp('2026-01-08 15:00'), pd.Timestamp('2026-01-10 11:00')) == (['SM-C108'], [])
+    assert indice.consultar(pd.Timestamp('2026-01-11'), pd.Timestamp('2026-01-11 12:00')) == ([], ['SM-C108'])
+
+    vazio = IndiceDisponibilidade(pd.DataFrame())
+    assert vazio.consultar(pd.Timestamp('2026-01-11'), pd.Timestamp('2026-01-12')) == ([], [])
+
+
+def test_snapshot_guarda_o_indice():
+    df = gerar_reservas(50)
+    snapshot = SnapshotConsolidado(bruto=pd.DataFrame(), reservas=df)
+
+    # Vai junto no cache do Streamlit (st.cache_data serializa com pickle)
+    copia = pickle.loads(pickle.dumps(snapshot))
+
+    t0, t1 = gerar_periodos(1)[0]
+    assert copia.indice.consultar(t0, t1) == verificar_disponibilidade(df, t0, t1)
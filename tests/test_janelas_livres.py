@@ -0,0 +1,83 @@
+import sys
+import os
+
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.logic import buscar_janelas_livres, IndiceDisponibilidade, verificar_disponibilidade
+from test_indice_disponibilidade import gerar_reservas
+
+
+def _reservas(*linhas):
+    return pd.DataFrame(linhas, columns=['Apartamento', 'Início', 'Fim']).astype({'Início': 'datetime64[ns]', 'Fim': 'datetime64[ns]'})
+
+
+def test_janelas_respeitam_checkin_15h_e_checkout_11h():
+    df = _reservas(
+        ('A', '2026-01-10 15:00', '2026-01-12 11:00'),
+        ('A', '2026-01-12 15:00', '2026-01-15 11:00'),   # troca no mesmo dia: sem janela
+        ('A', '2026-01-20 15:00', '2026-01-22 11:00'),
+        ('B', '2026-01-05 15:00', '2026-01-25 11:00'),
+    )
+
+    janelas = buscar_janelas_livres(df, noites=2, inicio='2026-01-08', horizonte_dias=20)
+
+    assert janelas[['Apartamento', 'Check-in', 'Livre Até', 'Noites Livres', 'Opções de Check-in']].values.tolist() == [
+        ['A', pd.Timestamp('2026-01-08 15:00'), pd.Timestamp('2026-01-10 11:00'), 2, 1],
+        ['A', pd.Timestamp('2026-01-15 15:00'), pd.Timestamp('2026-01-20 11:00'), 5, 4],
+        ['A', pd.Timestamp('2026-01-22 15:00'), pd.Timestamp('2026-01-28 11:00'), 6, 5],
+        ['B', pd.Timestamp('2026-01-25 15:00'), pd.Timestamp('2026-01-28 11:00'), 3, 2],
+    ]
+    assert janelas.loc[0, 'Check-out'] == pd.Timestamp('2026-01-10 11:00')
+
+
+def test_limite_por_apartamento_e_filtro():
+    df = _reservas(
+        ('A', '2026-01-10 15:00', '2026-01-12 11:00'),
+        ('A', '2026-01-20 15:00', '2026-01-22 11:00'),
+        ('B', '2026-01-05 15:00', '2026-01-09 11:00'),
+    )
+    indice = IndiceDisponibilidade(df)
+
+    janelas = buscar_janelas_livres(indice, noites=1, inicio='2026-01-08', horizonte_dias=30, max_por_apartamento=1)
+    assert janelas['Apartamento'].tolist() == ['A', 'B']
+
+    so_b = buscar_janelas_livres(indice, noites=1, inicio='2026-01-08', horizonte_dias=30, apartamentos=['B'])
+    assert so_b['Apartamento'].unique().tolist() == ['B']
+
+    nenhuma = buscar_janelas_livres(indice, noites=40, inicio='2026-01-08', horizonte_dias=30)
+    assert nenhuma.empty
+    assert 'Opções de Check-in' in nenhuma.columns
+
+
+def test_apartamento_sem_reservas_fica_livre_no_horizonte_inteiro():
+    indice = IndiceDisponibilidade(_reservas(('A', '2026-01-10 15:00', '2026-01-12 11:00')))
+    inicios, maior_fim = indice.intervalos('Z')
+    assert len(inicios) == len(maior_fim) == 0
+
+    janelas = buscar_janelas_livres(indice, noites=3, inicio='2026-01-08', horizonte_dias=10, apartamentos=['A', 'Z'])
+
+    assert janelas[janelas['Apartamento'] == 'Z'][['Check-in', 'Livre Até', 'Noites Livres']].values.tolist() == [
+        [pd.Timestamp('2026-01-08 15:00'), pd.Timestamp('2026-01-18 11:00'), 10],
+    ]
+    assert janelas['Apartamento'].tolist() == ['Z', 'A']
+
+    vazio = buscar_janelas_livres(pd.DataFrame(), noites=2, inicio='2026-01-08', horizonte_dias=5, apartamentos=['Z'])
+    assert vazio['Noites Livres'].tolist() == [5]
+
+
+def test_todas_as_estadias_livres_estao_nas_janelas():
+    df = gerar_reservas(120)
+    inicio, horizonte, noites = pd.Timestamp('2026-02-01'), 90, 3
+
+    janelas = buscar_janelas_livres(df, noites=noites, inicio=inicio, horizonte_dias=horizonte)
+
+    # Força bruta: cada dia de chegada possível, verificado com verificar_disponibilidade
+    for dia in range(horizonte - noites + 1):
+        checkin = inicio + pd.Timedelta(days=dia, hours=15)
+        checkout = inicio + pd.Timedelta(days=dia + noites, hours=11)
+        livres, _ = verificar_disponibilidade(df, checkin, checkout)
+        for apt in sorted(df['Apartamento'].unique()):
+            dentro = janelas[(janelas['Apartamento'] == apt) & (janelas['Check-in'] <= checkin) & (janelas['Livre Até'] >= checkout)]
+            assert (apt in livres) == (not dentro.empty), (apt, checkin)
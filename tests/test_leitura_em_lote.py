@@ -0,0 +1,91 @@
+import sys
+import os
+
+import pandas as pd
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src import gsheets_api
+from src.config import APARTMENT_SHEET_MAP
+from fake_gspread import FakeClient
+
+CABECALHO = ['Início', 'Fim', 'Dias', 'Quem', 'Origem', 'Status']
+
+
+def _valores_aba(tab_name):
+    # Linha de título antes do cabeçalho, como nas abas reais
+    return [
+        [f"Reservas {tab_name}"],
+        CABECALHO,
+        ['8-dez.23-sex.', '10-dez.23-dom.', '2', 'Fulano', 'Airbnb', 'Concluído'],
+        ['15-jan.24-seg.', '18-jan.24-qui.', '3', 'Beltrano', 'Booking'],  # linha "curta", como no batchGet
+    ]
+
+
+@pytest.fixture(autouse=True)
+def conexao_limpa():
+    gsheets_api.invalidar_conexao()
+    yield
+    gsheets_api.invalidar_conexao()
+
+
+def _abas_completas():
+    abas = {tab: _valores_aba(tab) for tab in APARTMENT_SHEET_MAP.values()}
+    abas['Reservas Consolidadas'] = [CABECALHO + ['Apartamento'], ['08/12/2023', '10/12/2023', '2', 'Fulano', 'Airbnb', 'Concluído', 'SM-C108']]
+    return abas
+
+
+def test_uma_requisicao_para_todas_as_abas():
+    gc = FakeClient(_abas_completas())
+
+    dfs = gsheets_api.ler_abas_planilha_em_lote(APARTMENT_SHEET_MAP, gc=gc)
+
+    assert gc.planilha.requisicoes == 1
+    assert gc.aberturas == 1
+    assert list(dfs) == list(APARTMENT_SHEET_MAP.values()) + ['Reservas Consolidadas']
+    assert dfs['Reservas Consolidadas']['Apartamento'].tolist() == ['SM-C108']
+
+
+def test_mesmo_resultado_da_leitura_por_aba(monkeypatch):
+    gc = FakeClient(_abas_completas())
+    monkeypatch.setattr(gsheets_api, 'authenticate_google_sheets', lambda: gc)
+
+    em_lote = gsheets_api.ler_abas_planilha_em_lote(APARTMENT_SHEET_MAP, abas_extras=())
+    requisicoes_lote = gc.planilha.requisicoes
+    por_aba = gsheets_api.ler_abas_planilha(APARTMENT_SHEET_MAP)
+
+    assert requisicoes_lote == 1
+    assert gc.planilha.requisicoes - requisicoes_lote == 2 * len(APARTMENT_SHEET_MAP)
+    assert list(em_lote) == list(por_aba)
+    for tab_name, df in por_aba.items():
+        pd.testing.assert_frame_equal(em_lote[tab_name], df)
+        assert df.columns.tolist() == CABECALHO
+        assert df.iloc[1].tolist() == ['15-jan.24-seg.', '18-jan.24-qui.', '3', 'Beltrano', 'Booking', '']
+
+
+def test_fallback_por_aba_quando_lote_falha(monkeypatch):
+    abas = _abas_completas()
+    del abas['Reservas Consolidadas']
+    gc = FakeClient(abas)
+    monkeypatch.setattr(gsheets_api, 'authenticate_google_sheets', lambda: gc)
+
+    dfs = gsheets_api.ler_abas_planilha_em_lote(APARTMENT_SHEET_MAP, gc=gc)
+
+    assert list(dfs) == list(APARTMENT_SHEET_MAP.values())
+
+
+def test_valores_brutos_e_regras_de_cabecalho():
+    abas = _abas_completas()
+    abas['SM-C108'] = [['Início', 'Fim', 'Quem', 'Observação'], ['8-dez.23-sex.', '10-dez.23-dom.', 'Fulano', 'x']]
+    gc = FakeClient(abas)
+
+    valores = gsheets_api.ler_valores_abas_em_lote(APARTMENT_SHEET_MAP, gc=gc)
+
+    assert gc.planilha.requisicoes == 1
+    # Consolidação: cabeçalho com 'Início' e 'Status'; a aba sem 'Status' fica de fora
+    assert 'SM-C108' not in gsheets_api.abas_como_dataframes(valores)
+    # .ics da aba: cabeçalho com 'Início' e 'Fim' e só as colunas de reservas
+    reservas = gsheets_api.reservas_da_aba(valores['SM-C108'], 'SM-C108')
+    assert reservas.columns.tolist() == ['Início', 'Fim', 'Quem']
+    assert reservas['Quem'].tolist() == ['Fulano']
@@ -0,0 +1,89 @@
+import sys
+import os
+from datetime import date, datetime
+
+import pandas as pd
+import pytest
+from icalendar import Calendar
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.logic import ler_calendario_ics
+from test_ics_stream import gerar_ics, CALENDARIOS
+
+
+def ler_calendario_por_evento(filepath):
+    """Versão anterior de ler_calendario_ics (dict por evento, normalização em Python), usada como referência."""
+    with open(filepath, 'rb') as f:
+        cal = Calendar.from_ical(f.read())
+    events = []
+    for component in cal.walk('VEVENT'):
+        start = component.get('dtstart').dt
+        end = component.get('dtend').dt
+        if isinstance(start, date) and not isinstance(start, datetime):
+            start = datetime.combine(start, datetime.min.time())
+        if isinstance(end, date) and not isinstance(end, datetime):
+            end = datetime.combine(end, datetime.min.time())
+        events.append({'Início': start.replace(tzinfo=None), 'Fim': end.replace(tzinfo=None),
+                       'Summary': str(component.get('summary'))})
+    return pd.DataFrame(events)
+
+
+def _comparavel(df):
+    return df.drop(columns='UID').astype({'Summary': 'str'})
+
+
+@pytest.mark.parametrize('arquivo', CALENDARIOS, ids=os.path.basename)
+def test_mesmas_linhas_da_leitura_por_evento(arquivo):
+    pd.testing.assert_frame_equal(_comparavel(ler_calendario_ics(arquivo, aplicar_regras=False)), ler_calendario_por_evento(arquivo))
+
+
+def test_colunas_tipadas_com_fusos_e_uid(tmp_path):
+    arquivo = tmp_path / 'misto.ics'
+    arquivo.write_bytes(
+        b"BEGIN:VCALENDAR\r\n"
+        b"BEGIN:VEVENT\r\nSUMMARY:Reserved\r\nDTSTART;VALUE=DATE:20250110\r\nDTEND;VALUE=DATE:20250112\r\nUID:a@airbnb\r\nEND:VEVENT\r\n"
+        b"BEGIN:VEVENT\r\nDTSTART;TZID=America/Sao_Paulo:20250115T150000\r\nDTEND:20250117T140000Z\r\nEND:VEVENT\r\n"
+        b"END:VCALENDAR\r\n"
+    )
+
+    df = ler_calendario_ics(arquivo, aplicar_regras=False)
+
+    assert df.columns.tolist() == ['Início', 'Fim', 'Summary', 'UID']
+    assert str(df['Início'].dtype) == 'datetime64[us]' and isinstance(df['Summary'].dtype, pd.CategoricalDtype)
+    # Fuso descartado mantendo o horário de parede, como o replace(tzinfo=None) de antes
+    assert df['Início'].tolist() == [pd.Timestamp('2025-01-10'), pd.Timestamp('2025-01-15 15:00')]
+    assert df['Fim'].tolist() == [pd.Timestamp('2025-01-12'), pd.Timestamp('2025-01-17 14:00')]
+    assert df['Summary'].tolist() == ['Reserved', 'None']
+    assert df['UID'].iloc[0] == 'a@airbnb' and pd.isna(df['UID'].iloc[1])
+    pd.testing.assert_frame_equal(_comparavel(df), ler_calendario_por_evento(arquivo))
+
+
+def test_fuso_customizado_e_arquivos_vazios_ou_invalidos(tmp_path):
+    customizado = tmp_path / 'custom.ics'
+    customizado.write_bytes(
+        b"BEGIN:VCALENDAR\r\nBEGIN:VTIMEZONE\r\nTZID:Hora de Brasilia\r\n"
+        b"BEGIN:STANDARD\r\nDTSTART:19700101T000000\r\nTZOFFSETFROM:-0300\r\nTZOFFSETTO:-0300\r\nEND:STANDARD\r\n"
+        b"END:VTIMEZONE\r\nBEGIN:VEVENT\r\nSUMMARY;ENCODING=BASE64:RGlyZXRv\r\nDTSTART;TZID=Hora de Brasilia:20250110T150000\r\n"
+        b"DTEND;TZID=Hora de Brasilia:20250112T110000\r\nEND:VEVENT\r\nEND:VCALENDAR\r\n"
+    )
+    vazio = tmp_path / 'vazio.ics'
+    vazio.write_bytes(b"BEGIN:VCALENDAR\r\nEND:VCALENDAR\r\n")
+
+    # ENCODING não é interpretado pelo leitor em fluxo: a leitura passa pelo icalendar
+    df = ler_calendario_ics(customizado)
+    assert df['Fim'].tolist() == [pd.Timestamp('2025-01-12 11:00')]
+    pd.testing.assert_frame_equal(_comparavel(df), ler_calendario_por_evento(customizado))
+    assert ler_calendario_ics(vazio).empty
+    assert ler_calendario_ics(tmp_path / 'inexistente.ics').empty
+
+
+def test_calendario_grande(tmp_path):
+    arquivo = tmp_path / 'grande.ics'
+    arquivo.write_bytes(gerar_ics(2000))
+
+    df = ler_calendario_ics(arquivo, aplicar_regras=False)
+
+    pd.testing.assert_frame_equal(_comparavel(df), ler_calendario_por_evento(arquivo))
+    assert df['UID'].is_unique
+    assert df['Summary'].cat.categories.tolist() == ['Airbnb (Not available)', 'Reserved']
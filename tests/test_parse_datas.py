@@ -0,0 +1,98 @@
+import sys
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src import utils
+from src.utils import parse_pt_date, parse_pt_dates, limpar_cache_datas, obter_metricas_cache_datas
+from src.logic import tratar_dataframe_consolidado
+
+CELULAS = [
+    '8-dez.23-qui.', '08-DEZ.23', '8-dez.2023-sex.', '8-dez.2023', '11-jan.25-sáb.', '3-jan.25-sex',
+    '29-fev.24-qui', '29-fev.23', '32-dez.23', '1-jan.68', '1-jan.69-qua.',
+    '08/12/2023 15:00', '13/01/2023 9:05', '01/13/2023 15:00', '10/01/2030', '1/1/2030.', '01/01/30',
+    '31/02/2024', '2023-12-08', '', '  ', 'x', 'data-invalida',
+    None, np.nan, 5, pd.Timestamp('2024-01-01'),
+]
+
+
+@pytest.fixture(autouse=True)
+def cache_vazio():
+    limpar_cache_datas()
+    yield
+    limpar_cache_datas()
+
+
+@pytest.mark.filterwarnings("ignore::UserWarning")
+def test_mesmos_valores_do_parse_linha_a_linha():
+    serie = pd.Series(CELULAS, index=range(100, 100 + len(CELULAS)))
+
+    esperado = serie.apply(parse_pt_date)
+    obtido = parse_pt_dates(serie)
+
+    pd.testing.assert_series_equal(obtido, esperado)
+
+
+def test_aceita_lista_e_serie_sem_texto():
+    assert parse_pt_dates(['8-dez.23-qui.']).tolist() == [pd.Timestamp('2023-12-08')]
+    assert parse_pt_dates(pd.Series([None, np.nan])).isna().all()
+    assert parse_pt_dates(pd.Series([], dtype=object)).empty
+
+
+def test_tratar_dataframe_usa_conversao_em_bloco():
+    df = pd.DataFrame({
+        'Início': ['8-dez.23-qui.', '10/01/2030', '', 'lixo'],
+        'Fim': ['10-dez.23-sáb.', '12/01/2030 10:00', '11/01/2030', '12/01/2030'],
+        'Quem': ['A', 'B', 'C', 'D'],
+    })
+
+    tratado = tratar_dataframe_consolidado(df)
+
+    assert tratado['Quem'].tolist() == ['A', 'B']
+    assert tratado['Início'].tolist() == [pd.Timestamp('2023-12-08 15:00'), pd.Timestamp('2030-01-10 15:00')]
+    assert tratado['Fim'].tolist() == [pd.Timestamp('2023-12-10 11:00'), pd.Timestamp('2030-01-12 10:00')]
+
+
+def test_cache_conta_acertos_por_texto_distinto():
+    serie = pd.Series(['8-dez.23-qui.', '10-dez.23-sáb.', '8-dez.23-qui.', None, 'lixo'])
+
+    primeira = parse_pt_dates(serie)
+    assert obter_metricas_cache_datas()['acertos'] == 0
+    assert obter_metricas_cache_datas()['falhas'] == 3
+
+    segunda = parse_pt_dates(serie)
+    metricas = obter_metricas_cache_datas()
+    assert metricas['acertos'] == 3
+    assert metricas['falhas'] == 3
+    assert metricas['tamanho'] == 3
+    pd.testing.assert_series_equal(primeira, segunda)
+
+
+def test_cache_limitado_descarta_os_mais_antigos(monkeypatch):
+    monkeypatch.setattr(utils, 'PARSE_DATAS_CACHE_MAX', 2)
+
+    parse_pt_dates(['1-jan.24', '2-jan.24'])
+    parse_pt_dates(['1-jan.24'])            # '1-jan.24' passa a ser o mais recente
+    parse_pt_dates(['3-jan.24'])            # descarta '2-jan.24'
+
+    assert obter_metricas_cache_datas()['tamanho'] == 2
+    assert list(utils._cache_datas) == ['1-jan.24', '3-jan.24']
+
+
+def test_cache_compartilhado_entre_threads():
+    celulas = pd.Series([f"{dia}-jan.24-seg." for dia in range(1, 29)] * 50)
+    esperado = celulas.apply(parse_pt_date)
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        resultados = list(executor.map(lambda _: parse_pt_dates(celulas), range(16)))
+
+    for resultado in resultados:
+        pd.testing.assert_series_equal(resultado, esperado)
+    metricas = obter_metricas_cache_datas()
+    assert metricas['acertos'] + metricas['falhas'] == 16 * 28
+    assert metricas['tamanho'] == 28
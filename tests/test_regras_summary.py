@@ -0,0 +1,69 @@
+import sys
+import os
+
+import pandas as pd
+from icalendar import Calendar
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src import data_loader
+from src.calendar_utils import apply_summary_rules, normalize_summaries
+from src.config import REGRAS_SUMMARY
+from src.logic import ler_calendario_ics, merge_ical_files
+from test_ics_stream import gerar_ics
+
+
+def atualizar_summaries_reescrevendo(filepath):
+    """Padronização anterior, feita após cada download (parse + serialização + nova gravação do .ics)."""
+    with open(filepath, 'rb') as f:
+        cal = Calendar.from_ical(f.read())
+    modificado = False
+    for component in cal.walk('VEVENT'):
+        summary_original = str(component.get('summary'))
+        if summary_original in REGRAS_SUMMARY:
+            component['summary'] = REGRAS_SUMMARY[summary_original]
+            modificado = True
+    if modificado:
+        with open(filepath, 'wb') as f:
+            f.write(cal.to_ical())
+
+
+def test_regras_aplicadas_na_leitura_sem_reescrever(tmp_path):
+    feed = tmp_path / 'ap_airbnb.ics'
+    conteudo = gerar_ics(6).replace(b"SUMMARY:Airbnb (Not available)\r\nDTSTART;VALUE=DATE:20250105", b"SUMMARY:CLOSED - Not available\r\nDTSTART;VALUE=DATE:20250105")
+    feed.write_bytes(conteudo)
+
+    lido = ler_calendario_ics(feed)
+    bruto = ler_calendario_ics(feed, aplicar_regras=False)
+
+    assert feed.read_bytes() == conteudo
+    assert bruto['Summary'].tolist() == ['Airbnb (Not available)', 'Reserved', 'CLOSED - Not available', 'Reserved', 'Airbnb (Not available)', 'Reserved']
+    assert lido['Summary'].tolist() == ['Direto', 'Airbnb', 'Booking', 'Airbnb', 'Direto', 'Airbnb']
+    assert isinstance(lido['Summary'].dtype, pd.CategoricalDtype)
+
+    # Mesmo resultado da leitura depois da reescrita do arquivo
+    reescrito = tmp_path / 'reescrito.ics'
+    reescrito.write_bytes(conteudo)
+    atualizar_summaries_reescrevendo(reescrito)
+    pd.testing.assert_frame_equal(lido, ler_calendario_ics(reescrito))
+
+
+def test_merge_grava_summaries_padronizados(tmp_path, monkeypatch):
+    monkeypatch.setattr(data_loader, 'CALENDARS_DIR', tmp_path)
+    hoje = pd.Timestamp('today').normalize().date()
+    (tmp_path / 'ota.ics').write_bytes(gerar_ics(4, inicio=hoje))
+    (tmp_path / 'google.ics').write_bytes(b"BEGIN:VCALENDAR\r\nEND:VCALENDAR\r\n")
+
+    df = merge_ical_files(tmp_path / 'ota.ics', tmp_path / 'google.ics', 'merged.ics')
+
+    assert df['Summary'].tolist() == ['Direto', 'Airbnb', 'Direto', 'Airbnb']
+    assert ler_calendario_ics(tmp_path / 'merged.ics', aplicar_regras=False)['Summary'].tolist() == df['Summary'].tolist()
+
+
+def test_normalize_summaries_igual_a_regra_por_linha():
+    df = pd.DataFrame({'summary': ['Reserved', 'CLOSED - Not available', None, '', 'Airbnb (Not available)', 'Outro']})
+
+    esperado = df.apply(apply_summary_rules, axis=1)
+
+    assert normalize_summaries(df['summary']).tolist() == esperado.tolist() == [
+        'Airbnb', 'Booking', 'Origem Desconhecida', 'Origem Desconhecida', 'Direto', 'Outro']
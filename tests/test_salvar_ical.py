@@ -0,0 +1,136 @@
+import sys
+import os
+import re
+from datetime import date, datetime
+
+import pandas as pd
+import pytest
+from icalendar import Calendar, Event
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src import data_loader
+from src.data_loader import save_dataframe_to_ical, _datas_para_ical
+from src.logic import ler_calendario_ics
+from test_ics_stream import CALENDARIOS
+
+
+def salvar_ical_por_evento(df, filepath):
+    """Gravação anterior (um icalendar.Event por reserva + cal.to_ical()), usada como referência."""
+    cal = Calendar()
+    col_summary = 'Summary' if 'Summary' in df.columns else 'Origem'
+    summaries = df[col_summary] if col_summary in df.columns else pd.Series('Reserva', index=df.index)
+    for start_dt, end_dt, summary in zip(_datas_para_ical(df['Início']), _datas_para_ical(df['Fim']), summaries):
+        if pd.isna(start_dt) or pd.isna(end_dt):
+            continue
+        event = Event()
+        event.add('summary', summary)
+        event.add('dtstart', start_dt)
+        event.add('dtend', end_dt)
+        event.add('dtstamp', datetime.now())
+        cal.add_component(event)
+    with open(filepath, 'wb') as f:
+        f.write(cal.to_ical())
+
+
+def gerar_reservas_planilha(n):
+    """Reservas como vêm das abas: datas em texto nos formatos da planilha, algumas inválidas."""
+    inicio = pd.Timestamp('2024-01-01')
+    datas = [inicio + pd.Timedelta(days=3 * i) for i in range(n)]
+    formatos = ['%d/%m/%Y %H:%M', '%d/%m/%Y']
+    return pd.DataFrame({
+        'Início': [d.strftime(formatos[i % 2]) if i % 97 else '' for i, d in enumerate(datas)],
+        'Fim': [(d + pd.Timedelta(days=2)).strftime('%d/%m/%Y') for d in datas],
+        'Origem': [['Airbnb', 'Booking', 'Direto', 'Família, amigos; outros'][i % 4] for i in range(n)],
+    })
+
+
+@pytest.fixture(autouse=True)
+def calendars_temporario(tmp_path, monkeypatch):
+    monkeypatch.setattr(data_loader, 'CALENDARS_DIR', tmp_path)
+    return tmp_path
+
+
+def _validar_rfc5545(conteudo):
+    assert conteudo.endswith(b"\r\n") and b"\n" not in conteudo.replace(b"\r\n", b"")
+    linhas = conteudo.split(b"\r\n")[:-1]
+    assert all(len(linha) <= 75 for linha in linhas)
+    assert linhas[:3] == [b"BEGIN:VCALENDAR", b"VERSION:2.0", b"PRODID:" + data_loader.ICS_PRODID.encode()]
+    texto = conteudo.decode("utf-8").replace("\r\n ", "").replace("\r\n", "\n")
+    eventos = texto.split("BEGIN:VEVENT")[1:]
+    assert all(re.search(r"^UID:.+$", e, re.M) and re.search(r"^DTSTAMP:\d{8}T\d{6}Z$", e, re.M) for e in eventos)
+    return eventos
+
+
+@pytest.mark.parametrize('arquivo', [c for c in CALENDARIOS if 'merged' in c or 'airbnb' in c], ids=os.path.basename)
+def test_ida_e_volta_pelos_calendarios_reais(arquivo, calendars_temporario):
+    df = ler_calendario_ics(arquivo, aplicar_regras=False)
+
+    save_dataframe_to_ical(df, 'novo.ics')
+    salvar_ical_por_evento(df, calendars_temporario / 'antigo.ics')
+
+    relido = ler_calendario_ics(calendars_temporario / 'novo.ics', aplicar_regras=False)
+    pd.testing.assert_frame_equal(relido.drop(columns='UID'), ler_calendario_ics(calendars_temporario / 'antigo.ics').drop(columns='UID'))
+    pd.testing.assert_frame_equal(relido.drop(columns='UID'), df.drop(columns='UID'))
+    # UIDs das OTAs preservados; os demais gerados e únicos
+    tem_uid = df['UID'].notna()
+    assert relido['UID'][tem_uid].tolist() == df['UID'][tem_uid].tolist()
+    assert relido['UID'].notna().all() and relido['UID'].is_unique
+    _validar_rfc5545((calendars_temporario / 'novo.ics').read_bytes())
+
+
+def test_datas_em_texto_tipos_mistos_e_escape(calendars_temporario):
+    df = gerar_reservas_planilha(300).astype(object)
+    df.loc[5, 'Origem'] = 'Hóspede com nome bem comprido ' * 4 + 'linha\nnova \\ fim'
+    df.loc[7, ['Início', 'Fim']] = [date(2025, 3, 1), date(2025, 3, 4)]
+
+    save_dataframe_to_ical(df, 'novo.ics')
+    salvar_ical_por_evento(df, calendars_temporario / 'antigo.ics')
+
+    conteudo = (calendars_temporario / 'novo.ics').read_bytes()
+    eventos = _validar_rfc5545(conteudo)
+    assert len(eventos) == 300 - 4  # linhas 0, 97, 194 e 291 sem início
+    assert "DTSTART;VALUE=DATE:20250301" in eventos[6]
+    novo = ler_calendario_ics(calendars_temporario / 'novo.ics')
+    antigo = ler_calendario_ics(calendars_temporario / 'antigo.ics')
+    pd.testing.assert_frame_equal(novo.drop(columns='UID'), antigo.drop(columns='UID'))
+    assert novo['Summary'].iloc[4] == 'Hóspede com nome bem comprido ' * 4 + 'linha\nnova \\ fim'
+    # O icalendar lê o arquivo com os mesmos textos
+    summaries = [str(e.get('summary')) for e in Calendar.from_ical(conteudo).walk('VEVENT')]
+    assert summaries == novo['Summary'].tolist()
+
+
+def test_uids_gerados_sao_estaveis_entre_gravacoes(calendars_temporario):
+    df = gerar_reservas_planilha(50)
+    df = pd.concat([df, df.iloc[[10]]], ignore_index=True)  # reserva repetida
+
+    save_dataframe_to_ical(df, 'a.ics')
+    save_dataframe_to_ical(df, 'b.ics')
+
+    uids_a = ler_calendario_ics(calendars_temporario / 'a.ics')['UID']
+    assert uids_a.tolist() == ler_calendario_ics(calendars_temporario / 'b.ics')['UID'].tolist()
+    assert uids_a.is_unique
+
+
+def test_indice_repetido_com_coluna_uid(calendars_temporario):
+    # Dois feeds concatenados sem ignore_index: índices 0 e 1 aparecem duas vezes
+    feed = pd.DataFrame({'Início': pd.to_datetime(['2030-01-10 15:00', '2030-01-20 15:00']),
+                         'Fim': pd.to_datetime(['2030-01-12 11:00', '2030-01-22 11:00']),
+                         'Summary': ['Airbnb', 'Airbnb']})
+    df = pd.concat([feed.assign(UID=['a@airbnb.com', '']), feed.assign(UID=['b@booking.com', None], Summary='Booking')])
+    df.loc[df['UID'] == 'b@booking.com', 'Início'] = pd.NaT  # linha sem data no meio
+
+    save_dataframe_to_ical(df, 'repetido.ics')
+
+    lido = ler_calendario_ics(calendars_temporario / 'repetido.ics', aplicar_regras=False)
+    assert len(lido) == 3
+    assert lido['UID'].iloc[0] == 'a@airbnb.com'
+    assert lido['UID'].iloc[1:].str.endswith('@sistema-gestao-alugueis').all()
+
+
+def test_dataframe_vazio_gera_calendario_valido(calendars_temporario):
+    save_dataframe_to_ical(pd.DataFrame({'Início': [], 'Fim': [], 'Summary': []}), 'vazio.ics')
+
+    conteudo = (calendars_temporario / 'vazio.ics').read_bytes()
+    assert _validar_rfc5545(conteudo) == []
+    assert ler_calendario_ics(calendars_temporario / 'vazio.ics').empty
@@ -0,0 +1,63 @@
+import sys
+import os
+from datetime import datetime, timedelta
+
+import pandas as pd
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src import gsheets_api, services
+from fake_gspread import FakeClient
+
+CABECALHO = ['idReserva', 'Apartamento', 'Início', 'Fim', 'Dias', 'Pessoas', 'Quem', 'Origem',
+             'Status', 'Data Reserva', 'Última Atualização']
+
+
+def _tabela_consolidada():
+    hoje = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    linhas = [CABECALHO]
+    for i, apt in enumerate(['SM-C108', 'SM-C108', 'AP-101', 'AP-101', 'AP-201']):
+        inicio = hoje + timedelta(days=3 * i - 2)
+        fim = inicio + timedelta(days=2)
+        linhas.append([str(i + 1), apt, inicio.strftime('%d/%m/%Y 15:00'), fim.strftime('%d/%m/%Y 11:00'), '2', '2',
+                       f"Hóspede {i}", 'Airbnb' if i % 2 else 'Booking', 'Cancelado' if i == 4 else '',
+                       (hoje - timedelta(days=10 - i)).strftime('%d/%m/%Y'), '01/01/2030 10:00:00'])
+    return linhas
+
+
+@pytest.fixture
+def cliente(monkeypatch):
+    gsheets_api.invalidar_conexao()
+    gc = FakeClient({'Reservas Consolidadas': _tabela_consolidada()})
+    monkeypatch.setattr(gsheets_api, 'authenticate_google_sheets', lambda: gc)
+    yield gc
+    gsheets_api.invalidar_conexao()
+
+
+def test_snapshot_faz_uma_chamada_e_deriva_as_visoes(cliente):
+    snapshot = services.carregar_snapshot_consolidado()
+    chamadas_snapshot = cliente.planilha.requisicoes
+
+    proximos = snapshot.proximos_hospedes()
+    ultimas = snapshot.ultimas_reservas()
+
+    # Abrir a aba + um get_all_values; as visões não fazem chamadas
+    assert chamadas_snapshot == 2
+    assert cliente.planilha.requisicoes == chamadas_snapshot
+
+    pd.testing.assert_frame_equal(proximos, gsheets_api.baixar_proximos_hospedes_consolidados())
+    pd.testing.assert_frame_equal(ultimas, gsheets_api.baixar_ultimas_reservas_consolidadas())
+    assert sorted(proximos['Apartamento']) == ['AP-101', 'SM-C108']
+
+
+def test_reservas_tratadas_e_versao(cliente):
+    snapshot = services.carregar_snapshot_consolidado()
+
+    assert list(snapshot.reservas.columns) == ['Início', 'Fim', 'Apartamento', 'Status', 'Quem', 'Origem', 'Última Atualização']
+    assert pd.api.types.is_datetime64_any_dtype(snapshot.reservas['Início'])
+    assert len(snapshot.reservas) == 5
+    assert snapshot.versao
+
+    cliente.planilha.abas['Reservas Consolidadas'][1][6] = 'Outro hóspede'
+    assert services.carregar_snapshot_consolidado().versao != snapshot.versao
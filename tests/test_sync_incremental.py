@@ -0,0 +1,156 @@
+import sys
+import os
+
+import pandas as pd
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src import services, logic, manifest, data_loader
+from src.data_loader import ResultadoDownload
+
+OTA_URLS_TESTE = {
+    'ap1': {'airbnb': 'http://exemplo/ap1.ics', 'booking': None},
+    'ap2': {'airbnb': 'http://exemplo/ap2.ics', 'booking': None},
+}
+MAPA_TESTE = {'ap1': 'AP-1', 'ap2': 'AP-2'}
+
+
+def _aba(inicio, fim):
+    return pd.DataFrame({'Início': [inicio], 'Fim': [fim], 'Quem': ['Fulano'], 'Origem': ['Direto'], 'Status': ['']})
+
+
+def _valores(df):
+    # Valores brutos da aba, como devolvidos pelo values.batchGet
+    return [df.columns.tolist()] + df.values.tolist()
+
+
+@pytest.fixture
+def ambiente(tmp_path, monkeypatch):
+    """Isola a sincronização: arquivos em tmp_path e chamadas externas simuladas."""
+    estado = {
+        'feeds': {'ap1': 'hash-a', 'ap2': 'hash-b'},
+        'abas': {'AP-1': _aba('10/01/2030', '12/01/2030'), 'AP-2': _aba('15/01/2030', '18/01/2030')},
+        'merges': [],
+        'tratamentos': [],
+        'salvos': [],
+        'icals': {},
+    }
+
+    monkeypatch.setattr(manifest, 'SYNC_MANIFEST_FILE', tmp_path / 'sync_manifest.json')
+    monkeypatch.setattr(manifest, 'CONSOLIDACAO_CACHE_FILE', tmp_path / 'consolidacao_cache.pkl')
+    monkeypatch.setattr(manifest, 'RESERVAS_IDS_FILE', tmp_path / 'reservas_ids.json')
+    monkeypatch.setattr(services, 'CALENDARS_DIR', tmp_path)
+    monkeypatch.setattr(services, 'OTA_URLS', OTA_URLS_TESTE)
+    monkeypatch.setattr(services, 'APARTMENT_SHEET_MAP', MAPA_TESTE)
+    monkeypatch.setattr(logic, 'APARTMENT_SHEET_MAP', MAPA_TESTE)
+
+    def fake_baixar(ota_urls):
+        return {(apt, 'airbnb'): ResultadoDownload(apt, 'airbnb', f"{apt}_airbnb.ics", 'inalterado', sha256=estado['feeds'][apt])
+                for apt in ota_urls}
+
+    def fake_merge(file_ota, file_google, file_merged):
+        estado['merges'].append(file_merged)
+        open(file_merged, 'w').close()
+        return pd.DataFrame()
+
+    def fake_tratar(df):
+        estado['tratamentos'].append(df['Apartamento'].iloc[0])
+        return tratar_original(df)
+
+    tratar_original = logic.tratar_dataframe_consolidado
+    monkeypatch.setattr(services, 'baixar_calendarios_otas', fake_baixar)
+    def fake_salvar_ical(df, filename):
+        estado['icals'][filename] = df
+        open(tmp_path / filename, 'w').close()
+
+    monkeypatch.setattr(services, 'ler_valores_abas_em_lote', lambda mapa: {tab: _valores(df) for tab, df in estado['abas'].items()})
+    monkeypatch.setattr(services, 'save_dataframe_to_ical', fake_salvar_ical)
+    monkeypatch.setattr(services, 'merge_ical_files', fake_merge)
+    monkeypatch.setattr(logic, 'tratar_dataframe_consolidado', fake_tratar)
+    monkeypatch.setattr(logic, 'salvar_df_no_gsheet', lambda df, tab: estado['salvos'].append(df))
+    for apt in OTA_URLS_TESTE:
+        open(tmp_path / f"{apt}_airbnb.ics", 'w').close()
+    return estado
+
+
+def test_apartamentos_inalterados_sao_pulados(ambiente):
+    log = services.sincronizar_dados_completo()
+    assert len(ambiente['merges']) == 2
+    assert "Apartamentos: 2 processados, 0 pulados." in log
+    assert sorted(ambiente['tratamentos']) == ['AP-1', 'AP-2']
+
+    # Segunda execução sem mudanças: nada é reprocessado
+    ambiente['merges'].clear()
+    ambiente['tratamentos'].clear()
+    log = services.sincronizar_dados_completo()
+    assert ambiente['merges'] == []
+    assert ambiente['tratamentos'] == []
+    assert "Apartamentos: 0 processados, 2 pulados (ap1, ap2)." in log
+    assert len(ambiente['salvos'][-1]) == 2
+
+    # Mudança no feed de ap2 e na aba de ap1
+    ambiente['feeds']['ap2'] = 'hash-novo'
+    ambiente['abas']['AP-1'] = _aba('20/01/2030', '22/01/2030')
+    log = services.sincronizar_dados_completo()
+    assert [os.path.basename(m) for m in ambiente['merges']] == ['ap1_merged.ics', 'ap2_merged.ics']
+    assert ambiente['tratamentos'] == ['AP-1']
+    consolidado = ambiente['salvos'][-1]
+    assert '20/01/2030 15:00' in consolidado['Início'].tolist()
+
+
+def test_forcar_sincronizacao_completa(ambiente):
+    services.sincronizar_dados_completo()
+    ambiente['merges'].clear()
+    ambiente['tratamentos'].clear()
+
+    log = services.sincronizar_dados_completo(forcar=True)
+    assert len(ambiente['merges']) == 2
+    assert sorted(ambiente['tratamentos']) == ['AP-1', 'AP-2']
+    assert "Apartamentos: 2 processados, 0 pulados." in log
+
+    registrado = manifest.carregar_manifesto()
+    assert registrado['apartamentos']['ap1']['feeds'] == {'airbnb': 'hash-a'}
+    assert registrado['consolidacao']['AP-2']['linhas'] == 1
+
+
+def test_aba_sem_status_gera_ics_com_colunas_de_reservas(ambiente):
+    ambiente['abas']['AP-2'] = _aba('15/01/2030', '18/01/2030').drop(columns=['Status']).assign(Observação='chave na portaria')
+
+    services.sincronizar_dados_completo()
+
+    # Cabeçalho com 'Início' e 'Fim' basta para o .ics (a consolidação continua exigindo 'Status')
+    assert ambiente['icals']['ap2_google.ics'].columns.tolist() == ['Início', 'Fim', 'Quem', 'Origem']
+    assert ambiente['icals']['ap1_google.ics'].columns.tolist() == ['Início', 'Fim', 'Status', 'Quem', 'Origem']
+
+    # Coluna fora das reservas não entra no hash do manifesto: nada é reprocessado
+    ambiente['merges'].clear()
+    ambiente['abas']['AP-2']['Observação'] = 'chave com o porteiro'
+    log = services.sincronizar_dados_completo()
+    assert ambiente['merges'] == []
+    assert "Apartamentos: 0 processados, 2 pulados (ap1, ap2)." in log
+
+
+def _feed_airbnb(dtstamp, fim='20300112'):
+    return (f"BEGIN:VCALENDAR\r\nBEGIN:VEVENT\r\nSUMMARY:Reserved\r\nDTSTART;VALUE=DATE:20300110\r\n"
+            f"DTEND;VALUE=DATE:{fim}\r\nDTSTAMP:{dtstamp}\r\nUID:x@airbnb.com\r\nEND:VEVENT\r\nEND:VCALENDAR\r\n").encode()
+
+
+def test_feed_que_so_muda_o_dtstamp_e_pulado(ambiente, tmp_path, monkeypatch):
+    # Downloads de verdade (data_loader), com o servidor da OTA simulado
+    feed = {'conteudo': _feed_airbnb('20251214T004524Z')}
+    monkeypatch.setattr(data_loader, 'CALENDARS_DIR', tmp_path)
+    monkeypatch.setattr(data_loader, '_baixar_conteudo', lambda url, timeout, headers=None: (feed['conteudo'], {}))
+    monkeypatch.setattr(services, 'baixar_calendarios_otas', data_loader.baixar_calendarios_otas)
+
+    services.sincronizar_dados_completo()
+    ambiente['merges'].clear()
+
+    feed['conteudo'] = _feed_airbnb('20251215T101010Z')
+    log = services.sincronizar_dados_completo()
+    assert ambiente['merges'] == []
+    assert "Apartamentos: 0 processados, 2 pulados (ap1, ap2)." in log
+
+    feed['conteudo'] = _feed_airbnb('20251216T101010Z', fim='20300114')
+    log = services.sincronizar_dados_completo()
+    assert "Apartamentos: 2 processados, 0 pulados." in log
@@ -0,0 +1,139 @@
+import sys
+import os
+import warnings
+from datetime import time, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.logic import tratar_dataframe_consolidado, atualizar_status_concluido
+from src.utils import parse_pt_dates, limpar_cache_datas
+
+MESES = ['jan', 'fev', 'mar', 'abr', 'mai', 'jun', 'jul', 'ago', 'set', 'out', 'nov', 'dez']
+
+
+def tratar_linha_a_linha(df):
+    """Versão anterior de tratar_dataframe_consolidado (cópias, astype(str) e .apply por linha)."""
+    if df is None or df.empty:
+        return pd.DataFrame()
+
+    df_tratado = df.copy()
+    df_tratado = df_tratado.loc[:, ~df_tratado.columns.duplicated()]
+
+    if 'Início' in df_tratado.columns:
+        df_tratado = df_tratado.dropna(subset=['Início'])
+        df_tratado = df_tratado[df_tratado['Início'].astype(str).str.strip() != '']
+
+    if 'Início' in df_tratado.columns:
+        df_tratado['Início'] = parse_pt_dates(df_tratado['Início'])
+    if 'Fim' in df_tratado.columns:
+        df_tratado['Fim'] = parse_pt_dates(df_tratado['Fim'])
+
+    df_tratado = df_tratado.dropna(subset=['Início', 'Fim'])
+
+    def add_default_hours(dt, hour_val):
+        if pd.notnull(dt) and dt.time() == time(0, 0):
+            return dt + timedelta(hours=hour_val)
+        return dt
+
+    df_tratado['Início'] = df_tratado['Início'].apply(lambda x: add_default_hours(x, 15))
+    df_tratado['Fim'] = df_tratado['Fim'].apply(lambda x: add_default_hours(x, 11))
+
+    df_tratado = atualizar_status_concluido(df_tratado)
+
+    if 'Origem' not in df_tratado.columns:
+        df_tratado['Origem'] = 'Desconhecido'
+
+    return df_tratado
+
+
+def gerar_abas_concatenadas(n, seed=3, com_origem=True):
+    """Abas brutas concatenadas: datas em português, com/sem hora, vazias, espaços, nulos e lixo."""
+    rng = np.random.default_rng(seed)
+    inicios = pd.Timestamp('2022-01-01') + pd.to_timedelta(rng.integers(0, 3000, n), unit='D')
+    fins = inicios + pd.to_timedelta(rng.integers(1, 8, n), unit='D')
+    tipos = rng.choice(['pt', 'barra', 'hora', 'meia-noite', 'vazio', 'espacos', 'nulo', 'invalido'],
+                       size=n, p=[0.5, 0.2, 0.15, 0.05, 0.04, 0.02, 0.02, 0.02])
+
+    def celula(data, tipo, hora):
+        if tipo == 'pt':
+            return f"{data.day}-{MESES[data.month - 1]}.{data:%y}"
+        if tipo == 'barra':
+            return f"{data:%d/%m/%Y}"
+        if tipo == 'hora':
+            return f"{data:%d/%m/%Y} {hora}"
+        if tipo == 'meia-noite':
+            return f"{data:%d/%m/%Y} 00:00"
+        if tipo == 'vazio':
+            return ''
+        if tipo == 'espacos':
+            return '   '
+        if tipo == 'nulo':
+            return None
+        return 'a combinar'
+
+    df = pd.DataFrame({
+        'Início': [celula(d, t, '14:30') for d, t in zip(inicios, tipos)],
+        'Fim': [celula(d, t, '10:00') for d, t in zip(fins, np.roll(tipos, 1))],
+        'Apartamento': [f"SM-C{100 + i % 4}" for i in range(n)],
+        'Quem': [f"Hóspede {i}" for i in range(n)],
+        'Status': ['Cancelado' if i % 7 == 0 else '' for i in range(n)],
+    })
+    if com_origem:
+        df['Origem'] = rng.choice(['Airbnb', 'Booking', 'Direto'], n)
+    return df
+
+
+@pytest.fixture(autouse=True)
+def cache_vazio():
+    limpar_cache_datas()
+    yield
+    limpar_cache_datas()
+
+
+def _comparar(df):
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        esperado = tratar_linha_a_linha(df)
+        obtido = tratar_dataframe_consolidado(df)
+    pd.testing.assert_frame_equal(obtido, esperado)
+    return obtido
+
+
+@pytest.mark.parametrize('com_origem', [True, False])
+def test_mesmo_resultado_da_versao_linha_a_linha(com_origem):
+    df = gerar_abas_concatenadas(3000, com_origem=com_origem)
+    original = df.copy()
+
+    obtido = _comparar(df)
+
+    assert 0 < len(obtido) < len(df)
+    # O DataFrame de entrada não é alterado
+    pd.testing.assert_frame_equal(df, original)
+
+
+def test_colunas_duplicadas_e_horarios_padrao():
+    df = pd.concat([
+        pd.DataFrame({'Início': ['10/01/2030', '11/01/2030 00:00', '12/01/2030 18:00', '  ', None],
+                      'Fim': ['12/01/2030', '13/01/2030 00:01', '14/01/2030', '15/01/2030', '16/01/2030']}),
+        pd.DataFrame({'Quem': list('ABCDE'), 'Início': ['x'] * 5}),
+    ], axis=1)
+
+    obtido = _comparar(df)
+
+    assert obtido['Quem'].tolist() == ['A', 'B', 'C']
+    assert obtido['Início'].dt.hour.tolist() == [15, 15, 18]
+    assert obtido['Fim'].dt.strftime('%H:%M').tolist() == ['11:00', '00:01', '11:00']
+    assert obtido['Origem'].unique().tolist() == ['Desconhecido']
+
+
+def test_nenhuma_linha_valida():
+    df = pd.DataFrame({'Início': ['', 'lixo'], 'Fim': ['10/01/2030', ''], 'Quem': ['A', 'B']})
+
+    obtido = _comparar(df)
+
+    assert obtido.empty
+    assert list(obtido.columns) == ['Início', 'Fim', 'Quem', 'Status', 'Origem']